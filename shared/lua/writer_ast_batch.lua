@@ -0,0 +1,85 @@
+-- ../shared/lua/writer_ast_batch.lua
+-- Custom writer used by PandocAST.load_many (shared/python/pandoc_ast.py):
+--   converts many markdown files to JSON ASTs in one pandoc process.
+--
+-- Usage (input document is ignored, pass an empty stdin):
+--   pandoc -f markdown -t writer_ast_batch.lua \
+--     -M pandoc-ast-batch=<file with one path per line> \
+--     -M pandoc-ast-format=<reader format>
+--
+-- Output: one line per input path, in order. Each line is the document's
+-- JSON AST (same as `pandoc <path> -f <format> -t json`), or `null`
+-- if the file could not be read / parsed.
+
+local function meta_string(meta, key)
+  local v = meta[key]
+  if v == nil then
+    return nil
+  end
+  return pandoc.utils.stringify(v)
+end
+
+local function read_file(path)
+  local f = io.open(path, "rb")
+  if not f then
+    return nil
+  end
+  local text = f:read("a")
+  f:close()
+
+  -- Same input normalization as the pandoc CLI: drop a UTF-8 BOM, use LF
+  if text:sub(1, 3) == "\239\187\191" then
+    text = text:sub(4)
+  end
+  text = text:gsub("\r\n", "\n")
+  return text
+end
+
+-- pandoc.read starts from empty reader options, while the CLI loads the
+-- default abbreviations data file ("No.", "Dr.", ... keep a non-breaking
+-- space). Load the same list once so both paths give identical ASTs.
+local function default_reader_options()
+  local ok, data = pcall(pandoc.pipe, "pandoc",
+    { "--print-default-data-file", "abbreviations" }, "")
+  -- Read as a set: table keys are the entries
+  local abbreviations = {}
+  if ok then
+    for line in data:gmatch("[^\n]+") do
+      abbreviations[line] = true
+    end
+  end
+  return { abbreviations = abbreviations }
+end
+
+local function convert(path, format, reader_options)
+  local text = read_file(path)
+  if text == nil then
+    return "null"
+  end
+  local ok, doc = pcall(pandoc.read, text, format, reader_options)
+  if not ok then
+    return "null"
+  end
+  return pandoc.write(doc, "json")
+end
+
+function Writer(doc, opts)
+  local list_path = meta_string(doc.meta, "pandoc-ast-batch")
+  local format = meta_string(doc.meta, "pandoc-ast-format") or "markdown"
+  if not list_path then
+    error("writer_ast_batch.lua: missing -M pandoc-ast-batch=<list file>")
+  end
+
+  local reader_options = default_reader_options()
+  local out = {}
+  for path in io.lines(list_path) do
+    if path ~= "" then
+      out[#out + 1] = convert(path, format, reader_options)
+    end
+  end
+
+  if #out == 0 then
+    return ""
+  end
+  return table.concat(out, "\n") .. "\n"
+end
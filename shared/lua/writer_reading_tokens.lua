@@ -0,0 +1,167 @@
+-- ../shared/lua/writer_reading_tokens.lua
+-- Custom writer for PandocAST(reader="lean") (shared/python/pandoc_ast.py):
+--   applies the PandocAST counting rules inside pandoc and emits only the
+--   Str texts that would be counted, instead of the whole JSON AST.
+--
+-- Usage:
+--   pandoc <file> -f <reader format> -t writer_reading_tokens.lua \
+--     [-M reading-focus="<id or class> ..."] [-M reading-require-focus=true]
+--
+-- Output (JSON):
+--   { "strs": [ "<Str text>", ... ],
+--     "meta": { "word-cloud": { "t": "MetaBool", "c": true } } }
+--
+-- Keep the rules below in sync with ast_walker.COUNT_CHILDREN and
+-- PandocAST._select_nodes, _extract_focus_blocks and _meta_inlines.
+
+local FOCUS_KEY   = "reading-focus"
+local REQUIRE_KEY = "reading-require-focus"
+
+----------------------------------------------------------
+-- Inline / block collectors
+----------------------------------------------------------
+local collect_blocks
+
+local function collect_inlines(inlines, out)
+  for _, el in ipairs(inlines) do
+    local t = el.t
+    if t == "Str" then
+      out[#out + 1] = el.text
+    elseif t == "Emph" or t == "Strong" or t == "Span"
+        or t == "Quoted" or t == "Link" then
+      collect_inlines(el.content, out)
+    elseif t == "Image" then
+      -- alt text
+      collect_inlines(el.caption, out)
+    end
+    -- Code, Space, SoftBreak, LineBreak, RawInline, ...: skipped
+  end
+end
+
+collect_blocks = function(blocks, out)
+  for _, blk in ipairs(blocks) do
+    local t = blk.t
+    if t == "Div" then
+      -- Skip navigation and external refs
+      if blk.identifier ~= "quarto-navigation-envelope"
+          and not blk.classes:includes("external-refs") then
+        collect_blocks(blk.content, out)
+      end
+    elseif t == "Para" or t == "Plain" or t == "Header" then
+      collect_inlines(blk.content, out)
+    elseif t == "BlockQuote" or t == "Figure" then
+      collect_blocks(blk.content, out)
+    elseif t == "BulletList" or t == "OrderedList" then
+      for _, item in ipairs(blk.content) do
+        collect_blocks(item, out)
+      end
+    end
+    -- Table: PandocAST never counts table content (nor its caption).
+    -- RawBlock, CodeBlock, ...: skipped
+  end
+end
+
+----------------------------------------------------------
+-- Focus selection
+----------------------------------------------------------
+local function matches_focus(div, focus)
+  if div.identifier ~= "" and focus[div.identifier] then
+    return true
+  end
+  for _, cls in ipairs(div.classes) do
+    if focus[cls] then
+      return true
+    end
+  end
+  return false
+end
+
+local function extract_focus_blocks(blocks, focus, out)
+  for _, blk in ipairs(blocks) do
+    if blk.t == "Div" then
+      if matches_focus(blk, focus) then
+        for _, inner in ipairs(blk.content) do
+          out[#out + 1] = inner
+        end
+      else
+        extract_focus_blocks(blk.content, focus, out)
+      end
+    end
+  end
+  return out
+end
+
+----------------------------------------------------------
+-- Meta
+----------------------------------------------------------
+local function collect_meta(meta, out)
+  for _, key in ipairs({ "title", "subtitle", "description" }) do
+    local v = meta[key]
+    local ty = pandoc.utils.type(v)
+    if ty == "Inlines" then
+      collect_inlines(v, out)
+    elseif ty == "string" then
+      out[#out + 1] = v
+    end
+    -- MetaBlocks / others are not counted
+  end
+end
+
+-- Export meta["word-cloud"] in Pandoc JSON shape (MetaBool / MetaString)
+local function word_cloud_meta(meta)
+  local v = meta["word-cloud"]
+  local ty = pandoc.utils.type(v)
+  if ty == "boolean" then
+    return { t = "MetaBool", c = v }
+  elseif ty == "string" then
+    return { t = "MetaString", c = v }
+  elseif ty == "Inlines" or ty == "Blocks" then
+    -- Same JSON as in the full AST (plain tables, not pandoc objects)
+    return { t = "Meta" .. ty, c = pandoc.json.decode(pandoc.json.encode(v), false) }
+  elseif v ~= nil then
+    return { t = "Meta" .. ty }
+  end
+  return nil
+end
+
+----------------------------------------------------------
+-- Writer
+----------------------------------------------------------
+function Writer(doc, opts)
+  local meta = doc.meta
+
+  local focus = {}
+  local has_focus = false
+  if meta[FOCUS_KEY] ~= nil then
+    for name in pandoc.utils.stringify(meta[FOCUS_KEY]):gmatch("%S+") do
+      focus[name] = true
+      has_focus = true
+    end
+  end
+  local require_focus = meta[REQUIRE_KEY] == true
+
+  local strs = {}
+  if not has_focus then
+    collect_meta(meta, strs)
+    collect_blocks(doc.blocks, strs)
+  else
+    local focus_blocks = extract_focus_blocks(doc.blocks, focus, {})
+    if #focus_blocks > 0 then
+      collect_blocks(focus_blocks, strs)
+    elseif not require_focus then
+      collect_blocks(doc.blocks, strs)
+    end
+  end
+
+  local out_meta = {}
+  local wc = word_cloud_meta(meta)
+  if wc ~= nil then
+    out_meta["word-cloud"] = wc
+  end
+
+  -- Empty Lua tables would encode as [] / {} ambiguously; be explicit
+  return pandoc.json.encode({
+    strs = (#strs > 0) and strs or pandoc.List(),
+    meta = next(out_meta) and out_meta or pandoc.json.null,
+  }) .. "\n"
+end
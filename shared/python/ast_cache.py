@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# ../shared/python/ast_cache.py
+
+from __future__ import annotations
+
+import hashlib
+import marshal
+import os
+import subprocess
+import sys
+import tempfile
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+# Upper bound for the on-disk cache (bytes), AST entries and block memos
+# together; least recently used files are evicted once it is exceeded.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Environment overrides
+CACHE_DIR_ENV_VAR = "PANDOC_AST_CACHE_DIR"
+CACHE_MAX_ENV_VAR = "PANDOC_AST_CACHE_MAX_BYTES"
+CACHE_OFF_ENV_VAR = "PANDOC_AST_CACHE"  # "0" / "off" disables the cache
+
+# Entries are marshal dumps; the format is tied to the interpreter
+_MARSHAL_TAG = f"py{sys.version_info[0]}.{sys.version_info[1]}-m{marshal.version}"
+
+_ENTRY_SUFFIX = ".ast"
+
+# Per-document block memos live in this subdirectory of the cache
+_BLOCKS_SUBDIR = "blocks"
+_MEMO_SUFFIX = ".memo"
+
+# Block memo entry: (syllables, words, counted tokens)
+BlockEntry = Tuple[int, int, Tuple[str, ...]]
+
+
+@lru_cache(maxsize=1)
+def pandoc_version() -> str:
+    """Return the first line of `pandoc --version` (cached per process)."""
+    result = subprocess.run(
+        ["pandoc", "--version"], check=True, capture_output=True
+    )
+    lines = result.stdout.decode("utf-8", "replace").splitlines()
+    return lines[0].strip() if lines else ""
+
+
+def _write_atomic(directory: Path, path: Path, blob: bytes) -> None:
+    """Write blob to path through a temp file in directory + os.replace."""
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class ASTCache:
+    """
+    Content-addressed on-disk cache for Pandoc JSON ASTs.
+
+    Keys combine the source bytes, the pandoc reader format and the pandoc
+    version, so any change to one of them is a miss. Entries are stored as
+    zlib-compressed marshal dumps (much smaller than the JSON, and as fast
+    to decode). The directory, including the block memos of its "blocks"
+    subdirectory (BlockMemo), is bounded by `max_bytes`; reads refresh a
+    file's mtime and writes evict the least recently used files.
+
+    hits / misses count lookups made through this instance.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self._dir = Path(directory)
+        self._max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self) -> Path:
+        """Return the cache directory."""
+        return self._dir
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit / miss counters as a dict."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def key(source: bytes, reader_format: str, version: Optional[str] = None) -> str:
+        """
+        Return the cache key for a source document.
+
+        :param source: Raw bytes of the document.
+        :param reader_format: Pandoc reader format string (-f).
+        :param version: Pandoc version string (defaults to the installed one).
+        """
+        h = hashlib.sha256()
+        h.update(source)
+        h.update(b"\0")
+        h.update(reader_format.encode("utf-8"))
+        h.update(b"\0")
+        h.update((version if version is not None else pandoc_version()).encode("utf-8"))
+        h.update(b"\0")
+        h.update(_MARSHAL_TAG.encode("ascii"))
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self._dir / (key + _ENTRY_SUFFIX)
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached AST for key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            blob = path.read_bytes()
+            ast = marshal.loads(zlib.decompress(blob))
+        except (OSError, ValueError, EOFError, TypeError, zlib.error):
+            self.misses += 1
+            return None
+
+        # Refresh recency for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return ast
+
+    def put(self, key: str, ast: Dict[str, Any]) -> None:
+        """Store an AST under key (atomically), then enforce the size bound."""
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            blob = zlib.compress(marshal.dumps(ast), 1)
+            _write_atomic(self._dir, self._entry_path(key), blob)
+        except (OSError, ValueError):
+            # A cache that cannot be written is just a cold cache
+            return
+
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Drop least recently used files (AST entries and block memos)
+        until the directory fits max_bytes.
+        """
+        entries = []
+        total = 0
+        for directory, suffix in ((self._dir, _ENTRY_SUFFIX),
+                                  (self._dir / _BLOCKS_SUBDIR, _MEMO_SUFFIX)):
+            try:
+                with os.scandir(directory) as it:
+                    for de in it:
+                        if not de.name.endswith(suffix):
+                            continue
+                        try:
+                            st = de.stat()
+                        except OSError:
+                            continue
+                        entries.append((st.st_mtime_ns, st.st_size, de.path))
+                        total += st.st_size
+            except OSError:
+                continue
+
+        if total <= self._max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                continue
+
+
+class BlockMemo:
+    """
+    Per-document memo of block-level counting results.
+
+    For every document, one file maps the hash of each counted top-level
+    block (its normalized JSON) to that block's (syllables, words, tokens)
+    contribution. When a long document is edited, only blocks whose hash
+    is not in the memo are recounted. Each save replaces the document's
+    file with the blocks it currently has, so memos do not grow with edits.
+
+    `salt` is mixed into the document key; callers pass everything that
+    changes counting results (counting rules, vowel set, ...). A moved
+    document or a new salt starts a new memo; the old one is no longer
+    read, so with `cache` (the ASTCache whose "blocks" subdirectory holds
+    the memos) it ages out under that cache's LRU size bound. Without a
+    cache, nothing bounds the directory.
+
+    reused / recomputed count blocks looked up through this instance.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        cache: Optional[ASTCache] = None,
+    ) -> None:
+        self._dir = Path(directory)
+        self._cache = cache
+        self.reused = 0
+        self.recomputed = 0
+
+    @property
+    def directory(self) -> Path:
+        """Return the memo directory."""
+        return self._dir
+
+    def stats(self) -> Dict[str, int]:
+        """Return the reused / recomputed counters as a dict."""
+        return {"reused": self.reused, "recomputed": self.recomputed}
+
+    @staticmethod
+    def doc_key(path: Union[str, Path], salt: str) -> str:
+        """Return the memo key of a document (resolved path + salt)."""
+        h = hashlib.sha256()
+        h.update(str(Path(path).resolve()).encode("utf-8"))
+        h.update(b"\0")
+        h.update(salt.encode("utf-8"))
+        h.update(b"\0")
+        h.update(_MARSHAL_TAG.encode("ascii"))
+        return h.hexdigest()
+
+    def _memo_path(self, doc_key: str) -> Path:
+        return self._dir / (doc_key + _MEMO_SUFFIX)
+
+    def load(self, doc_key: str) -> Dict[str, BlockEntry]:
+        """Return the block memo of a document ({} if there is none)."""
+        path = self._memo_path(doc_key)
+        try:
+            memo = marshal.loads(zlib.decompress(path.read_bytes()))
+        except (OSError, ValueError, EOFError, TypeError, zlib.error):
+            return {}
+
+        # Refresh recency for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return memo if isinstance(memo, dict) else {}
+
+    def save(self, doc_key: str, entries: Dict[str, BlockEntry]) -> None:
+        """Replace the block memo of a document (atomically), then enforce
+        the cache's size bound."""
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            _write_atomic(self._dir, self._memo_path(doc_key),
+                          zlib.compress(marshal.dumps(entries), 1))
+        except (OSError, ValueError):
+            # Not persisted: the next run simply recounts these blocks
+            return
+
+        if self._cache is not None:
+            self._cache._evict()
+
+
+# Process-wide instances, one per cache directory (a watch daemon serves
+# several projects from one process)
+_default_caches: Dict[str, ASTCache] = {}
+_default_block_memos: Dict[str, BlockMemo] = {}
+
+
+def default_cache() -> Optional[ASTCache]:
+    """
+    Return the process-wide cache, or None if disabled.
+
+    Location: $PANDOC_AST_CACHE_DIR, else <QUARTO_PROJECT_DIR>/.quarto/pandoc-ast-cache.
+    Set PANDOC_AST_CACHE=0 to disable.
+    """
+    if os.getenv(CACHE_OFF_ENV_VAR, "").strip().lower() in {"0", "off", "false", "no"}:
+        return None
+
+    directory = str(os.getenv(CACHE_DIR_ENV_VAR) or (
+        Path(os.getenv("QUARTO_PROJECT_DIR", ".")) / ".quarto" / "pandoc-ast-cache"
+    ))
+    cache = _default_caches.get(directory)
+    if cache is None:
+        try:
+            max_bytes = int(os.getenv(CACHE_MAX_ENV_VAR, DEFAULT_MAX_BYTES))
+        except ValueError:
+            max_bytes = DEFAULT_MAX_BYTES
+        cache = _default_caches[directory] = ASTCache(directory, max_bytes=max_bytes)
+
+    return cache
+
+
+def default_block_memo() -> Optional[BlockMemo]:
+    """
+    Return the process-wide block memo, or None if the AST cache is disabled.
+
+    Location: the "blocks" subdirectory of the default AST cache, within
+    its size bound.
+    """
+    cache = default_cache()
+    if cache is None:
+        return None
+
+    key = str(cache.directory)
+    memo = _default_block_memos.get(key)
+    if memo is None:
+        memo = _default_block_memos[key] = BlockMemo(cache.directory / _BLOCKS_SUBDIR, cache)
+
+    return memo
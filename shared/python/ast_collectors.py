@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# ../shared/python/ast_collectors.py
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ast_walker import ASTWalker, CONTENT, COUNT_CHILDREN
+
+Node = Dict[str, Any]
+
+# Truthy / falsy spellings accepted for string-valued meta flags
+_TRUE_STRINGS = {"true", "yes", "on", "1"}
+_FALSE_STRINGS = {"false", "no", "off", "0"}
+
+# Inline containers whose text is part of a stringified inline list
+# (wider than COUNT_CHILDREN: formatting does not hide text here)
+_TEXT_CHILDREN = dict(COUNT_CHILDREN)
+_TEXT_CHILDREN.update({
+    "Underline": CONTENT,
+    "Strikeout": CONTENT,
+    "Superscript": CONTENT,
+    "Subscript": CONTENT,
+    "SmallCaps": CONTENT,
+    "Cite": 1,              # [citations, inlines]
+})
+
+
+def meta_flag(node: Optional[Node], default: bool = False) -> bool:
+    """
+    Read a boolean flag from a Pandoc JSON meta value.
+
+    MetaBool is taken as is; MetaString accepts true/yes/on/1 and
+    false/no/off/0. Anything else returns default.
+    """
+    if not node:
+        return default
+
+    t = node.get("t")
+    c = node.get("c")
+
+    # Pandoc JSON: MetaBool
+    if t == "MetaBool":
+        return bool(c)
+
+    # Eğer string olarak yazıldıysa (word-cloud: "true"/"false")
+    if t == "MetaString":
+        val = str(c).strip().lower()
+        if val in _TRUE_STRINGS:
+            return True
+        if val in _FALSE_STRINGS:
+            return False
+
+    return default
+
+
+def inline_text(inlines: Sequence[Node]) -> str:
+    """Return the plain text of a list of inlines (a small stringify)."""
+    parts: List[str] = []
+
+    def on_str(node: Node) -> None:
+        parts.append(node["c"])
+
+    def on_space(node: Node) -> None:
+        parts.append(" ")
+
+    def on_code(node: Node) -> None:
+        parts.append(node["c"][1])
+
+    walker = ASTWalker(_TEXT_CHILDREN)
+    walker.register("Str", on_str)
+    walker.register("Code", on_code)
+    for t in ("Space", "SoftBreak", "LineBreak"):
+        walker.register(t, on_space)
+    walker.walk(inlines)
+    return "".join(parts).strip()
+
+
+class Collector:
+    """
+    Base class for PandocAST collectors.
+
+    All collectors passed to PandocAST(collectors=[...]) are filled during
+    the single traversal that also computes the reading statistics, so
+    they see exactly the counted content (focus selection, skipped Divs,
+    Code, ... apply to them too).
+
+    Override any of:
+      attach(walker)  register visitors / sinks on the ASTWalker
+      meta(meta)      receive the document meta dict once, before the walk
+      finish()        post-process after the walk
+    """
+
+    def attach(self, walker: ASTWalker) -> None:
+        pass
+
+    def meta(self, meta: Dict[str, Any]) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+class HeadingCollector(Collector):
+    """Collect (level, identifier, text) for every counted Header."""
+
+    def __init__(self) -> None:
+        self.headings: List[Tuple[int, str, str]] = []
+
+    def attach(self, walker: ASTWalker) -> None:
+        walker.register("Header", self._visit)
+
+    def _visit(self, node: Node) -> None:
+        level, attr, inlines = node["c"]
+        self.headings.append((level, attr[0], inline_text(inlines)))
+
+
+class LinkCollector(Collector):
+    """Collect (url, text) for every counted Link."""
+
+    def __init__(self) -> None:
+        self.links: List[Tuple[str, str]] = []
+
+    def attach(self, walker: ASTWalker) -> None:
+        walker.register("Link", self._visit)
+
+    def _visit(self, node: Node) -> None:
+        c = node.get("c")
+        if not (isinstance(c, list) and len(c) >= 3):
+            return
+        target = c[2]
+        url = target[0] if isinstance(target, list) and target else ""
+        self.links.append((url, inline_text(c[1])))
+
+
+class MetaFlagCollector(Collector):
+    """Read boolean meta flags (e.g. word-cloud, stats-panel) into .flags."""
+
+    def __init__(self, *keys: str, default: bool = False) -> None:
+        self._keys = keys
+        self._default = default
+        self.flags: Dict[str, bool] = {}
+
+    def meta(self, meta: Dict[str, Any]) -> None:
+        for key in self._keys:
+            self.flags[key] = meta_flag(meta.get(key), self._default)
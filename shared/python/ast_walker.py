@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# ../shared/python/ast_walker.py
+
+from __future__ import annotations
+
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+Node = Dict[str, Any]
+ChildrenSpec = Union[str, int, Callable[[Node], Optional[Sequence[Node]]]]
+
+# Returned by a visitor to stop the walker from descending into that node
+SKIP = object()
+
+# Children spec meaning "node['c'] is the child list"
+CONTENT = "c"
+
+# Divs never counted (navigation and external refs)
+SKIPPED_DIV_IDS = frozenset({"quarto-navigation-envelope"})
+SKIPPED_DIV_CLASSES = frozenset({"external-refs"})
+
+
+# ----------------------------------------------------------------------
+# Children specs (JSON AST form)
+#
+# A spec is either CONTENT (children are node["c"]), an int i (children
+# are node["c"][i]) or a function returning the child nodes to descend
+# into (any iterable), or None for a leaf / a node whose content is not
+# counted. Plain specs avoid a Python call per container on the hot path.
+# ----------------------------------------------------------------------
+
+def _div_children(node: Node) -> Optional[Sequence[Node]]:
+    # c = [attr, [blocks...]]
+    attr, inner_blocks = node["c"]
+    if attr[0] in SKIPPED_DIV_IDS:
+        return None
+    for cls_name in attr[1] or []:
+        if cls_name in SKIPPED_DIV_CLASSES:
+            return None
+    return inner_blocks
+
+
+def _figure_children(node: Node) -> Optional[Sequence[Node]]:
+    c = node.get("c")
+    if not isinstance(c, list):
+        return None
+    if len(c) >= 3 and isinstance(c[2], list):
+        return c[2]
+    return [x for x in c if isinstance(x, dict) and "t" in x]
+
+
+def _bullet_list_children(node: Node) -> Iterable[Node]:
+    # The items' blocks in order, without building a flat list
+    return chain.from_iterable(node["c"])
+
+
+def _ordered_list_children(node: Node) -> Iterable[Node]:
+    return chain.from_iterable(node["c"][1])
+
+
+def _table_children(node: Node) -> Optional[Sequence[Node]]:
+    # Kept as historically implemented: c[0] is the Attr (a list) in the
+    # JSON AST, so tables do not contribute any content.
+    c = node.get("c")
+    caption = c[0] if isinstance(c, list) and c else None
+    if not (isinstance(caption, dict) and caption.get("t") == "Caption"):
+        return None
+    _, long_blocks = caption["c"]
+    caption_inlines: List[Node] = []
+    for b in long_blocks:
+        if b["t"] in ("Para", "Plain"):
+            caption_inlines.extend(b["c"])
+    return caption_inlines
+
+
+def _quoted_children(node: Node) -> Optional[Sequence[Node]]:
+    # Quoted: [quote_type, inlines]
+    c = node.get("c")
+    if isinstance(c, list) and len(c) == 2:
+        return c[1]
+    return None
+
+
+def _link_like_children(node: Node) -> Optional[Sequence[Node]]:
+    # Link / Image: [attr, inlines, target]
+    c = node.get("c")
+    if not isinstance(c, list):
+        return None
+    if len(c) >= 2 and isinstance(c[1], list):
+        return c[1]
+    if len(c) >= 1 and isinstance(c[0], list):
+        return c[0]
+    return None
+
+
+# Traversal rules used for reading statistics: which node types are
+# descended into and how. Types missing here (Code, RawInline, RawBlock,
+# CodeBlock, ...) are leaves.
+COUNT_CHILDREN: Mapping[str, ChildrenSpec] = {
+    # Blocks
+    "Div": _div_children,
+    "Para": CONTENT,
+    "Plain": CONTENT,
+    "Header": 2,            # [level, attr, inlines]
+    "BlockQuote": CONTENT,
+    "Figure": _figure_children,
+    "BulletList": _bullet_list_children,
+    "OrderedList": _ordered_list_children,
+    "Table": _table_children,
+    # Inlines
+    "Emph": CONTENT,
+    "Strong": CONTENT,
+    "Span": 1,              # [attr, inlines]
+    "Quoted": _quoted_children,
+    "Link": _link_like_children,
+    "Image": _link_like_children,
+}
+
+# Traversal rules for focus-block selection: only Div -> Div nesting.
+DIV_CHILDREN: Mapping[str, ChildrenSpec] = {
+    "Div": 1,               # [attr, blocks]
+}
+
+
+class ASTWalker:
+    """
+    Iterative, table-driven walker over Pandoc JSON AST nodes.
+
+    - children: node type -> children spec (see above). Types without an
+      entry are leaves. Defaults to COUNT_CHILDREN.
+    - register(type, visitor): visitor(node) runs when a node of that type
+      is reached (pre-order). Returning SKIP prevents the walker from
+      descending into that node.
+    - collect(type): returns a list that is filled with every node of that
+      type, without a Python call per node (cheapest way to gather leaves).
+
+    Nodes are visited in document order using an explicit stack of
+    iterators, so arbitrarily deep nesting does not hit Python's
+    recursion limit. Walks without visitors take leaner loops (one
+    collected type, e.g. the Str leaves of a count, is the common case).
+    """
+
+    def __init__(
+        self,
+        children: Optional[Mapping[str, ChildrenSpec]] = None,
+    ) -> None:
+        self._children = children if children is not None else COUNT_CHILDREN
+        self._own_children = False
+        self._visitors: Dict[str, List[Callable[[Node], Any]]] = {}
+        self._sinks: Dict[str, List[Node]] = {}
+
+    def register(self, node_type: str, visitor: Callable[[Node], Any]) -> "ASTWalker":
+        """Run visitor(node) for every node of node_type. Returns self."""
+        self._visitors.setdefault(node_type, []).append(visitor)
+        return self
+
+    def collect(self, node_type: str) -> List[Node]:
+        """Return a list the walk fills with every node of node_type."""
+        return self._sinks.setdefault(node_type, [])
+
+    def set_children(
+        self,
+        node_type: str,
+        children: Optional[ChildrenSpec],
+    ) -> "ASTWalker":
+        """Override (or with None, remove) the traversal rule for node_type."""
+        if not self._own_children:
+            self._children = dict(self._children)
+            self._own_children = True
+        if children is None:
+            self._children.pop(node_type, None)
+        else:
+            self._children[node_type] = children
+        return self
+
+    def walk(self, nodes: Iterable[Node]) -> None:
+        """Visit nodes (and their descendants) in document order."""
+        if not self._visitors:
+            if len(self._sinks) == 1:
+                self._walk_collect(nodes)
+            else:
+                self._walk_sinks(nodes)
+            return
+
+        children = self._children
+        visitors = self._visitors
+        sinks = self._sinks
+
+        stack = [iter(nodes)]
+        push = stack.append
+        pop = stack.pop
+
+        while stack:
+            for node in stack[-1]:
+                t = node["t"]
+
+                if t in sinks:
+                    sinks[t].append(node)
+
+                if t in visitors:
+                    skip = False
+                    for cb in visitors[t]:
+                        if cb(node) is SKIP:
+                            skip = True
+                    if skip:
+                        continue
+
+                if t not in children:
+                    continue
+                spec = children[t]
+                if spec is CONTENT:
+                    kids = node["c"]
+                elif spec.__class__ is int:
+                    kids = node["c"][spec]
+                else:
+                    kids = spec(node)
+
+                if kids:
+                    # Descend; the current iterator resumes afterwards
+                    push(iter(kids))
+                    break
+            else:
+                pop()
+
+    def _walk_sinks(self, nodes: Iterable[Node]) -> None:
+        """walk() without visitors: no visitor lookup per node."""
+        children = self._children
+        sinks = self._sinks
+
+        stack = [iter(nodes)]
+        push = stack.append
+        pop = stack.pop
+
+        while stack:
+            for node in stack[-1]:
+                t = node["t"]
+                if t in sinks:
+                    sinks[t].append(node)
+
+                if t not in children:
+                    continue
+                spec = children[t]
+                if spec is CONTENT:
+                    kids = node["c"]
+                elif spec.__class__ is int:
+                    kids = node["c"][spec]
+                else:
+                    kids = spec(node)
+
+                if kids:
+                    push(iter(kids))
+                    break
+            else:
+                pop()
+
+    def _walk_collect(self, nodes: Iterable[Node]) -> None:
+        """
+        walk() collecting a single node type (the Str leaves of a count):
+        one comparison per node, and leaves of that type skip the
+        children lookup.
+        """
+        children = self._children
+        (sink_type, sink), = self._sinks.items()
+        collect = sink.append
+        leaf = sink_type not in children
+
+        stack = [iter(nodes)]
+        push = stack.append
+        pop = stack.pop
+
+        while stack:
+            for node in stack[-1]:
+                t = node["t"]
+                if t == sink_type:
+                    collect(node)
+                    if leaf:
+                        continue
+
+                if t not in children:
+                    continue
+                spec = children[t]
+                if spec is CONTENT:
+                    kids = node["c"]
+                elif spec.__class__ is int:
+                    kids = node["c"][spec]
+                else:
+                    kids = spec(node)
+
+                if kids:
+                    push(iter(kids))
+                    break
+            else:
+                pop()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# ../shared/python/build_manifest.py
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+# <project>/.quarto/<MANIFEST_NAME>
+MANIFEST_NAME = "reading-stats-manifest.sqlite"
+
+# Bump when the table layout changes; older manifests are recreated
+SCHEMA_VERSION = 3
+
+
+class ManifestEntry(NamedTuple):
+    """What the last build knew about one qmd file."""
+
+    size: int
+    mtime_ns: int
+    file_hash: str      # compute_file_hash(): content + config
+    config_hash: str    # config part only (lang, seconds per syllable)
+    syllables: int
+    words: int
+    seconds: float
+
+
+class AggregateEntry(NamedTuple):
+    """Persisted totals of one aggregated prefix (index_reading_stats.yml)."""
+
+    syllables: int
+    words: int
+    centiseconds: int   # exact sum of the children's rounded seconds
+    aggregated_hash: str
+
+
+class FileCost(NamedTuple):
+    """Processing time of one qmd's last rebuild, in milliseconds."""
+
+    pandoc_ms: float    # its share (by size) of the batch's pandoc run
+    walk_ms: float      # PandocAST counts (and its own pandoc run, if any)
+    ngram_ms: float     # n-gram / word cloud files
+    write_ms: float     # sidecar
+
+    @property
+    def total_ms(self) -> float:
+        return self.pandoc_ms + self.walk_ms + self.ngram_ms + self.write_ms
+
+
+class BuildManifest:
+    """
+    SQLite-backed record of the last precompute_reading_stats build.
+
+    One row per qmd (keyed by its project-relative path) with its size,
+    mtime_ns, content hash, config hash and reading totals. A file whose
+    size, mtime_ns and config hash still match its row is known to be
+    unchanged without reading it; the content is only hashed when the
+    stat signature differs.
+
+    It also keeps the totals of every aggregated prefix, so aggregates
+    can be maintained by deltas; the child hashes of a prefix are the
+    file rows below it (child_hashes()).
+
+    Finally, the dependency graph of the pages: dep_nodes holds the
+    (signature, hash) of every include, _metadata.yml and config node
+    (see dependency_graph) and dep_edges which pages depend on which
+    node, so a changed node rebuilds exactly its dependents().
+
+    The cost of every file's last rebuild (FileCost) is kept too, so the
+    next build can schedule the most expensive files first.
+
+    Writes are buffered and committed by save() (or on leaving a `with`).
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self._path))
+        self._init_schema()
+
+    @classmethod
+    def for_project(cls, root: Union[str, Path]) -> Optional["BuildManifest"]:
+        """
+        Open the manifest of a Quarto project, or return None if it
+        cannot be opened (the build then falls back to the sidecar hashes).
+        """
+        try:
+            return cls(Path(root) / ".quarto" / MANIFEST_NAME)
+        except (OSError, sqlite3.Error):
+            return None
+
+    @property
+    def path(self) -> Path:
+        """Return the database path."""
+        return self._path
+
+    def _init_schema(self) -> None:
+        conn = self._conn
+        conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+        row = conn.execute("SELECT value FROM info WHERE key = 'schema'").fetchone()
+        if row is not None and row[0] == str(SCHEMA_VERSION):
+            return  # up to date: opening the manifest writes nothing
+        for table in ("files", "aggregates", "dep_nodes", "dep_edges", "costs"):
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path        TEXT PRIMARY KEY,
+                size        INTEGER NOT NULL,
+                mtime_ns    INTEGER NOT NULL,
+                file_hash   TEXT NOT NULL,
+                config_hash TEXT NOT NULL,
+                syllables   INTEGER NOT NULL,
+                words       INTEGER NOT NULL,
+                seconds     REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS aggregates (
+                prefix          TEXT PRIMARY KEY,
+                syllables       INTEGER NOT NULL,
+                words           INTEGER NOT NULL,
+                centiseconds    INTEGER NOT NULL,
+                aggregated_hash TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dep_nodes (
+                node      TEXT PRIMARY KEY,
+                signature TEXT NOT NULL,
+                hash      TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dep_edges (
+                path TEXT NOT NULL,
+                node TEXT NOT NULL,
+                PRIMARY KEY (path, node)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS dep_edges_node ON dep_edges (node)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS costs (
+                path      TEXT PRIMARY KEY,
+                pandoc_ms REAL NOT NULL,
+                walk_ms   REAL NOT NULL,
+                ngram_ms  REAL NOT NULL,
+                write_ms  REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO info (key, value) VALUES ('schema', ?)",
+            (str(SCHEMA_VERSION),),
+        )
+        conn.commit()
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def entries(self) -> Dict[str, ManifestEntry]:
+        """Return every row as {relative path: ManifestEntry} (one query)."""
+        rows = self._conn.execute(
+            "SELECT path, size, mtime_ns, file_hash, config_hash,"
+            " syllables, words, seconds FROM files"
+        )
+        return {row[0]: ManifestEntry(*row[1:]) for row in rows}
+
+    def get(self, rel: str) -> Optional[ManifestEntry]:
+        """Return the row of one file, or None."""
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, file_hash, config_hash,"
+            " syllables, words, seconds FROM files WHERE path = ?",
+            (rel,),
+        ).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def put(self, rel: str, entry: ManifestEntry) -> None:
+        """Insert or replace the row of one file."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files"
+            " (path, size, mtime_ns, file_hash, config_hash, syllables, words, seconds)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (rel, *entry),
+        )
+
+    def retain(self, rels: Iterable[str]) -> None:
+        """
+        Drop the rows (dependency edges, costs) of files that are no longer
+        part of the build, and the nodes nothing depends on anymore.
+        """
+        keep = set(rels)
+        stale = [p for (p,) in self._conn.execute("SELECT path FROM files") if p not in keep]
+        self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in stale])
+        self._conn.executemany("DELETE FROM dep_edges WHERE path = ?", [(p,) for p in stale])
+        self._conn.executemany("DELETE FROM costs WHERE path = ?", [(p,) for p in stale])
+        self._conn.execute(
+            "DELETE FROM dep_nodes WHERE node NOT IN (SELECT node FROM dep_edges)"
+        )
+
+    def costs(self) -> Dict[str, FileCost]:
+        """Return the last rebuild cost of every file as {relative path: FileCost}."""
+        rows = self._conn.execute(
+            "SELECT path, pandoc_ms, walk_ms, ngram_ms, write_ms FROM costs"
+        )
+        return {row[0]: FileCost(*row[1:]) for row in rows}
+
+    def put_cost(self, rel: str, cost: FileCost) -> None:
+        """Insert or replace the last rebuild cost of one file."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO costs (path, pandoc_ms, walk_ms, ngram_ms, write_ms)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (rel, *cost),
+        )
+
+    # ------------------------------------------------------------------
+    # Dependencies
+    # ------------------------------------------------------------------
+
+    def dep_nodes(self) -> Dict[str, Tuple[str, str]]:
+        """Return every dependency node as {node: (signature, hash)}."""
+        rows = self._conn.execute("SELECT node, signature, hash FROM dep_nodes")
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def put_dep_node(self, node: str, signature: str, node_hash: str) -> None:
+        """Insert or replace the recorded state of one node."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dep_nodes (node, signature, hash) VALUES (?, ?, ?)",
+            (node, signature, node_hash),
+        )
+
+    def dependencies(self, rel: str) -> List[str]:
+        """Return the nodes one file depends on."""
+        rows = self._conn.execute(
+            "SELECT node FROM dep_edges WHERE path = ? ORDER BY node", (rel,)
+        )
+        return [node for (node,) in rows]
+
+    def set_dependencies(self, rel: str, nodes: Iterable[str]) -> None:
+        """Replace the dependency edges of one file."""
+        self._conn.execute("DELETE FROM dep_edges WHERE path = ?", (rel,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO dep_edges (path, node) VALUES (?, ?)",
+            [(rel, node) for node in nodes],
+        )
+
+    def dependents(self, nodes: Iterable[str]) -> Set[str]:
+        """Return the files that depend on any of the nodes."""
+        out: Set[str] = set()
+        for node in nodes:
+            rows = self._conn.execute("SELECT path FROM dep_edges WHERE node = ?", (node,))
+            out.update(path for (path,) in rows)
+        return out
+
+    # ------------------------------------------------------------------
+    # Aggregates
+    # ------------------------------------------------------------------
+
+    def get_info(self, key: str) -> Optional[str]:
+        """Return a value of the info table."""
+        row = self._conn.execute("SELECT value FROM info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_info(self, key: str, value: str) -> None:
+        """Set a value of the info table."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def aggregates(self) -> Dict[str, AggregateEntry]:
+        """Return every aggregate as {prefix: AggregateEntry}."""
+        rows = self._conn.execute(
+            "SELECT prefix, syllables, words, centiseconds, aggregated_hash FROM aggregates"
+        )
+        return {row[0]: AggregateEntry(*row[1:]) for row in rows}
+
+    def put_aggregate(self, prefix: str, entry: AggregateEntry) -> None:
+        """Insert or replace the totals of one prefix."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO aggregates"
+            " (prefix, syllables, words, centiseconds, aggregated_hash)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (prefix, *entry),
+        )
+
+    def clear_aggregates(self) -> None:
+        """Drop every aggregate (they are rebuilt from the file rows)."""
+        self._conn.execute("DELETE FROM aggregates")
+
+    def child_hashes(self, prefix: str) -> List[Tuple[str, str]]:
+        """
+        Return (path, file_hash) of the files equal to or under prefix.
+
+        Range scan on the primary key: "/" + 1 is "0" in code point
+        (and UTF-8 byte) order.
+        """
+        return self._conn.execute(
+            "SELECT path, file_hash FROM files"
+            " WHERE path = ? OR (path >= ? AND path < ?)",
+            (prefix, prefix + "/", prefix + "0"),
+        ).fetchall()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self) -> None:
+        """Commit buffered writes (a manifest that cannot be written is just stale)."""
+        try:
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        """Commit and close the database."""
+        self.save()
+        self._conn.close()
+
+    def __enter__(self) -> "BuildManifest":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# ../shared/python/dependency_graph.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# {{< include _partial.qmd >}} (Quarto shortcode; the path may be quoted)
+INCLUDE_RE = re.compile(
+    rb"\{\{<\s*include\s+(?:\"([^\"]+)\"|'([^']+)'|(\S+?))\s*>\}\}"
+)
+
+# Directory metadata merged by Quarto under each document's own front matter
+METADATA_NAME = "_metadata.yml"
+
+# Keys of _metadata.yml the reading stats depend on; edits to anything
+# else (css, filters, sidebar, ...) do not invalidate the pages below
+METADATA_KEYS = ("word-cloud",)
+
+# Dependency node ids: "include:<path>", "metadata:<path>", "config:<name>"
+INCLUDE_PREFIX = "include:"
+METADATA_PREFIX = "metadata:"
+CONFIG_PREFIX = "config:"
+
+# Signature of a file that does not exist
+MISSING = "-"
+
+# config:<name> -> (signature(), hash()); the hash is only computed when
+# the (cheap) signature changed
+ConfigNodes = Dict[str, Tuple[Callable[[], str], Callable[[], str]]]
+
+
+def project_root(root: Union[str, Path, None] = None) -> Path:
+    """Return root, else $QUARTO_PROJECT_DIR, else the working directory."""
+    if root is not None:
+        return Path(root)
+    return Path(os.getenv("QUARTO_PROJECT_DIR", "."))
+
+
+@contextmanager
+def project_environment(root: Path) -> Iterator[None]:
+    """
+    Run the block with QUARTO_PROJECT_DIR set to root, as Quarto does for
+    the pre-render hook (project_root(), the AST cache and include
+    resolution use it).
+    """
+    old = os.environ.get("QUARTO_PROJECT_DIR")
+    os.environ["QUARTO_PROJECT_DIR"] = str(root)
+    try:
+        yield
+    finally:
+        if old is None:
+            os.environ.pop("QUARTO_PROJECT_DIR", None)
+        else:
+            os.environ["QUARTO_PROJECT_DIR"] = old
+
+
+def resolve_include(target: str, including: Path, root: Path) -> Path:
+    """
+    Resolve an include target like Quarto: "/x.qmd" is relative to the
+    project root, anything else to the including file.
+    """
+    if target.startswith("/"):
+        return root / target.lstrip("/")
+    return including.parent / target
+
+
+def expand_includes(
+    path: Union[str, Path],
+    root: Union[str, Path, None] = None,
+) -> Tuple[bytes, List[Path]]:
+    """
+    Return (source, included files) of a qmd with its include shortcodes
+    expanded, recursively, as Quarto does before pandoc sees the file.
+
+    Files without includes come back byte for byte. Missing targets (and
+    include cycles) are left as written but still listed, so creating
+    the file later invalidates the page.
+    """
+    root = project_root(root)
+    included: List[Path] = []
+
+    def expand(p: Path, chain: Tuple[Path, ...]) -> bytes:
+        raw = p.read_bytes()
+        if b"include" not in raw:
+            return raw
+
+        def replace(m: "re.Match[bytes]") -> bytes:
+            target = next(g for g in m.groups() if g is not None).decode("utf-8")
+            dep = resolve_include(target, p, root)
+            if dep not in included:
+                included.append(dep)
+            key = dep.resolve()
+            if key in chain or not dep.is_file():
+                return m.group()
+            return expand(dep, chain + (key,)).rstrip(b"\n")
+
+        return INCLUDE_RE.sub(replace, raw)
+
+    path = Path(path)
+    return expand(path, (path.resolve(),)), included
+
+
+def metadata_files(root: Path, qmd: Path) -> List[Path]:
+    """
+    Return the _metadata.yml candidates of qmd, outermost first: one per
+    directory from the project root down to the file's own directory,
+    whether it exists or not (creating one is a change too).
+    """
+    try:
+        rel_dir = qmd.parent.resolve().relative_to(root.resolve())
+    except ValueError:
+        return []  # not part of the project
+    dirs = [root]
+    for part in rel_dir.parts:
+        dirs.append(dirs[-1] / part)
+    return [d / METADATA_NAME for d in dirs]
+
+
+def _load_metadata(path: Path) -> Dict[str, Any]:
+    """Return the METADATA_KEYS set in one _metadata.yml ({} if none)."""
+    if not path.is_file():
+        return {}
+    import yaml  # PyYAML
+
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {key: data[key] for key in METADATA_KEYS if key in data}
+
+
+def inherited_metadata(root: Path, qmd: Path) -> Dict[str, Any]:
+    """
+    Return the METADATA_KEYS qmd inherits from its directories' _metadata.yml
+    (the nearest one wins; the document's own front matter overrides them).
+    """
+    merged: Dict[str, Any] = {}
+    for path in metadata_files(root, qmd):
+        merged.update(_load_metadata(path))
+    return merged
+
+
+def _node_id(prefix: str, root: Path, path: Path) -> str:
+    try:
+        rel = path.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        rel = path.resolve().as_posix()
+    return prefix + rel
+
+
+def file_dependencies(
+    root: Path,
+    qmd: Path,
+    included: Iterable[Path],
+    configs: Iterable[str] = (),
+) -> List[str]:
+    """
+    Return the dependency node ids of one page: its (recursive) includes,
+    the _metadata.yml files above it and the given config nodes.
+    """
+    nodes = [_node_id(INCLUDE_PREFIX, root, p) for p in included]
+    nodes += [_node_id(METADATA_PREFIX, root, p) for p in metadata_files(root, qmd)]
+    nodes += [CONFIG_PREFIX + name for name in configs]
+    return sorted(set(nodes))
+
+
+def file_signature(path: Path) -> str:
+    """Return "size:mtime_ns" of a file, or MISSING."""
+    try:
+        st = path.stat()
+    except OSError:
+        return MISSING
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def node_signature(root: Path, node: str, configs: ConfigNodes) -> str:
+    """Return the cheap signature of a node (a stat, or the config's own)."""
+    if node.startswith(CONFIG_PREFIX):
+        funcs = configs.get(node[len(CONFIG_PREFIX):])
+        return funcs[0]() if funcs else MISSING
+    return file_signature(root / node.split(":", 1)[1])
+
+
+def node_hash(root: Path, node: str, configs: ConfigNodes) -> str:
+    """
+    Return the content hash of a node: the bytes of an include, the
+    METADATA_KEYS of a _metadata.yml, or the config's own hash.
+    """
+    if node.startswith(CONFIG_PREFIX):
+        funcs = configs.get(node[len(CONFIG_PREFIX):])
+        return funcs[1]() if funcs else ""
+
+    path = root / node.split(":", 1)[1]
+    if node.startswith(METADATA_PREFIX):
+        data = json.dumps(_load_metadata(path), sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return ""
+
+
+def changed_nodes(
+    root: Path,
+    stored: Dict[str, Tuple[str, str]],
+    configs: ConfigNodes,
+    put: Optional[Callable[[str, str, str], None]] = None,
+) -> List[str]:
+    """
+    Return the stored nodes whose content changed since they were recorded.
+
+    stored maps node -> (signature, hash). Only nodes whose signature
+    differs are hashed; their new (signature, hash) is passed to put(),
+    so a touched but unchanged file is not hashed again next time.
+    """
+    changed = []
+    for node, (signature, old_hash) in stored.items():
+        new_signature = node_signature(root, node, configs)
+        if new_signature == signature:
+            continue
+        new_hash = node_hash(root, node, configs)
+        if new_hash != old_hash:
+            changed.append(node)
+        if put is not None:
+            put(node, new_signature, new_hash)
+    return sorted(changed)
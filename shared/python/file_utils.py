@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# ../shared/python/file_utils.py
+
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+
+def _default_mode() -> int:
+    """Return the mode a plain open(path, "w") would give (0666 & ~umask)."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_atomic(path: Union[str, Path], data: Union[str, bytes]) -> None:
+    """
+    Write data to path through a temp file in the same directory + rename,
+    so readers (Quarto preview, the web server) never see a partial file.
+
+    str data is written as UTF-8. The file keeps its previous permissions
+    (or gets the usual umask-based ones if it is new).
+    """
+    import tempfile  # not needed by runs that write nothing
+
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    try:
+        mode = path.stat().st_mode & 0o777
+    except OSError:
+        mode = _default_mode()
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix="." + path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_if_changed(path: Union[str, Path], data: Union[str, bytes]) -> bool:
+    """
+    Write data to path (atomically) unless the file already holds exactly
+    these bytes, so unchanged outputs keep their mtime.
+
+    Returns True if the file was written.
+    """
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+
+    write_atomic(path, data)
+    return True
+
+
+@contextmanager
+def file_lock(path: Union[str, Path]) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on path (created if needed) for the
+    duration of the block, waiting for other holders first.
+
+    Without fcntl (Windows) or when the lock file cannot be created,
+    the block runs unlocked.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+
+    path = Path(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        yield
+        return
+
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # releases the lock
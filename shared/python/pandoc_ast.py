@@ -4,11 +4,23 @@
 from __future__ import annotations
 
 import subprocess
+import hashlib
 import json
+import marshal
+import os
 import re
 import string
+import tempfile
 from pathlib import Path
-from typing import Any, Dict, List, Sequence, Union, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Union, Optional
+
+from ast_cache import ASTCache, BlockMemo, default_block_memo, default_cache
+from ast_collectors import Collector, meta_flag
+from ast_walker import ASTWalker, COUNT_CHILDREN, DIV_CHILDREN, SKIP
+from dependency_graph import INCLUDE_RE, expand_includes
+from syllable_counter import BatchSyllableCounter
+from token_store import TokenStore
 
 # Default reader extensions used for Quarto / Pandoc markdown
 PANDOC_READER_FORMAT = (
@@ -22,6 +34,28 @@ PANDOC_READER_FORMAT = (
     "+raw_html"
 )
 
+# Lua custom writer used by PandocAST.load_many (one pandoc process, many files)
+BATCH_WRITER = Path(__file__).resolve().parent.parent / "lua" / "writer_ast_batch.lua"
+
+# Lua custom writer used by reader="lean": applies the counting rules inside
+# pandoc and only returns the Str texts to count (plus word-cloud meta)
+LEAN_WRITER = Path(__file__).resolve().parent.parent / "lua" / "writer_reading_tokens.lua"
+
+# Supported PandocAST reader modes
+READER_MODES = ("json", "lean")
+
+# Supported PandocAST syllable engines
+SYLLABLE_ENGINES = ("batch", "scalar")
+
+# Leading YAML front matter: "---" not followed by a blank line, up to a
+# closing "---" / "..." line (pandoc's yaml_metadata_block rules)
+_FRONT_MATTER_RE = re.compile(
+    rb"\A---[ \t]*\n(?![ \t]*\n).*?\n(?:---|\.\.\.)[ \t]*(?:\n|\Z)",
+    re.DOTALL,
+)
+# A possible further YAML block in the body (meta-only reading bails out)
+_BODY_YAML_RE = re.compile(rb"^---[ \t]*\n(?![ \t]*\n)", re.MULTILINE)
+
 # Default vowel set (Turkish-focused, also valid for English)
 TURKISH_VOWELS = set("aeıioöuüâîûAEIİOÖUÜ")
 
@@ -31,6 +65,32 @@ _STR_PUNCT = string.punctuation
 # _PUNCT_TRANSLATION = str.maketrans("", "", string.punctuation)
 
 
+@lru_cache(maxsize=1)
+def _lean_writer_digest() -> str:
+    """Return a short hash of the lean writer source (part of lean cache keys)."""
+    return hashlib.sha256(LEAN_WRITER.read_bytes()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=1)
+def _counting_rules_digest() -> str:
+    """Return a short hash of the counting code (part of block memo keys)."""
+    h = hashlib.sha256()
+    for module in ("pandoc_ast.py", "ast_walker.py", "syllable_counter.py"):
+        h.update((Path(__file__).resolve().parent / module).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def _block_hash(node: Dict[str, Any]) -> str:
+    """
+    Return the hash of a block's serialized JSON value.
+
+    marshal format 2 has no back-references, so equal values (with the key
+    order pandoc emits) always serialize to the same bytes; it is several
+    times faster than json.dumps(sort_keys=True) on large blocks.
+    """
+    return hashlib.blake2b(marshal.dumps(node, 2), digest_size=16).hexdigest()
+
+
 class PandocAST:
     """
     Wrapper around a Pandoc JSON AST that can compute:
@@ -39,6 +99,11 @@ class PandocAST:
     - approximate reading time (seconds)
 
     Additionally, it stores the counted words and can expose them as a string.
+
+    Quarto include shortcodes ({{< include _partial.qmd >}}) are expanded
+    before pandoc reads the file, like Quarto does (see
+    dependency_graph.expand_includes); cache keys are taken on the
+    expanded source.
     
     focus_blocks:
         Optional list of ids / class names to focus on.
@@ -50,6 +115,63 @@ class PandocAST:
         the body is not counted at all (0 words, 0 syllables).
         If False and no focus blocks are found,
         we fall back to counting the whole body as usual.
+
+    cache:
+        AST cache consulted before running pandoc. True uses the
+        process-wide ast_cache.default_cache() (which writes under
+        <QUARTO_PROJECT_DIR>/.quarto), False (default) disables caching,
+        or pass an ASTCache instance. precompute_reading_stats turns it on.
+
+    ast:
+        Optional pre-loaded JSON AST (e.g. from PandocAST.load_many).
+        When given, pandoc and the cache are not consulted at all.
+
+    reader:
+        "json" (default): pandoc emits the full JSON AST and the counting
+        rules run in Python.
+        "lean": the LEAN_WRITER Lua writer applies the same rules (skipped
+        Divs, Code, iframes, focus selection, meta fields) inside pandoc
+        and only streams back the Str texts to count, which avoids most of
+        the JSON serialization / parsing. In this mode `ast` only holds
+        the "meta" entries the writer exports (currently word-cloud).
+
+    collectors:
+        Optional ast_collectors.Collector instances (headings, links, meta
+        flags, ...). They are attached to the same walk that counts
+        syllables and words, so every extra output is gathered in that
+        single traversal of the counted content. Not available with
+        reader="lean" (there is no AST to walk).
+
+    block_memo:
+        Block-level memo of counting results. Each counted top-level block
+        is hashed (normalized JSON) and its (syllables, words, tokens)
+        contribution is reused from the previous run when unchanged, so
+        an edit to a long document only recounts the edited blocks.
+        True uses ast_cache.default_block_memo(), False (default) disables
+        it, or pass a BlockMemo instance. Not used with collectors (they
+        must see every node) or with reader="lean".
+        blocks_reused / blocks_recomputed report what happened.
+
+    syllable_engine:
+        "batch" (default): syllable_counter.BatchSyllableCounter counts the
+        token stream of each walk at once (a few C-level regex passes).
+        "scalar": the per-token _count_token rules, kept as the reference
+        implementation. Both give identical counts and words.
+
+    inherited_meta:
+        Optional plain values (e.g. {"word-cloud": True}) inherited from the
+        project's _metadata.yml files (dependency_graph.inherited_metadata).
+        A key the document's own front matter does not set falls back to
+        them, as in Quarto's metadata merge. Used by `word_cloud`.
+
+    lazy:
+        If True, nothing is loaded or counted in the constructor. The AST
+        is loaded on first access to `ast`, and counting runs (once) on
+        first access to a count / token / collector property. `word_cloud`
+        only needs the front matter: unless the full AST is already
+        loaded or cached, pandoc reads just the leading YAML block
+        (cached as well). Documents with further YAML blocks in the body
+        fall back to the full AST.
     """
 
     def __init__(
@@ -60,35 +182,95 @@ class PandocAST:
         *,
         focus_blocks: Optional[Sequence[str]] = None,
         require_focus: bool = False,
+        cache: Union[ASTCache, bool] = False,
+        ast: Optional[Dict[str, Any]] = None,
+        reader: str = "json",
+        collectors: Sequence[Collector] = (),
+        block_memo: Union[BlockMemo, bool] = False,
+        syllable_engine: str = "batch",
+        inherited_meta: Optional[Dict[str, Any]] = None,
+        lazy: bool = False,
     ) -> None:
         """
-        Initialize the object, load AST and compute statistics.
+        Initialize the object: load the AST and compute the statistics
+        (with lazy=True, on first use instead).
 
         :param path: Path to a .qmd / markdown file (str or Path).
         :param seconds_per_syllable: Reading speed in seconds per syllable.
         :param vowels: Iterable of characters treated as vowels.
         :param focus_blocks: Optional list of block ids/classes to focus on.
         :param require_focus: See class docstring.
+        :param cache: See class docstring.
+        :param ast: See class docstring.
+        :param reader: See class docstring.
+        :param collectors: See class docstring.
+        :param block_memo: See class docstring.
+        :param syllable_engine: See class docstring.
+        :param inherited_meta: See class docstring.
+        :param lazy: See class docstring.
         """
+        if reader not in READER_MODES:
+            raise ValueError(f"reader must be one of {READER_MODES}, got {reader!r}")
+        if syllable_engine not in SYLLABLE_ENGINES:
+            raise ValueError(
+                f"syllable_engine must be one of {SYLLABLE_ENGINES}, got {syllable_engine!r}"
+            )
+        if collectors and reader == "lean":
+            raise ValueError("collectors require reader='json'")
+
         self._path = Path(path)
+        self._reader = reader
+        self._inherited_meta = dict(inherited_meta or {})
+        # Source with includes expanded (read on first use)
+        self._source_bytes: Optional[bytes] = None
+        self._included: List[Path] = []
         self._seconds_per_syllable = float(seconds_per_syllable)
         self._vowel_set = set(vowels)
+        self._batch_counter: Optional[BatchSyllableCounter] = (
+            BatchSyllableCounter(self._vowel_set) if syllable_engine == "batch" else None
+        )
+        self._collectors = tuple(collectors)
 
         # Focus configuration
         self._focus_blocks = set(focus_blocks or [])
         self._require_focus = bool(require_focus)
 
+        # AST cache (None = always run pandoc)
+        if cache is True:
+            self._cache: Optional[ASTCache] = default_cache()
+        elif cache is False:
+            self._cache = None
+        else:
+            self._cache = cache
+        self._ast_from_cache = False
+
+        # Block memo (None = always count every block)
+        if collectors or reader == "lean" or block_memo is False:
+            self._block_memo: Optional[BlockMemo] = None
+        elif block_memo is True:
+            self._block_memo = default_block_memo()
+        else:
+            self._block_memo = block_memo
+        self._blocks_reused = 0
+        self._blocks_recomputed = 0
+
         # Internal storage for AST and stats
-        self._ast: Dict[str, Any] = self._load_ast()
+        # (lean mode: Str texts selected by the Lua writer)
+        self._lean_strs: List[str] = []
+        self._ast: Optional[Dict[str, Any]] = ast
+        self._meta_only: Optional[Dict[str, Any]] = None
+        self._counted = False
         self._syllable_count: int = 0
         self._word_count: int = 0
         self._reading_time: float = 0.0  # seconds
 
         # Internal storage for words that were actually counted
-        self._words: List[str] = []
+        # (one backing string + offset / length arrays)
+        self._words = TokenStore()
 
-        # Compute all stats immediately
-        self._compute_counts()
+        # Compute all stats immediately (lazy: on first use)
+        if not lazy:
+            self._ensure_counts()
 
     # ------------------------------------------------------------------
     # Public API
@@ -104,80 +286,103 @@ class PandocAST:
         """Return the reading speed in seconds per syllable."""
         return self._seconds_per_syllable
 
+    @property
+    def reader(self) -> str:
+        """Return the reader mode ("json" or "lean")."""
+        return self._reader
+
     @property
     def ast(self) -> Dict[str, Any]:
-        """Return the Pandoc JSON AST."""
-        return self._ast
+        """Return the Pandoc JSON AST (meta only in lean mode)."""
+        return self._ensure_ast()
+
+    @property
+    def ast_from_cache(self) -> bool:
+        """Return True if the AST was served from the cache (pandoc not run)."""
+        return self._ast_from_cache
+
+    @property
+    def collectors(self) -> tuple:
+        """Return the collectors filled during the counting pass."""
+        self._ensure_counts()
+        return self._collectors
+
+    @property
+    def blocks_reused(self) -> int:
+        """Return how many blocks were served from the block memo."""
+        self._ensure_counts()
+        return self._blocks_reused
+
+    @property
+    def blocks_recomputed(self) -> int:
+        """Return how many blocks were counted (memo miss or memo disabled)."""
+        self._ensure_counts()
+        return self._blocks_recomputed
 
     @property
     def syllable_count(self) -> int:
         """Return the total syllable count."""
+        self._ensure_counts()
         return self._syllable_count
 
     @property
     def word_count(self) -> int:
         """Return the total word count."""
+        self._ensure_counts()
         return self._word_count
 
     @property
     def reading_time(self) -> float:
         """Return the approximate reading time in seconds."""
+        self._ensure_counts()
         return self._reading_time
 
     @property
     def word_cloud(self) -> bool:
         """Return True if any focus blocks are defined for word cloud."""
-        default = False
-        meta = self._ast.get("meta", {})
-        node = meta.get("word-cloud")
-        if not node:
-            return default
-
-        t = node.get("t")
-        c = node.get("c")
-
-        # Pandoc JSON: MetaBool
-        if t == "MetaBool":
-            return bool(c)
+        node = self._meta().get("word-cloud")
+        if node is None and "word-cloud" in self._inherited_meta:
+            value = self._inherited_meta["word-cloud"]
+            if isinstance(value, bool):
+                node = {"t": "MetaBool", "c": value}
+            else:
+                node = {"t": "MetaString", "c": str(value)}
+        return meta_flag(node)
 
-        # Eğer string olarak yazıldıysa (WordCloud: "true"/"false")
-        if t == "MetaString":
-            val = str(c).strip().lower()
-            if val in {"true", "yes", "on", "1"}:
-                return True
-            if val in {"false", "no", "off", "0"}:
-                return False
+    @property
+    def tokens(self) -> TokenStore:
+        """Return the counted tokens (raw, in counting order) as a TokenStore."""
+        self._ensure_counts()
+        return self._words
 
-        return default
+    def iter_tokens(self, punct: bool = True, lower: bool = False) -> Iterator[str]:
+        """
+        Lazily iterate over the counted words (see to_list for the options).
 
-    def to_list(self, punct: bool = True, lower: bool = False) -> List[str]:
+        Nothing is materialized: consumers such as
+        wordcloud_ngrams.export_ngram_files_from_tokens can take it directly.
+        """
+        self._ensure_counts()
         if punct:
             if not lower:
-                # Return raw words exactly as they were counted
-                return list(self._words)
-            lower_words: List[str] = []
-            for w in self._words:
-                lower_words.append(self._turkish_lower(w))
-            return lower_words
-        else:
-            cleaned: List[str] = []
-    
-            # Regex: tüm punctuation karakterlerini boşlukla değiştir
-            punct_regex = r"[{}]+".format(re.escape(_STR_PUNCT))
-    
-            for w in self._words:
-                # 1) punctuation karakterlerini boşluk yap
-                w2 = re.sub(punct_regex, " ", w)
-    
-                # 2) birden fazla boşluk toplanır
-                w2 = re.sub(r"\s+", " ", w2).strip()
+                # Raw words exactly as they were counted
+                return iter(self._words)
+            return map(self._turkish_lower, self._words)
 
-                # 3) boşluklara göre split et
-                for part in w2.split():
-                    if part:
-                        cleaned.append(self._turkish_lower(part))
+        # Tüm punctuation karakterlerini boşluk sayıp parçalara böl,
+        # her parçayı küçük harfe çevir
+        return map(self._turkish_lower, self._words.split_on(_STR_PUNCT))
 
-            return cleaned
+    def to_list(self, punct: bool = True, lower: bool = False) -> List[str]:
+        """
+        Return the counted words as a list.
+
+        :param punct: If True, return words with punctuation preserved.
+                      If False, split words at ASCII punctuation characters
+                      (always lower-cased).
+        :param lower: Turkish-aware lower-casing of the words.
+        """
+        return list(self.iter_tokens(punct=punct, lower=lower))
 
     def to_string(self, punct: bool = True, lower: bool = False) -> str:
         """
@@ -186,7 +391,92 @@ class PandocAST:
         :param punct: If True, return words with punctuation preserved.
                       If False, strip ASCII punctuation characters.
         """
-        return " ".join(self.to_list(punct=punct, lower=lower))
+        self._ensure_counts()
+        if punct and not lower:
+            return self._words.text
+        return " ".join(self.iter_tokens(punct=punct, lower=lower))
+
+    @classmethod
+    def load_many(
+        cls,
+        paths: Iterable[Union[str, Path]],
+        *,
+        cache: Union[ASTCache, bool] = False,
+    ) -> Dict[Path, Dict[str, Any]]:
+        """
+        Load the JSON ASTs of many files with a single pandoc process.
+
+        Cached ASTs are returned directly; the remaining files are parsed
+        in one pandoc run through the BATCH_WRITER Lua writer, which emits
+        one JSON AST per line. Files the batch could not parse are left
+        out of the result, so the caller can fall back to PandocAST(path)
+        and get pandoc's own error for them. Files with include shortcodes
+        are left out too (PandocAST(path) expands them).
+
+        :param paths: Files to load.
+        :param cache: Same meaning as the constructor argument.
+        :return: Dict mapping each Path (as given) to its AST.
+        """
+        if cache is True:
+            ast_cache: Optional[ASTCache] = default_cache()
+        elif cache is False:
+            ast_cache = None
+        else:
+            ast_cache = cache
+
+        result: Dict[Path, Dict[str, Any]] = {}
+        missing: List[Path] = []
+        keys: Dict[Path, str] = {}
+
+        for p in paths:
+            path = Path(p)
+            raw = path.read_bytes()
+            if b"{{<" in raw and INCLUDE_RE.search(raw):
+                continue
+            if ast_cache is not None:
+                key = ast_cache.key(raw, PANDOC_READER_FORMAT)
+                cached = ast_cache.get(key)
+                if cached is not None:
+                    result[path] = cached
+                    continue
+                keys[path] = key
+            missing.append(path)
+
+        if not missing:
+            return result
+
+        # Pass the file list through a temp file (no argv length limits)
+        fd, list_path = tempfile.mkstemp(suffix=".txt", text=True)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for path in missing:
+                    f.write(str(path.resolve()) + "\n")
+
+            cmd = [
+                "pandoc",
+                "-f",
+                "markdown",
+                "-t",
+                str(BATCH_WRITER),
+                "-M",
+                f"pandoc-ast-batch={list_path}",
+                "-M",
+                f"pandoc-ast-format={PANDOC_READER_FORMAT}",
+            ]
+            proc = subprocess.run(cmd, input=b"", check=True, capture_output=True)
+        finally:
+            os.unlink(list_path)
+
+        lines = proc.stdout.decode("utf-8").splitlines()
+        for path, line in zip(missing, lines):
+            if line == "null":
+                continue
+            ast = json.loads(line)
+            result[path] = ast
+            if ast_cache is not None:
+                ast_cache.put(keys[path], ast)
+
+        return result
 
     # ------------------------------------------------------------------
     # Internal: Pandoc IO
@@ -216,20 +506,152 @@ class PandocAST:
 
         return text.replace("I", "ı").replace("İ", "i").lower()
 
+    def _ensure_ast(self) -> Dict[str, Any]:
+        """Load the AST (or the lean writer output) on first use."""
+        if self._ast is None:
+            if self._reader == "lean":
+                self._ast = self._load_lean()
+            else:
+                self._ast = self._load_ast()
+        return self._ast
+
+    def _ensure_counts(self) -> None:
+        """Run _compute_counts on first use."""
+        if not self._counted:
+            self._ensure_ast()
+            self._compute_counts()
+            self._counted = True
+
+    def _meta(self) -> Dict[str, Any]:
+        """Return the document meta, reading only the front matter if possible."""
+        if self._ast is not None:
+            return self._ast.get("meta", {})
+        if self._meta_only is None:
+            self._meta_only = self._load_meta()
+        return self._meta_only
+
+    def _source(self) -> bytes:
+        """Return the file contents with include shortcodes expanded."""
+        if self._source_bytes is None:
+            self._source_bytes, self._included = expand_includes(self._path)
+        return self._source_bytes
+
+    def _run_pandoc(self, args: List[str]) -> bytes:
+        """
+        Run pandoc with args on the document and return its stdout.
+
+        The file is passed by path unless includes were expanded; then the
+        expanded source goes through stdin.
+        """
+        source = self._source()
+        if self._included:
+            result = subprocess.run(["pandoc", *args], input=source,
+                                    check=True, capture_output=True)
+        else:
+            result = subprocess.run(["pandoc", str(self._path), *args],
+                                    check=True, capture_output=True)
+        return result.stdout
+
+    def _load_meta(self) -> Dict[str, Any]:
+        """
+        Return the meta of the document without parsing its body.
+
+        A cached full AST is used when there is one. Otherwise pandoc reads
+        only the leading YAML front matter. Documents without one, or with
+        another YAML block further down, are loaded in full.
+        """
+        raw = self._source()
+
+        if self._reader == "json" and self._cache is not None:
+            cached = self._cache.get(self._cache.key(raw, PANDOC_READER_FORMAT))
+            if cached is not None:
+                self._ast = cached
+                self._ast_from_cache = True
+                return cached.get("meta", {})
+
+        # Same input normalization as the pandoc CLI: no UTF-8 BOM, LF only
+        source = raw[3:] if raw.startswith(b"\xef\xbb\xbf") else raw
+        source = source.replace(b"\r\n", b"\n")
+
+        m = _FRONT_MATTER_RE.match(source)
+        if m is None or _BODY_YAML_RE.search(source, m.end()):
+            return self._ensure_ast().get("meta", {})
+        front = m.group()
+
+        key = None
+        if self._cache is not None:
+            key = self._cache.key(front, f"{PANDOC_READER_FORMAT}|meta")
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        cmd = ["pandoc", "-f", PANDOC_READER_FORMAT, "-t", "json"]
+        result = subprocess.run(cmd, input=front, check=True, capture_output=True)
+        meta = json.loads(result.stdout.decode("utf-8")).get("meta", {})
+
+        if key is not None:
+            self._cache.put(key, meta)
+        return meta
+
     def _load_ast(self) -> Dict[str, Any]:
         """
         Run pandoc on the file and return its JSON AST as a Python dict.
+
+        The AST cache is checked first; pandoc only runs on a miss.
+        """
+        key = None
+        if self._cache is not None:
+            key = self._cache.key(self._source(), PANDOC_READER_FORMAT)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._ast_from_cache = True
+                return cached
+
+        stdout = self._run_pandoc(["-f", PANDOC_READER_FORMAT, "-t", "json"])
+        ast = json.loads(stdout.decode("utf-8"))
+
+        if key is not None:
+            self._cache.put(key, ast)
+        return ast
+
+    def _load_lean(self) -> Dict[str, Any]:
         """
-        cmd = [
-            "pandoc",
-            str(self._path),
+        Run pandoc with the LEAN_WRITER and return {"meta": {...}}.
+
+        The Str texts selected for counting are stored in self._lean_strs.
+        Results are cached like ASTs, keyed additionally on the focus
+        configuration and the writer source.
+        """
+        focus = " ".join(sorted(self._focus_blocks))
+        require = "true" if self._require_focus else "false"
+
+        key = None
+        if self._cache is not None:
+            variant = f"{PANDOC_READER_FORMAT}|lean:{_lean_writer_digest()}:{focus}:{require}"
+            key = self._cache.key(self._source(), variant)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._ast_from_cache = True
+                self._lean_strs = cached["strs"]
+                return {"meta": cached["meta"]}
+
+        args = [
             "-f",
             PANDOC_READER_FORMAT,
             "-t",
-            "json",
+            str(LEAN_WRITER),
+            "-M",
+            f"reading-require-focus={require}",
         ]
-        result = subprocess.run(cmd, check=True, capture_output=True)
-        return json.loads(result.stdout.decode("utf-8"))
+        if focus:
+            args += ["-M", f"reading-focus={focus}"]
+        data = json.loads(self._run_pandoc(args).decode("utf-8"))
+        lean = {"strs": list(data.get("strs") or []), "meta": data.get("meta") or {}}
+
+        if key is not None:
+            self._cache.put(key, lean)
+        self._lean_strs = lean["strs"]
+        return {"meta": lean["meta"]}
 
     # ------------------------------------------------------------------
     # Internal: core counters
@@ -238,35 +660,53 @@ class PandocAST:
     def _compute_counts(self) -> None:
         """
         Compute syllable_count, word_count, and reading_time from the AST.
+
+        The counted content is selected first (meta + body, or focus
+        blocks), then walked once; registered collectors ride along.
         """
+        if self._reader == "lean" and "blocks" not in self._ast:
+            # Selection already done by the Lua writer; count the Str texts
+            nodes: List[Dict[str, Any]] = [
+                {"t": "Str", "c": text} for text in self._lean_strs
+            ]
+        else:
+            nodes = self._select_nodes()
+
+        meta = self._ast.get("meta", {})
+        for collector in self._collectors:
+            collector.meta(meta)
+
+        if self._block_memo is not None:
+            self._syllable_count, self._word_count = self._count_nodes_memo(nodes)
+        else:
+            self._syllable_count, self._word_count = self._count_nodes(nodes)
+            self._blocks_recomputed = len(nodes)
+
+        for collector in self._collectors:
+            collector.finish()
+
+        self._reading_time = self._syllable_count * self._seconds_per_syllable
+
+    def _select_nodes(self) -> List[Dict[str, Any]]:
+        """Return the meta inlines / blocks whose content is counted."""
         blocks = self._ast.get("blocks", [])
-        
+
         # Eğer focus_blocks tanımlı değilse,
         # meta ile birlikte direkt tüm gövdeyi say
         if not self._focus_blocks:
-            meta_syl, meta_words = self._count_meta(self._ast)
-            body_syl, body_words = self._count_blocks(blocks)
-            self._syllable_count = meta_syl + body_syl
-            self._word_count = meta_words + body_words
-        else:
-            # Önce focus Div/Section içeriğini çıkart
-            focus_blocks = self._extract_focus_blocks(blocks)
+            return self._meta_inlines(self._ast) + list(blocks)
 
-            if focus_blocks:
-                # Sadece bu blokların içeriğini say
-                body_syl, body_words = self._count_blocks(focus_blocks)
-            else:
-                # Hiç focus bloğu yok
-                if self._require_focus:
-                    body_syl, body_words = 0, 0
-                else:
-                    # Eski davranış: tüm gövdeyi say
-                    body_syl, body_words = self._count_blocks(blocks)
+        # Önce focus Div/Section içeriğini çıkart
+        focus_blocks = self._extract_focus_blocks(blocks)
+        if focus_blocks:
+            # Sadece bu blokların içeriğini say
+            return focus_blocks
 
-            self._syllable_count = body_syl
-            self._word_count = body_words
-
-        self._reading_time = self._syllable_count * self._seconds_per_syllable
+        # Hiç focus bloğu yok
+        if self._require_focus:
+            return []
+        # Eski davranış: tüm gövdeyi say
+        return list(blocks)
 
     # ------------------------------------------------------------------
     # Focus selection helpers
@@ -307,23 +747,19 @@ class PandocAST:
         """
         collected: List[Dict[str, Any]] = []
 
-        for blk in blocks:
-            if blk.get("t") == "Div":
-                attr, inner_blocks = blk["c"]
-                ident = attr[0]
-                classes = attr[1] or []
-
-                if self._matches_focus(ident, classes):
-                    # Bu Div bir focus bloğu → sadece içeriğini al
-                    collected.extend(inner_blocks)
-                else:
-                    # İçinde başka Div'ler olabilir, içlerine bak
-                    # (örneğin nested wordcloud vs.)
-                    nested = self._extract_focus_blocks(inner_blocks)
-                    collected.extend(nested)
+        def visit_div(blk: Dict[str, Any]) -> Any:
+            attr, inner_blocks = blk["c"]
+            if self._matches_focus(attr[0], attr[1] or []):
+                # Bu Div bir focus bloğu → sadece içeriğini al
+                collected.extend(inner_blocks)
+                return SKIP
+            # İçinde başka Div'ler olabilir, walker içlerine bakar
+            # (örneğin nested wordcloud vs.)
+            return None
 
-            # Diğer block türlerinin içine Div koyma ihtimalin düşük;
-            # sade ve kontrollü tutmak için şimdilik sadece Div içinde arıyoruz.
+        # Diğer block türlerinin içine Div koyma ihtimalin düşük;
+        # sade ve kontrollü tutmak için şimdilik sadece Div içinde arıyoruz.
+        ASTWalker(DIV_CHILDREN).register("Div", visit_div).walk(blocks)
 
         return collected
 
@@ -418,206 +854,121 @@ class PandocAST:
             # No vowel after digit removal → ignore as word
             return 0, 0
 
-    def _count_inlines(self, inlines: Sequence[Dict[str, Any]]) -> tuple[int, int]:
-        """Count (syllables, words) in a list of Pandoc inlines (JSON AST form)."""
-        total_syllables = 0
-        total_words = 0
-
-        for el in inlines:
-            t = el["t"]
-            c = el.get("c")
-
-            if t == "Str":
-                text = c
-                for tok in text.split():
-                    syl, w = self._count_token(tok)
-                    total_syllables += syl
-                    total_words += w
-
-            elif t in ("Emph", "Strong"):
-                inner = c
-                s, w = self._count_inlines(inner)
-                total_syllables += s
-                total_words += w
-
-            elif t == "Span":
-                if isinstance(c, list) and len(c) >= 2:
-                    inner = c[1]
-                    s, w = self._count_inlines(inner)
-                    total_syllables += s
-                    total_words += w
-
-            elif t == "Quoted":
-                if isinstance(c, list) and len(c) == 2:
-                    inner = c[1]
-                    s, w = self._count_inlines(inner)
-                    total_syllables += s
-                    total_words += w
-
-            elif t == "Link":
-                if isinstance(c, list):
-                    if len(c) >= 2 and isinstance(c[1], list):
-                        inner = c[1]
-                    elif len(c) >= 1 and isinstance(c[0], list):
-                        inner = c[0]
-                    else:
-                        inner = []
-                    s, w = self._count_inlines(inner)
-                    total_syllables += s
-                    total_words += w
-
-            elif t == "Image":
-                if isinstance(c, list):
-                    if len(c) >= 2 and isinstance(c[1], list):
-                        alt_inlines = c[1]
-                    elif len(c) >= 1 and isinstance(c[0], list):
-                        alt_inlines = c[0]
-                    else:
-                        alt_inlines = []
-                    s, w = self._count_inlines(alt_inlines)
-                    total_syllables += s
-                    total_words += w
-
-            elif t == "Code":
-                # Skip inline code
-                continue
+    def _count_nodes(self, nodes: Sequence[Dict[str, Any]]) -> tuple[int, int]:
+        """
+        Count (syllables, words) over a list of block and/or inline elements.
 
-            elif t in ("Space", "SoftBreak", "LineBreak"):
-                continue
+        Traversal rules (which node types are descended into, skipped Divs,
+        ignored Code / raw HTML, ...) live in ast_walker.COUNT_CHILDREN;
+        this method only counts the collected Str leaves. Collectors are
+        attached to the same walker.
+        """
+        walker = ASTWalker()
+        strs = walker.collect("Str")
+        for collector in self._collectors:
+            collector.attach(walker)
+        walker.walk(nodes)
 
-            elif t == "RawInline":
-                if isinstance(c, list) and len(c) == 2:
-                    fmt, raw = c
-                    if fmt == "html" and raw.lstrip().lower().startswith("<iframe"):
-                        continue
-                continue
+        if self._batch_counter is not None:
+            tokens = [tok for node in strs for tok in node["c"].split()]
+            self._words.extend(tokens)
+            return self._batch_counter.count(tokens)
 
-            else:
-                continue
+        total_syllables = 0
+        total_words = 0
+        count_token = self._count_token
+        for node in strs:
+            for tok in node["c"].split():
+                syl, w = count_token(tok)
+                total_syllables += syl
+                total_words += w
 
         return total_syllables, total_words
 
-    def _count_blocks(self, blocks: Sequence[Dict[str, Any]]) -> tuple[int, int]:
-        """Count (syllables, words) over a list of block elements."""
+    def _count_nodes_memo(self, nodes: Sequence[Dict[str, Any]]) -> tuple[int, int]:
+        """
+        Same result as _count_nodes, but per block through the block
+        memo: unchanged blocks reuse their stored contribution, the others
+        are counted and stored.
+        """
+        memo = self._block_memo
+        doc_key = memo.doc_key(
+            self._path,
+            ":".join([
+                _counting_rules_digest(),
+                "".join(sorted(self._vowel_set)),
+                " ".join(sorted(self._focus_blocks)),
+                str(self._require_focus),
+            ]),
+        )
+        previous = memo.load(doc_key)
+        current: Dict[str, Any] = {}
+
         total_syllables = 0
         total_words = 0
+        for node in self._memo_units(nodes):
+            h = _block_hash(node)
+            entry = current.get(h) or previous.get(h)
+            if entry is None:
+                start = len(self._words)
+                syl, w = self._count_nodes([node])
+                entry = (syl, w, tuple(self._words[start:]))
+                self._blocks_recomputed += 1
+            else:
+                self._words.extend(entry[2])
+                self._blocks_reused += 1
+            current[h] = entry
+            total_syllables += entry[0]
+            total_words += entry[1]
 
-        for blk in blocks:
-            t = blk["t"]
-            c = blk.get("c")
+        memo.reused += self._blocks_reused
+        memo.recomputed += self._blocks_recomputed
+        if current.keys() != previous.keys():
+            memo.save(doc_key, current)
 
-            if t == "Div":
-                # c = [attr, [blocks...]]
-                attr, inner_blocks = c
-                identifier = attr[0]
-                classes = attr[1] or []
+        return total_syllables, total_words
 
-                # Skip navigation and external refs
-                if identifier == "quarto-navigation-envelope":
-                    continue
-                if "external-refs" in classes:
+    @staticmethod
+    def _memo_units(nodes: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return the blocks memoized one by one: the given nodes, with
+        counted Divs (sections, callouts, ...) replaced by their content so
+        that a document wrapped in one large Div still gets fine-grained
+        reuse. Skipped Divs are dropped, as they count nothing.
+        """
+        div_children = COUNT_CHILDREN["Div"]
+        units: List[Dict[str, Any]] = []
+        stack = [iter(nodes)]
+        while stack:
+            for node in stack[-1]:
+                if node["t"] == "Div":
+                    inner = div_children(node)
+                    if inner:
+                        stack.append(iter(inner))
+                        break
                     continue
-
-                s, w = self._count_blocks(inner_blocks)
-                total_syllables += s
-                total_words += w
-
-            elif t in ("Para", "Plain"):
-                inlines = c
-                s, w = self._count_inlines(inlines)
-                total_syllables += s
-                total_words += w
-
-            elif t == "Header":
-                inlines = c[2]
-                s, w = self._count_inlines(inlines)
-                total_syllables += s
-                total_words += w
-
-            elif t == "BlockQuote":
-                s, w = self._count_blocks(c)
-                total_syllables += s
-                total_words += w
-
-            elif t == "Figure":
-                if isinstance(c, list):
-                    if len(c) >= 3 and isinstance(c[2], list):
-                        content_blocks = c[2]
-                        s, w = self._count_blocks(content_blocks)
-                        total_syllables += s
-                        total_words += w
-                    else:
-                        nested_blocks = [
-                            x for x in c
-                            if isinstance(x, dict) and "t" in x
-                        ]
-                        if nested_blocks:
-                            s, w = self._count_blocks(nested_blocks)
-                            total_syllables += s
-                            total_words += w
-
-            elif t in ("BulletList", "OrderedList"):
-                if t == "BulletList":
-                    items = c
-                else:
-                    items = c[1]
-                for item in items:
-                    s, w = self._count_blocks(item)
-                    total_syllables += s
-                    total_words += w
-
-            elif t == "Table":
-                caption = c[0] if isinstance(c, list) and c else None
-                long_caption = None
-                if isinstance(caption, dict) and caption.get("t") == "Caption":
-                    _, long_blocks = caption["c"]
-                    caption_inlines = []
-                    for b in long_blocks:
-                        if b["t"] in ("Para", "Plain"):
-                            caption_inlines.extend(b["c"])
-                    long_caption = caption_inlines
-
-                if long_caption:
-                    s, w = self._count_inlines(long_caption)
-                    total_syllables += s
-                    total_words += w
-
-            elif t == "RawBlock":
-                if isinstance(c, list) and len(c) == 2:
-                    fmt, raw = c
-                    if fmt == "html" and raw.lstrip().lower().startswith("<iframe"):
-                        continue
-
+                units.append(node)
             else:
-                continue
-
-        return total_syllables, total_words
+                stack.pop()
+        return units
 
     # ------------------------------------------------------------------
-    # Meta counting (title, subtitle, description)
+    # Meta selection (title, subtitle, description)
     # ------------------------------------------------------------------
 
-    def _count_meta(self, ast: Dict[str, Any]) -> tuple[int, int]:
-        """Count (syllables, words) from title, subtitle, description in meta."""
+    @staticmethod
+    def _meta_inlines(ast: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Return the inlines of title, subtitle, description in meta."""
         meta = ast.get("meta", {})
-        total_syllables = 0
-        total_words = 0
+        inlines: List[Dict[str, Any]] = []
 
-        def meta_field_inlines(name: str) -> List[Dict[str, Any]]:
-            v = meta.get(name)
+        for key in ("title", "subtitle", "description"):
+            v = meta.get(key)
             if not v:
-                return []
+                continue
             if v.get("t") == "MetaInlines":
-                return v["c"]
-            if v.get("t") == "MetaString":
-                return [{"t": "Str", "c": v["c"]}]
-            return []
+                inlines.extend(v["c"])
+            elif v.get("t") == "MetaString":
+                inlines.append({"t": "Str", "c": v["c"]})
 
-        for key in ("title", "subtitle", "description"):
-            inlines = meta_field_inlines(key)
-            if inlines:
-                s, w = self._count_inlines(inlines)
-                total_syllables += s
-                total_words += w
-
-        return total_syllables, total_words
+        return inlines
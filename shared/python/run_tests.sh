@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+if [[ -n "${NO_COLOR:-}" || "$TERM" == "dumb" || -n "${CI:-}" ]]; then
+  SUCCESS=''
+  FAIL=''
+  RESET=''
+else
+  SUCCESS='\033[1;35m'
+  FAIL='\033[1;31m'
+  RESET='\033[0m'
+fi
+
+# Resolve directory of this script, regardless of current working directory
+SCRIPT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")" >/dev/null 2>&1 && pwd)"
+TESTS_DIR="$SCRIPT_DIR/tests"
+
+echo "Running Python tests from: $TESTS_DIR"
+cd "$SCRIPT_DIR"
+
+# Extra arguments go to pytest (e.g. -k lean)
+if ! python3 -m pytest -q "$TESTS_DIR" "$@"; then
+  echo
+  echo -e "${FAIL}✘ Some tests failed.${RESET}"
+  exit 1
+fi
+
+echo
+echo -e "${SUCCESS}✔ All tests completed successfully.${RESET}"
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# ../shared/python/startup_report.py
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# Modules a run with nothing to rebuild should never import
+HEAVY_MODULES = ("yaml", "pandoc_ast", "wordcloud_ngrams", "wordcloud", "numpy")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """
+    Parse `python -X importtime` output into (self_us, cumulative_us, name)
+    rows, in import order. name keeps its indentation (nesting depth).
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            rows.append((int(parts[0]), int(parts[1]), parts[2].rstrip()[1:]))
+        except ValueError:
+            continue  # the header line
+    return rows
+
+
+def _run(cmd: Sequence[str], env: Dict[str, str]) -> Tuple[float, str, str]:
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"{' '.join(cmd)} failed ({proc.returncode}):\n{proc.stderr}"
+        )
+    return elapsed, proc.stdout, proc.stderr
+
+
+def startup_report(
+    script: Union[str, Path],
+    budget_ms: float,
+    runs: int = 5,
+    top: int = 10,
+    env: Optional[Dict[str, str]] = None,
+) -> int:
+    """
+    Time `script` as Quarto runs it (no arguments, current environment)
+    and print an -X importtime breakdown of one more run.
+
+    The wall time is the median of `runs` plain runs, interpreter start
+    included. Run it after a build, so it measures the no-op path.
+
+    Returns 0 if the median is within budget_ms, else 1.
+    """
+    env = dict(os.environ if env is None else env)
+    cmd = [sys.executable, str(script)]
+
+    runs = max(1, runs)
+    timings = sorted(_run(cmd, env)[0] for _ in range(runs))
+    median = timings[runs // 2]
+    bare = sorted(_run([sys.executable, "-c", "pass"], env)[0] for _ in range(runs))
+    baseline = bare[runs // 2]
+
+    _, stdout, stderr = _run([sys.executable, "-X", "importtime", str(script)], env)
+    rows = parse_importtime(stderr)
+    top_level = [(cum, own, name) for own, cum, name in rows if not name.startswith(" ")]
+    imported = {name.strip() for _, _, name in rows}
+
+    print(f"⏱️  Startup report     : {Path(script).name}")
+    print(f"    cold start        : {median:.1f} ms median of {runs} "
+          f"(min {timings[0]:.1f} ms, bare interpreter {baseline:.1f} ms)")
+    print(f"    imports           : {sum(cum for cum, _, _ in top_level) / 1000:.1f} ms "
+          f"(-X importtime)")
+    for cum, own, name in sorted(top_level, reverse=True)[:top]:
+        print(f"    {cum / 1000:7.1f} ms  {own / 1000:6.1f} ms self  {name}")
+
+    heavy = [m for m in HEAVY_MODULES if m in imported]
+    if heavy:
+        rebuilt = "rebuilt" in stdout
+        note = "a rebuild ran" if rebuilt else "nothing was rebuilt"
+        print(f"⚠️  Heavy imports     : {', '.join(heavy)} ({note})")
+
+    if median > budget_ms:
+        print(f"❌  Over budget       : {median:.1f} ms > {budget_ms:g} ms")
+        return 1
+    print(f"✅  Within budget     : {median:.1f} ms <= {budget_ms:g} ms")
+    return 0
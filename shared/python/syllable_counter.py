@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# ../shared/python/syllable_counter.py
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, Tuple
+
+# Same deletions as PandocAST._strip_brackets_and_braces and
+# PandocAST._normalize_for_vowel_check
+_BRACKETS = str.maketrans("", "", "{}[]")
+_DIGITS = re.compile(r"\d+")
+
+
+class BatchSyllableCounter:
+    """
+    Count syllables and words of a whole token stream at once.
+
+    Equivalent to summing PandocAST._count_token over the tokens. Under
+    those per-token rules a token counts as one word iff it still has a
+    vowel after removing { } [ ] and digits, and its syllables are then
+    the number of vowel runs in that cleaned token. (The "all digits" and
+    "letters without vowels" fallbacks of _syllables_for_word are only
+    reached for tokens without vowels, which are not counted.)
+
+    So instead of a regex call and a Python loop per token, the tokens are
+    joined with spaces, cleaned with one translate + one regex substitution,
+    and counted with two regex scans, all in C.
+    """
+
+    def __init__(self, vowels: Iterable[str]) -> None:
+        # _is_vowel compares single characters; longer entries never match
+        chars = sorted({v for v in vowels if len(v) == 1 and not v.isspace()})
+        if chars:
+            cls = "".join(re.escape(ch) for ch in chars)
+            self._vowel_runs = re.compile(f"[{cls}]+")
+            # From the first vowel of a token to its end: one match per word
+            self._vowel_words = re.compile(f"[{cls}][^ ]*")
+        else:
+            self._vowel_runs = None
+            self._vowel_words = None
+
+    def count(self, tokens: Iterable[str]) -> Tuple[int, int]:
+        """
+        Return (syllables, words) for whitespace-free tokens.
+
+        :param tokens: Tokens as produced by str.split() on Str texts.
+        """
+        if self._vowel_runs is None:
+            return 0, 0
+
+        text = _DIGITS.sub("", " ".join(tokens).translate(_BRACKETS))
+        syllables = len(self._vowel_runs.findall(text))
+        words = len(self._vowel_words.findall(text))
+        return syllables, words
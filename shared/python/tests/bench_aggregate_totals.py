@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# ../shared/python/tests/bench_aggregate_totals.py
+"""
+Time aggregate_totals_for_paths on synthetic projects: the old
+per-prefix scan (tests/legacy.py) against the single pass, reading the
+sidecars or given the stats in memory (as main() does with the manifest).
+
+Usage (from shared/python):
+    python3 tests/bench_aggregate_totals.py [--docs-per-folder N] [--repeat N]
+Each project is first aggregated once, so the timed runs only read and
+compare (unchanged aggregates are not rewritten).
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path[:0] = [str(HERE.parent), str(HERE)]
+
+import legacy  # noqa: E402
+from conftest import make_stats_project  # noqa: E402
+from precompute_reading_stats import aggregate_totals_for_paths  # noqa: E402
+
+AGGREGATED = ["*", "*/*"]
+SIZES = (10, 40, 160)  # folders
+
+
+def best(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs-per-folder", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'files':>6} / {'prefixes':<8} {'old':>9} {'new (sidecars)':>15} {'new (memory)':>13}")
+    for folders in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            qmd_files, stats = make_stats_project(root, folders, args.docs_per_folder)
+
+            def old():
+                legacy.aggregate_totals_for_paths(root, qmd_files, AGGREGATED, "tr", 0.2)
+
+            def from_sidecars():
+                aggregate_totals_for_paths(root, qmd_files, AGGREGATED, "tr", 0.2)
+
+            def from_memory():
+                aggregate_totals_for_paths(root, qmd_files, AGGREGATED, "tr", 0.2, stats=stats)
+
+            old()
+            times = [best(f, args.repeat) for f in (old, from_sidecars, from_memory)]
+            prefixes = folders + 2
+            print(f"{len(qmd_files):>6} / {prefixes:<8} "
+                  f"{times[0]:>8.3f}s {times[1]:>14.3f}s {times[2]:>12.3f}s")
+
+
+if __name__ == "__main__":
+    main()
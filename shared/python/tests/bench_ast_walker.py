@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# ../shared/python/tests/bench_ast_walker.py
+"""
+Time the counting traversal over the ASTs of whole projects: the legacy
+recursive counters (tests/legacy.py) against ast_walker, as each hands
+the tokens of a document to the syllable counting. Counting itself is
+stubbed out: the legacy code gets a count_token that only records the
+token (it made one Python call per token), the walker a batch counter
+that only takes the token list (PandocAST's default "batch" engine).
+Also checks that both see the same tokens and reports the Python and
+builtin calls of one pass, and the walker's traversal on its own (the
+rest is splitting the Str texts and storing the tokens).
+
+Usage (from shared/python):
+    python3 tests/bench_ast_walker.py [PROJECT ...] [--repeat N] [--largest N]
+Projects default to the repo's tr/ and en/. Every project document is
+timed, then the --largest N (by source size) on their own. Needs pandoc.
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path[:0] = [str(HERE.parent), str(HERE)]
+
+import legacy  # noqa: E402
+from ast_walker import ASTWalker  # noqa: E402
+from pandoc_ast import PandocAST  # noqa: E402
+
+REPO = HERE.parent.parent.parent
+FOCUS_CONFIGS = [{}, {"focus_blocks": ["word-cloud"]}]
+
+
+def project_qmds(root: Path):
+    return sorted(
+        p for p in root.rglob("*.qmd")
+        if not any(part.startswith((".", "_")) for part in p.relative_to(root).parts)
+    )
+
+
+class StubCounter:
+    """BatchSyllableCounter stand-in: every token is one word, no syllables."""
+
+    def count(self, tokens):
+        return 0, len(tokens)
+
+
+def legacy_count(ast, **config):
+    tokens = []
+
+    def record_token(tok):
+        tokens.append(tok.strip())
+        return 0, 1
+
+    return legacy.count_document(ast, record_token, **config), tokens
+
+
+def walker_count(ast, **config):
+    doc = PandocAST("bench.qmd", ast=ast, lazy=True, **config)
+    doc._batch_counter = StubCounter()
+    return doc._count_nodes(doc._select_nodes()), doc._words
+
+
+def walk_only(ast, **config):
+    doc = PandocAST("bench.qmd", ast=ast, lazy=True, **config)
+    walker = ASTWalker()
+    strs = walker.collect("Str")
+    walker.walk(doc._select_nodes())
+    return strs
+
+
+def run_all(func, asts):
+    for ast in asts:
+        for config in FOCUS_CONFIGS:
+            func(ast, **config)
+
+
+def best_cpu(func, asts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        run_all(func, asts)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def count_calls(func, asts):
+    """Return (Python calls, builtin calls) of one pass."""
+    calls = Counter()
+
+    def profile(frame, event, arg):
+        calls[event] += 1
+
+    sys.setprofile(profile)
+    try:
+        run_all(func, asts)
+    finally:
+        sys.setprofile(None)
+    return calls["call"], calls["c_call"]
+
+
+def report(title, asts, repeat):
+    rows = [
+        ("legacy recursive counters", legacy_count),
+        ("ast_walker", walker_count),
+        ("  of which the walk", walk_only),
+    ]
+    print(f"{title}: {len(asts)} ASTs x {len(FOCUS_CONFIGS)} focus configs, best CPU of {repeat}")
+    print(f"  {'':<26} {'time':>8} {'Python calls':>13} {'builtin calls':>14}")
+    times = []
+    for name, func in rows:
+        times.append(best_cpu(func, asts, repeat))
+        py_calls, c_calls = count_calls(func, asts)
+        print(f"  {name:<26} {times[-1]:>7.3f}s {py_calls:>13,} {c_calls:>14,}")
+    print(f"  speedup {times[0] / times[1]:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("projects", nargs="*", type=Path,
+                        default=[REPO / "tr", REPO / "en"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--largest", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = [p for root in args.projects for p in project_qmds(root)]
+    loaded = PandocAST.load_many(paths)
+    asts = [loaded[p] if p in loaded else PandocAST(p, lazy=True).ast for p in paths]
+
+    for ast in asts:
+        for config in FOCUS_CONFIGS:
+            (counts, tokens), (legacy_counts, legacy_tokens) = (
+                walker_count(ast, **config), legacy_count(ast, **config))
+            assert counts == legacy_counts and list(tokens) == legacy_tokens
+
+    report("all documents", asts, args.repeat)
+    by_size = sorted(zip(paths, asts), key=lambda item: item[0].stat().st_size, reverse=True)
+    largest = by_size[:args.largest]
+    names = ", ".join(p.relative_to(REPO).as_posix() for p, _ in largest)
+    report(f"largest {len(largest)} ({names})", [ast for _, ast in largest], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
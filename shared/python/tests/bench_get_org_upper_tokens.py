@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# ../shared/python/tests/bench_get_org_upper_tokens.py
+"""
+Time get_org_upper_tokens on growing prefixes of a project's word cloud
+tokens: the old list lookup (tests/legacy.py) against the candidate set.
+Also checks that both return the same forms.
+
+Usage (from shared/python):
+    python3 tests/bench_get_org_upper_tokens.py [PROJECT] [--repeat N]
+The project defaults to the repo's tr/. Its pages are read as the word
+cloud sees them (counted words, punctuation stripped, lower-cased and
+preprocessed), trial/judgment.qmd first. Needs pandoc.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path[:0] = [str(HERE.parent), str(HERE)]
+
+import legacy  # noqa: E402
+from bench_ast_walker import REPO, project_qmds  # noqa: E402
+from pandoc_ast import PandocAST  # noqa: E402
+from wordcloud_ngrams import get_org_upper_tokens, preprocess_text  # noqa: E402
+
+SIZES = (25_000, 50_000, 100_000, 200_000)
+FIRST = "trial/judgment.qmd"
+
+
+def project_tokens(root: Path):
+    qmds = project_qmds(root)
+    qmds.sort(key=lambda p: p.relative_to(root).as_posix() != FIRST)
+    asts = PandocAST.load_many(qmds)
+    tokens = []
+    for qmd in qmds:
+        doc = PandocAST(qmd, ast=asts.get(qmd), lazy=True)
+        tokens.extend(preprocess_text(doc.to_string(punct=False, lower=True)))
+    return tokens
+
+
+def best(func, tokens, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(tokens)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project", nargs="?", type=Path, default=REPO / "tr")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tokens = project_tokens(args.project.resolve())
+    print(f"{'tokens':>8} {'caps forms':>11} {'before':>10} {'after':>9}")
+    for size in [s for s in SIZES if s < len(tokens)] + [len(tokens)]:
+        prefix = tokens[:size]
+        forms = get_org_upper_tokens(prefix)
+        if forms != legacy.get_org_upper_tokens(prefix):
+            sys.exit(f"results differ on the first {size} tokens")
+        before = best(legacy.get_org_upper_tokens, prefix, args.repeat)
+        after = best(get_org_upper_tokens, prefix, args.repeat)
+        print(f"{size:>8} {len(forms):>11} {before * 1000:>8.1f}ms {after * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
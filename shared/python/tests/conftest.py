@@ -0,0 +1,89 @@
+# ../shared/python/tests/conftest.py
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# The scripts import each other by bare name (as when run from shared/python)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+requires_pandoc = pytest.mark.skipif(
+    shutil.which("pandoc") is None, reason="pandoc is not installed"
+)
+
+
+@pytest.fixture(autouse=True)
+def _no_project_dir(monkeypatch, tmp_path):
+    """Keep every test away from the real project's .quarto directory."""
+    monkeypatch.setenv("QUARTO_PROJECT_DIR", str(tmp_path))
+
+
+def make_stats_project(root, folders, docs_per_folder, lang="tr", seconds_per_syllable=0.2):
+    """
+    Create a project of qmd files with their *_reading_stats.yml sidecars:
+    `folders` sub-folders split over the top-level dirs "a" and "b", each
+    holding docs_per_folder pages. Returns (qmd_files, stats), stats
+    mapping each qmd to the sidecar payload (as main() passes them).
+    """
+    import random
+
+    from precompute_reading_stats import build_reading_dict, stats_yaml_path, write_stats_yaml
+
+    rng = random.Random(folders * 1000 + docs_per_folder)
+    qmd_files = []
+    stats = {}
+    for i in range(folders):
+        folder = root / ("a", "b")[i % 2] / f"part{i:04d}"
+        folder.mkdir(parents=True)
+        for j in range(docs_per_folder):
+            qmd = folder / f"doc{j:03d}.qmd"
+            qmd.write_text("---\ntitle: x\n---\n", encoding="utf-8")
+            reading = build_reading_dict(
+                syllables=rng.randint(0, 5000) if j else 0,  # some empty pages
+                words=rng.randint(1, 2000) if j else 0,
+                seconds_per_syllable=seconds_per_syllable,
+                lang=lang,
+            )
+            file_hash = f"{rng.getrandbits(128):032x}"
+            write_stats_yaml(qmd, stats_yaml_path(qmd), file_hash, lang, reading)
+            qmd_files.append(qmd)
+            stats[qmd] = {"hash": file_hash, "reading": reading}
+    return sorted(qmd_files), stats
+
+
+# Pages of make_site: one per GLOB_PATTERNS kind, several per aggregate
+SITE_PAGES = {
+    "trial/judgment.qmd": "Mahkeme kararını açıkladı ve duruşma bitti.",
+    "trial/testimonies/witness/ayse.qmd": "Tanık olayı gördüğünü söyledi.",
+    "trial/testimonies/witness/mehmet.qmd": "İkinci tanık hiçbir şey hatırlamadı.",
+    "trial/testimonies/suspect/ali/testimony.qmd": "Şüpheli suçlamaları reddetti.",
+    "trial/defenses/ali/defense.qmd": "Savunma beraat talep etti.",
+    "test/pages/sayfa.qmd": "Deneme sayfası kısa bir metin içerir.",
+    "blog/posts/2024/ilk/index.qmd": "Blogun ilk yazısı yayımlandı.",
+    "blog/posts/2024/ikinci/index.qmd": "Blogun ikinci yazısı daha uzun bir metin.",
+}
+
+
+def make_site(root, pages=None, lang="tr"):
+    """
+    Create a Quarto project at root (see precompute_reading_stats
+    GLOB_PATTERNS) with one qmd per `pages` entry ({relative path: body},
+    default SITE_PAGES). Returns root.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "_quarto.yml").write_text(
+        f"project:\n  type: website\nlang: {lang}\n", encoding="utf-8"
+    )
+    for rel, body in (SITE_PAGES if pages is None else pages).items():
+        write_page(root / rel, body)
+    return root
+
+
+def write_page(qmd, body, front_matter="title: Sayfa"):
+    """Write a qmd with the given front matter lines and body."""
+    qmd.parent.mkdir(parents=True, exist_ok=True)
+    qmd.write_text(f"---\n{front_matter}\n---\n\n{body}\n", encoding="utf-8")
@@ -0,0 +1,571 @@
+# ../shared/python/tests/legacy.py
+"""
+Implementations replaced by optimized ones, kept verbatim in behaviour
+as references: the parity tests compare against them and the bench_*.py
+scripts time them as the "before" column.
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+Node = Dict[str, Any]
+
+
+# ----------------------------------------------------------------------
+# PandocAST counting traversal before ast_walker (PandocAST._count_inlines,
+# _count_blocks and _count_meta as they were, with count_token(tok) ->
+# (syllables, words) passed in instead of self._count_token)
+# ----------------------------------------------------------------------
+
+CountToken = Callable[[str], Tuple[int, int]]
+
+
+def count_inlines(inlines: Sequence[Node], count_token: CountToken) -> Tuple[int, int]:
+    """Count (syllables, words) in a list of Pandoc inlines (JSON AST form)."""
+    total_syllables = 0
+    total_words = 0
+
+    for el in inlines:
+        t = el["t"]
+        c = el.get("c")
+
+        if t == "Str":
+            text = c
+            for tok in text.split():
+                syl, w = count_token(tok)
+                total_syllables += syl
+                total_words += w
+
+        elif t in ("Emph", "Strong"):
+            inner = c
+            s, w = count_inlines(inner, count_token)
+            total_syllables += s
+            total_words += w
+
+        elif t == "Span":
+            if isinstance(c, list) and len(c) >= 2:
+                inner = c[1]
+                s, w = count_inlines(inner, count_token)
+                total_syllables += s
+                total_words += w
+
+        elif t == "Quoted":
+            if isinstance(c, list) and len(c) == 2:
+                inner = c[1]
+                s, w = count_inlines(inner, count_token)
+                total_syllables += s
+                total_words += w
+
+        elif t == "Link":
+            if isinstance(c, list):
+                if len(c) >= 2 and isinstance(c[1], list):
+                    inner = c[1]
+                elif len(c) >= 1 and isinstance(c[0], list):
+                    inner = c[0]
+                else:
+                    inner = []
+                s, w = count_inlines(inner, count_token)
+                total_syllables += s
+                total_words += w
+
+        elif t == "Image":
+            if isinstance(c, list):
+                if len(c) >= 2 and isinstance(c[1], list):
+                    alt_inlines = c[1]
+                elif len(c) >= 1 and isinstance(c[0], list):
+                    alt_inlines = c[0]
+                else:
+                    alt_inlines = []
+                s, w = count_inlines(alt_inlines, count_token)
+                total_syllables += s
+                total_words += w
+
+        elif t == "Code":
+            # Skip inline code
+            continue
+
+        elif t in ("Space", "SoftBreak", "LineBreak"):
+            continue
+
+        elif t == "RawInline":
+            if isinstance(c, list) and len(c) == 2:
+                fmt, raw = c
+                if fmt == "html" and raw.lstrip().lower().startswith("<iframe"):
+                    continue
+            continue
+
+        else:
+            continue
+
+    return total_syllables, total_words
+
+def count_blocks(blocks: Sequence[Node], count_token: CountToken) -> Tuple[int, int]:
+    """Count (syllables, words) over a list of block elements."""
+    total_syllables = 0
+    total_words = 0
+
+    for blk in blocks:
+        t = blk["t"]
+        c = blk.get("c")
+
+        if t == "Div":
+            # c = [attr, [blocks...]]
+            attr, inner_blocks = c
+            identifier = attr[0]
+            classes = attr[1] or []
+
+            # Skip navigation and external refs
+            if identifier == "quarto-navigation-envelope":
+                continue
+            if "external-refs" in classes:
+                continue
+
+            s, w = count_blocks(inner_blocks, count_token)
+            total_syllables += s
+            total_words += w
+
+        elif t in ("Para", "Plain"):
+            inlines = c
+            s, w = count_inlines(inlines, count_token)
+            total_syllables += s
+            total_words += w
+
+        elif t == "Header":
+            inlines = c[2]
+            s, w = count_inlines(inlines, count_token)
+            total_syllables += s
+            total_words += w
+
+        elif t == "BlockQuote":
+            s, w = count_blocks(c, count_token)
+            total_syllables += s
+            total_words += w
+
+        elif t == "Figure":
+            if isinstance(c, list):
+                if len(c) >= 3 and isinstance(c[2], list):
+                    content_blocks = c[2]
+                    s, w = count_blocks(content_blocks, count_token)
+                    total_syllables += s
+                    total_words += w
+                else:
+                    nested_blocks = [
+                        x for x in c
+                        if isinstance(x, dict) and "t" in x
+                    ]
+                    if nested_blocks:
+                        s, w = count_blocks(nested_blocks, count_token)
+                        total_syllables += s
+                        total_words += w
+
+        elif t in ("BulletList", "OrderedList"):
+            if t == "BulletList":
+                items = c
+            else:
+                items = c[1]
+            for item in items:
+                s, w = count_blocks(item, count_token)
+                total_syllables += s
+                total_words += w
+
+        elif t == "Table":
+            caption = c[0] if isinstance(c, list) and c else None
+            long_caption = None
+            if isinstance(caption, dict) and caption.get("t") == "Caption":
+                _, long_blocks = caption["c"]
+                caption_inlines = []
+                for b in long_blocks:
+                    if b["t"] in ("Para", "Plain"):
+                        caption_inlines.extend(b["c"])
+                long_caption = caption_inlines
+
+            if long_caption:
+                s, w = count_inlines(long_caption, count_token)
+                total_syllables += s
+                total_words += w
+
+        elif t == "RawBlock":
+            if isinstance(c, list) and len(c) == 2:
+                fmt, raw = c
+                if fmt == "html" and raw.lstrip().lower().startswith("<iframe"):
+                    continue
+
+        else:
+            continue
+
+    return total_syllables, total_words
+
+# ------------------------------------------------------------------
+# Meta counting (title, subtitle, description)
+# ------------------------------------------------------------------
+
+def count_meta(ast: Node, count_token: CountToken) -> Tuple[int, int]:
+    """Count (syllables, words) from title, subtitle, description in meta."""
+    meta = ast.get("meta", {})
+    total_syllables = 0
+    total_words = 0
+
+    def meta_field_inlines(name: str) -> List[Node]:
+        v = meta.get(name)
+        if not v:
+            return []
+        if v.get("t") == "MetaInlines":
+            return v["c"]
+        if v.get("t") == "MetaString":
+            return [{"t": "Str", "c": v["c"]}]
+        return []
+
+    for key in ("title", "subtitle", "description"):
+        inlines = meta_field_inlines(key)
+        if inlines:
+            s, w = count_inlines(inlines, count_token)
+            total_syllables += s
+            total_words += w
+
+    return total_syllables, total_words
+
+
+def extract_focus_blocks(blocks: Sequence[Node], focus: Set[str]) -> List[Node]:
+    collected: List[Node] = []
+    for blk in blocks:
+        if blk.get("t") == "Div":
+            attr, inner_blocks = blk["c"]
+            if (attr[0] and attr[0] in focus) or any(c in focus for c in attr[1] or []):
+                collected.extend(inner_blocks)
+            else:
+                collected.extend(extract_focus_blocks(inner_blocks, focus))
+    return collected
+
+
+def count_document(
+    ast: Node,
+    count_token: CountToken,
+    focus_blocks: Sequence[str] = (),
+    require_focus: bool = False,
+) -> Tuple[int, int]:
+    """Return (syllables, words) as PandocAST._compute_counts did before ast_walker."""
+    blocks = ast.get("blocks", [])
+    focus = set(focus_blocks)
+    if not focus:
+        meta_syl, meta_words = count_meta(ast, count_token)
+        body_syl, body_words = count_blocks(blocks, count_token)
+        return meta_syl + body_syl, meta_words + body_words
+
+    selected = extract_focus_blocks(blocks, focus)
+    if selected:
+        return count_blocks(selected, count_token)
+    if require_focus:
+        return 0, 0
+    return count_blocks(blocks, count_token)
+
+
+# ----------------------------------------------------------------------
+# precompute_reading_stats.aggregate_totals_for_paths before the prefix
+# trie: every prefix x every file, one sidecar read per match
+# ----------------------------------------------------------------------
+
+def aggregate_totals_for_paths(
+    root: Path,
+    qmd_files,
+    aggregated_paths,
+    lang: str,
+    seconds_per_syllable: float,
+):
+    """
+    For each path in aggregated_paths (relative to root), sum syllables, words, seconds
+    from the *_reading_stats.yml files of qmd_files whose relative path starts
+    with that prefix, and write an index_reading_stats.yml into that directory.
+
+    Additionally, compute a aggregated_hash from the child hash values and only
+    rewrite the index file if the aggregated_hash changed.
+    """
+    import hashlib
+
+    from precompute_reading_stats import (
+        format_reading_label,
+        load_existing_stats,
+        stats_yaml_path,
+        write_aggregated_stats_yaml,
+    )
+
+    # Expand patterns inside AGGREGATED_PATHS
+    resolved_paths = []
+
+    for prefix in aggregated_paths:
+        if "*" in prefix:
+            # Resolve glob relative to root
+            for p in (root.glob(prefix)):
+                if p.is_dir():
+                    rel = p.relative_to(root).as_posix()
+                    resolved_paths.append(rel)
+        else:
+            resolved_paths.append(prefix)
+
+    # Remove duplicates and sort
+    resolved_paths = sorted(set(resolved_paths))
+
+    for prefix in resolved_paths:
+        total_syllables = 0
+        total_words = 0
+        total_seconds = 0.0
+        child_hash_entries = []  # will contain "rel:path:hash" strings
+
+        for qmd in qmd_files:
+            rel = qmd.relative_to(root).as_posix()
+            # Match files under this prefix directory, e.g. "trial/..." or "trial/testimonies/..."
+            if not (rel == prefix or rel.startswith(prefix + "/")):
+                continue
+
+            yml_path = stats_yaml_path(qmd)
+            existing = load_existing_stats(yml_path)
+            if not existing:
+                continue
+
+            rt = existing.get("reading") or {}
+            total_syllables += int(rt.get("syllables", 0))
+            total_words += int(rt.get("words", 0))
+            total_seconds += float(rt.get("seconds", 0.0))
+
+            # Collect child hash for aggregate hashing (if present)
+            file_hash = existing.get("hash")
+            if file_hash:
+                child_hash_entries.append(f"{rel}:{file_hash}")
+
+        # If nothing accumulated, skip writing
+        if total_syllables == 0 and total_words == 0:
+            continue
+
+        # Compute new aggregated_hash from child_hash_entries
+        child_hash_entries.sort()
+        hasher = hashlib.sha256()
+        for entry in child_hash_entries:
+            hasher.update(entry.encode("utf-8"))
+        aggregated_hash = hasher.hexdigest()
+
+        out_dir = root / prefix
+        out_path = out_dir / "index_reading_stats.yml"
+
+        # Build label from total_seconds (same logic as compute_reading_stats_for_ast)
+        label = format_reading_label(total_seconds, lang)
+        
+        if lang == "tr":
+            label_reading_time = "Toplam Okuma Süresi"
+            label_word_count = "Toplam Kelime Sayısı"
+        else:
+            label_reading_time = "Total Reading Time"
+            label_word_count = "Total Word Count"
+
+        reading = {
+            "seconds_per_syllable": seconds_per_syllable,
+            "syllables": int(total_syllables),
+            "words": int(total_words),
+            "seconds": round(float(total_seconds), 2),
+            "text": label,
+            "label_reading_time": label_reading_time,
+            "label_word_count": label_word_count,
+        }
+
+        write_aggregated_stats_yaml(out_path, aggregated_hash, lang, reading)
+
+
+# ----------------------------------------------------------------------
+# Phrase removal of precompute_reading_stats before PHRASE_REMOVAL_RES:
+# one pattern compiled and applied per phrase, in list order
+# ----------------------------------------------------------------------
+
+def remove_phrases(raw_text: str, phrases: Sequence[str]) -> str:
+    import re
+
+    for phrase in phrases:
+        pattern = rf"(?<!\S){re.escape(phrase)}(?!\S)"
+        raw_text = re.sub(pattern, " ", raw_text)
+    return raw_text
+
+
+# ----------------------------------------------------------------------
+# wordcloud_ngrams.get_org_upper_tokens before the candidate set: every
+# ALL-CAPS form looked up in the list of all stripped tokens
+# ----------------------------------------------------------------------
+
+def get_org_upper_tokens(tokens: Sequence[str]) -> Set[str]:
+    from wordcloud_ngrams import turkish_lower2, turkish_upper
+
+    # 1.a) ALL-CAPS bookkeeping için önce adayları normalize et
+    # Örnek: "CMK’nun" -> "CMK", "TCK'nin" -> "TCK"
+    caps_candidates: List[str] = []
+    for tok in tokens:
+        t = tok.strip()
+        if not t:
+            continue
+
+        # Önce Türkçe apostrof ’ ile böl
+        base = t.split("’", 1)[0]
+        # Sonra gerekirse normal apostrof ' ile de böl
+        base = base.split("'", 1)[0]
+
+        base = base.strip()
+        if base:
+            caps_candidates.append(base)
+
+    # 1.b) ALL-CAPS olanları seç (TCK, CMK vs.)
+    original_upper_tokens = {
+        t for t in caps_candidates
+        if t == turkish_upper(t)
+    }
+
+    # 1.c) Lower-case ikizi varsa (örn. "cmk") onları hariç tut
+    return {
+        tok for tok in original_upper_tokens
+        if turkish_lower2(tok) not in caps_candidates
+    }
+
+
+# ----------------------------------------------------------------------
+# wordcloud_ngrams.compute_ngram_frequencies before the n-gram engines:
+# generate_ngrams + Counter per order, default_ngram_filter per n-gram
+# ----------------------------------------------------------------------
+
+def compute_ngram_frequencies(
+    tokens: Sequence[str],
+    *,
+    max_ngram: int = 1,
+    top_k: int = 200,
+    stopwords: Optional[Iterable[str]] = None,
+    lemma_func: Optional[Callable[[str], str]] = None,
+    filter_func: Optional[
+        Callable[[Tuple[str, ...]], bool]
+    ] = None,
+    min_count_per_n: Optional[Dict[int, int]] = None,
+    use_wordcloud: bool = False,
+    wordcloud_kwargs: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[int, Dict[str, int]], Optional[Dict[str, int]]]:
+    from collections import Counter
+
+    from wordcloud_ngrams import (
+        PROPER_NAME_MAP,
+        adjust_proper_names,
+        default_ngram_filter,
+        generate_ngrams,
+        preprocess_tokens,
+        remove_apostrophes_from_tokens,
+        turkish_lower2,
+        turkish_upper,
+    )
+
+    if max_ngram < 1:
+      max_ngram = 0
+
+    sw = set(stopwords or [])
+    predicates = filter_func or (lambda ng: default_ngram_filter(ng, stopwords=sw))
+    min_counts = min_count_per_n or {}
+
+    # 1) Basic preprocessing (punctuation, digits, casing)
+    pre_tokens = preprocess_tokens(tokens, lowercase=True)
+
+    # 1.a) Restore ALL-CAPS tokens (e.g. TCK) bookkeeping (used only for WordCloud casing logic)
+    original_upper_tokens = get_org_upper_tokens(pre_tokens)
+
+    # 1.b) Proper-name exception handling:
+    #     If a token's lower-case form is in PROPER_NAME_MAP, replace it with the
+    #     configured Title-case form. This affects all downstream n-grams.
+    pre_tokens = adjust_proper_names(pre_tokens)
+
+    # 2) Lemmatization (if any)
+    if lemma_func is not None:
+        lemma_tokens = [lemma_func(t) for t in pre_tokens]
+    else:
+        lemma_tokens = pre_tokens
+
+    # 3) Optional: WordCloud unigrams (for judgment_words.txt)
+    wc_unigrams: Optional[Dict[str, int]] = None
+    if use_wordcloud:
+        try:
+            from wordcloud import WordCloud
+        except ImportError as e:
+            raise RuntimeError(
+                "use_wordcloud=True but the 'wordcloud' package is not installed."
+            ) from e
+
+        text_for_wc = " ".join(lemma_tokens)
+
+        wc_params: Dict[str, Any] = dict(wordcloud_kwargs or {})
+        # If caller did not pass explicit stopwords, use our shared set
+        if stopwords is not None and "stopwords" not in wc_params:
+            wc_params["stopwords"] = sw
+
+        wc = WordCloud(**wc_params)
+        wc_unigrams = wc.process_text(text_for_wc)  # {word: freq}
+
+        # Post-process WordCloud output:
+        # 1) ALL-CAPS geri yükle (original_upper_tokens)
+        # 2) Proper-name Title-case map uygula (PROPER_NAME_MAP)
+        if wc_unigrams is not None:
+            adjusted: Dict[str, int] = {}
+            for term, count in wc_unigrams.items():
+                new_key = term
+
+                # 1) ALL-CAPS restore: wc "tck" üretmişse ve
+                #    orijinal metinde "TCK" varsa → "TCK"
+                candidate_caps = turkish_upper(term)
+                if candidate_caps in original_upper_tokens:
+                    new_key = candidate_caps
+                else:
+                    # 2) Proper-name mapping: "narin" -> "Narin" vb.
+                    lower_key = turkish_lower2(term)
+                    mapped = PROPER_NAME_MAP.get(lower_key)
+                    if mapped is not None:
+                        new_key = mapped
+
+                adjusted[new_key] = adjusted.get(new_key, 0) + count
+
+            # top_k uygulaması burada
+            wc_unigrams = dict(
+                sorted(adjusted.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+            )
+
+    result: Dict[int, Dict[str, int]] = {}
+
+    for n in range(1, max_ngram + 1):
+        tokens_for_ngrams = lemma_tokens if n > 2 else remove_apostrophes_from_tokens(lemma_tokens)
+        ngrams = generate_ngrams(tokens_for_ngrams, n)
+        counter: Counter[str] = Counter()
+
+        for ng in ngrams:
+            # Hybrid stopword + n-gram filter
+            if not predicates(ng):
+                continue
+
+            phrase = " ".join(ng)
+            counter[phrase] += 1
+
+        # Apply minimum count threshold for this n
+        threshold = min_counts.get(n, 1)
+        freq_dict = {k: v for k, v in counter.items() if v >= threshold}
+
+        if freq_dict:
+            # Proper-name mapping on phrase level:
+            # "narin güran" → "Narin Güran" (eğer map'te varsa)
+            adjusted: Dict[str, int] = {}
+
+            for phrase, count in freq_dict.items():
+                tokens = phrase.split()
+                mapped_tokens: List[str] = []
+
+                for tok in tokens:
+                    lower_key = turkish_lower2(tok)
+                    mapped = PROPER_NAME_MAP.get(lower_key)
+                    if mapped is not None:
+                        mapped_tokens.append(mapped)
+                    else:
+                        mapped_tokens.append(tok)
+
+                new_phrase = " ".join(mapped_tokens)
+                adjusted[new_phrase] = adjusted.get(new_phrase, 0) + count
+
+            # Sort and apply top_k
+            freq_dict = dict(
+                sorted(adjusted.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+            )
+            result[n] = freq_dict
+
+    return result, wc_unigrams
@@ -0,0 +1,145 @@
+# ../shared/python/tests/test_aggregate_totals.py
+# The single-pass (prefix trie) aggregate_totals_for_paths must write the
+# same index_reading_stats.yml files as the old per-prefix scan
+# (tests/legacy.py), whether it reads the sidecars or gets the stats.
+
+import random
+import shutil
+
+import pytest
+
+import legacy
+from build_manifest import BuildManifest, ManifestEntry
+from conftest import make_stats_project
+from precompute_reading_stats import (
+    STAMP_KEY,
+    aggregate_totals_for_paths,
+    build_prefix_trie,
+    load_existing_stats,
+    matching_prefixes,
+    update_aggregates,
+)
+
+AGGREGATED = ["*", "*/*", "a", "a/part0000", "missing"]
+
+
+def index_files(root):
+    """{relative path: payload without the timestamp} of every aggregate."""
+    out = {}
+    for path in sorted(root.rglob("index_reading_stats.yml")):
+        payload = load_existing_stats(path)
+        payload.pop(STAMP_KEY)
+        out[path.relative_to(root).as_posix()] = payload
+    return out
+
+
+@pytest.mark.parametrize("lang", ["tr", "en"])
+@pytest.mark.parametrize("from_memory", [False, True], ids=["sidecars", "memory"])
+def test_single_pass_matches_legacy(tmp_path, lang, from_memory):
+    old_root = tmp_path / "old"
+    old_files, stats = make_stats_project(old_root, folders=12, docs_per_folder=7, lang=lang)
+    new_root = tmp_path / "new"
+    shutil.copytree(old_root, new_root)
+    new_files = [new_root / qmd.relative_to(old_root) for qmd in old_files]
+    new_stats = {new_root / qmd.relative_to(old_root): v for qmd, v in stats.items()}
+
+    legacy.aggregate_totals_for_paths(old_root, old_files, AGGREGATED, lang, 0.2)
+    aggregate_totals_for_paths(new_root, new_files, AGGREGATED, lang, 0.2,
+                               stats=new_stats if from_memory else None)
+
+    expected = index_files(old_root)
+    assert "a/index_reading_stats.yml" in expected and len(expected) == 14
+    assert index_files(new_root) == expected
+
+
+def test_matching_prefixes_are_whole_components():
+    trie = build_prefix_trie(["a", "a/b", "ab", "c/d"])
+    assert list(matching_prefixes(trie, "a/b/x.qmd")) == ["a", "a/b"]
+    assert list(matching_prefixes(trie, "ab/x.qmd")) == ["ab"]
+    assert list(matching_prefixes(trie, "a/bc/x.qmd")) == ["a"]
+    assert list(matching_prefixes(trie, "c/x.qmd")) == []
+    assert list(matching_prefixes(trie, "a")) == ["a"]
+
+
+def random_entry(rng):
+    seconds = round(rng.uniform(0, 60), 2)
+    return ManifestEntry(size=1, mtime_ns=1, file_hash=f"{rng.getrandbits(64):016x}",
+                         config_hash="c", syllables=int(seconds * 5),
+                         words=int(seconds * 2), seconds=seconds)
+
+
+def apply_build(root, manifest, aggregated, previous, current):
+    """Record current in the manifest as finish_project does, then update_aggregates."""
+    for rel, entry in current.items():
+        manifest.put(rel, entry)
+    manifest.retain(current)
+    update_aggregates(root, aggregated, "tr", 0.2, manifest, previous, current)
+
+
+def test_update_aggregates_by_deltas_matches_from_scratch(tmp_path):
+    rng = random.Random(13)
+    root = tmp_path / "deltas"
+    rels = [f"{top}/part{i}/doc{j}.qmd" for top in "ab" for i in range(4) for j in range(5)]
+    for rel in rels:
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+    aggregated = ["a", "b", "a/*"]
+
+    manifest = BuildManifest(tmp_path / "deltas.sqlite")
+    previous = {}
+    for _ in range(30):
+        current = dict(previous)
+        for rel in rng.sample(rels, 6):  # edits, additions and deletions
+            if rel in current and rng.random() < 0.3:
+                del current[rel]
+            else:
+                current[rel] = random_entry(rng)
+        apply_build(root, manifest, aggregated, previous, current)
+        previous = current
+
+    fresh = tmp_path / "fresh"
+    shutil.copytree(root, fresh, ignore=shutil.ignore_patterns("index_reading_stats.yml"))
+    scratch = BuildManifest(tmp_path / "fresh.sqlite")
+    apply_build(fresh, scratch, aggregated, {}, current)
+
+    assert manifest.aggregates() == scratch.aggregates()
+    assert index_files(root) == index_files(fresh)
+
+
+def test_update_aggregates_sums_seconds_exactly(tmp_path):
+    (tmp_path / "a").mkdir()
+    manifest = BuildManifest(tmp_path / "m.sqlite")
+    previous = {}
+    # 0.29 * 100 and 0.57 * 100 are not whole numbers in floating point
+    for seconds in (0.29, 0.57, 0.29, 0.58):
+        current = {"a/doc.qmd": ManifestEntry(1, 1, str(seconds), "c", 1, 1, seconds),
+                   "a/other.qmd": ManifestEntry(1, 1, "x", "c", 1, 1, 0.01)}
+        apply_build(tmp_path, manifest, ["a"], previous, current)
+        previous = current
+        total = manifest.aggregates()["a"].centiseconds
+        assert type(total) is int and total == round(seconds * 100) + 1
+        reading = load_existing_stats(tmp_path / "a/index_reading_stats.yml")["reading"]
+        assert reading["seconds"] == total / 100
+
+
+def test_update_aggregates_rebuilds_when_aggregated_paths_change(tmp_path):
+    rng = random.Random(7)
+    current = {f"a/part{i}/doc.qmd": random_entry(rng) for i in range(3)}
+    for rel in current:
+        (tmp_path / rel).parent.mkdir(parents=True)
+    manifest = BuildManifest(tmp_path / "m.sqlite")
+
+    apply_build(tmp_path, manifest, ["a"], {}, current)
+    assert set(manifest.aggregates()) == {"a"}
+
+    # Same files, new prefixes: every aggregate is recomputed
+    apply_build(tmp_path, manifest, ["a", "a/*"], current, current)
+    assert set(manifest.aggregates()) == {"a", "a/part0", "a/part1", "a/part2"}
+    assert (tmp_path / "a/part2/index_reading_stats.yml").exists()
+    apply_build(tmp_path, manifest, ["a/part1"], current, current)
+    assert set(manifest.aggregates()) == {"a/part1"}
+
+    # Nothing changed, but an index file went missing: it is written again
+    (tmp_path / "a/part1/index_reading_stats.yml").unlink()
+    apply_build(tmp_path, manifest, ["a/part1"], current, current)
+    assert load_existing_stats(tmp_path / "a/part1/index_reading_stats.yml")["reading"][
+        "words"] == current["a/part1/doc.qmd"].words
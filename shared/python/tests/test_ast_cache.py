@@ -0,0 +1,98 @@
+# ../shared/python/tests/test_ast_cache.py
+
+import marshal
+import os
+import zlib
+
+from ast_cache import ASTCache, BlockMemo
+from pandoc_ast import PandocAST
+
+
+def _para(text):
+    return {"t": "Para", "c": [{"t": "Str", "c": word} for word in text.split()]}
+
+
+def document(*texts):
+    return {"meta": {}, "blocks": [_para(text) for text in texts]}
+
+
+PARAGRAPHS = ["bir iki üç", "dört beş", "altı yedi sekiz dokuz", "on"]
+
+
+def count(memo, ast, path="doc.qmd", **options):
+    doc = PandocAST(path, ast=ast, block_memo=memo, **options)
+    return doc, (doc.syllable_count, doc.word_count, doc.to_list())
+
+
+def test_one_block_edit_recounts_only_that_block(tmp_path):
+    memo = BlockMemo(tmp_path / "blocks")
+    doc, _ = count(memo, document(*PARAGRAPHS))
+    assert (doc.blocks_reused, doc.blocks_recomputed) == (0, 4)
+
+    edited = document(*PARAGRAPHS[:2], "altı yedi sekiz DOKUZ on", PARAGRAPHS[3])
+    doc, counts = count(memo, edited)
+    assert (doc.blocks_reused, doc.blocks_recomputed) == (3, 1)
+    # Same result as counting from scratch
+    assert counts == count(None, edited)[1]
+
+    doc, _ = count(memo, edited)
+    assert (doc.blocks_reused, doc.blocks_recomputed) == (4, 0)
+    assert memo.stats() == {"reused": 7, "recomputed": 5}
+
+
+def test_memo_key_covers_path_and_counting_options(tmp_path):
+    memo = BlockMemo(tmp_path / "blocks")
+    ast = document(*PARAGRAPHS)
+    count(memo, ast)
+
+    assert BlockMemo.doc_key("doc.qmd", "a") == BlockMemo.doc_key(tmp_path.cwd() / "doc.qmd", "a")
+    assert BlockMemo.doc_key("doc.qmd", "a") != BlockMemo.doc_key("doc.qmd", "b")
+    assert BlockMemo.doc_key("doc.qmd", "a") != BlockMemo.doc_key("moved.qmd", "a")
+
+    # Another document, another vowel set or focus: nothing is reused
+    for path, options in [("moved.qmd", {}), ("doc.qmd", {"vowels": "aeiou"}),
+                          ("doc.qmd", {"focus_blocks": ["word-cloud"]})]:
+        doc, counts = count(memo, ast, path, **options)
+        assert doc.blocks_reused == 0, (path, options)
+        assert counts == count(None, ast, path, **options)[1]
+
+
+def write(path, size, age):
+    """Write a valid entry of about size bytes, last used at age (ns)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(zlib.compress(marshal.dumps({"a": (1, 1, (os.urandom(size),))}), 1))
+    os.utime(path, ns=(age, age))
+
+
+def test_block_memos_count_toward_the_cache_bound(tmp_path):
+    cache = ASTCache(tmp_path, max_bytes=10_000)
+    memo = BlockMemo(tmp_path / "blocks", cache)
+    # An orphaned memo (moved document) and an old AST entry, never read again
+    write(tmp_path / "blocks" / "orphan.memo", 4000, 1_000_000_000)
+    write(tmp_path / "old.ast", 4000, 2_000_000_000)
+    write(tmp_path / "blocks" / "recent.memo", 1000, 3_000_000_000)
+
+    memo.save("new", {h: (1, 1, (os.urandom(1000).hex(),)) for h in "ab"})
+    new_size = (tmp_path / "blocks" / "new.memo").stat().st_size
+    assert 1000 < new_size < 4000
+
+    # Oldest first: the orphan goes; everything left fits the bound
+    assert not (tmp_path / "blocks" / "orphan.memo").exists()
+    assert (tmp_path / "old.ast").exists() and (tmp_path / "blocks" / "recent.memo").exists()
+
+    # A memo that is read is recent again, even if older than the AST entry
+    os.utime(tmp_path / "blocks" / "recent.memo", ns=(1_500_000_000,) * 2)
+    assert memo.load("recent")
+    write(tmp_path / "big.ast", 4000, 4_000_000_000)
+    cache._evict()
+    assert not (tmp_path / "old.ast").exists()
+    assert (tmp_path / "blocks" / "recent.memo").exists()
+    total = sum(p.stat().st_size for p in tmp_path.rglob("*") if p.is_file())
+    assert total <= 10_000
+
+
+def test_block_memo_without_cache_is_not_evicted(tmp_path):
+    memo = BlockMemo(tmp_path / "blocks")
+    write(tmp_path / "blocks" / "orphan.memo", 100_000, 1_000_000_000)
+    memo.save("new", {"a": (1, 1, ("söz",))})
+    assert (tmp_path / "blocks" / "orphan.memo").exists()
@@ -0,0 +1,119 @@
+# ../shared/python/tests/test_ast_walker.py
+# The iterative ast_walker traversal must count exactly what the old
+# recursive PandocAST counters did (tests/legacy.py).
+
+import json
+import subprocess
+
+import pytest
+
+import legacy
+from ast_walker import ASTWalker
+from conftest import FIXTURES, requires_pandoc
+from pandoc_ast import PANDOC_READER_FORMAT, PandocAST
+
+FOCUS_CONFIGS = [
+    pytest.param({}, id="no-focus"),
+    pytest.param({"focus_blocks": ["word-cloud"]}, id="focus"),
+    pytest.param({"focus_blocks": ["word-cloud"], "require_focus": True}, id="require-focus"),
+    pytest.param({"focus_blocks": ["giris", "callout-note"]}, id="focus-id-and-class"),
+]
+
+
+def pandoc_json(path):
+    out = subprocess.run(
+        ["pandoc", str(path), "-f", PANDOC_READER_FORMAT, "-t", "json"],
+        check=True, capture_output=True,
+    ).stdout
+    return json.loads(out)
+
+
+def assert_same_as_legacy(ast, **config):
+    """Counts and recorded tokens equal the legacy traversal's (scalar token rules)."""
+    new = PandocAST("doc.qmd", ast=ast, syllable_engine="scalar", **config)
+    old = PandocAST("doc.qmd", ast={"meta": {}, "blocks": []}, syllable_engine="scalar")
+    assert (new.syllable_count, new.word_count) == legacy.count_document(
+        ast, old._count_token, **config
+    )
+    assert new.to_list() == old.to_list()
+
+
+@requires_pandoc
+@pytest.mark.parametrize("config", FOCUS_CONFIGS)
+@pytest.mark.parametrize(
+    "name", ["counting_rules.qmd", "focus_blocks.qmd", "no_focus.qmd"]
+)
+def test_walker_counts_match_legacy(name, config):
+    assert_same_as_legacy(pandoc_json(FIXTURES / name), **config)
+
+
+def _para(text):
+    return {"t": "Para", "c": [{"t": "Str", "c": text}]}
+
+
+def test_deep_nesting_does_not_recurse():
+    """The legacy counters hit RecursionError here; the walker must not."""
+    depth = 5000
+    node = _para("derin metin")
+    for i in range(depth):
+        node = {"t": "Div", "c": [["", ["word-cloud"] if i == depth - 1 else [], []], [node]]}
+    ast = {"meta": {}, "blocks": [node, _para("son söz")]}
+
+    plain = PandocAST("deep.qmd", ast=ast)
+    assert plain.to_list() == ["derin", "metin", "son", "söz"]
+
+    focused = PandocAST("deep.qmd", ast=ast, focus_blocks=["word-cloud"])
+    assert focused.to_list() == ["derin", "metin"]
+
+
+def test_walker_visits_in_document_order():
+    ast = {
+        "meta": {},
+        "blocks": [
+            {"t": "Header", "c": [1, ["h", [], []], [{"t": "Str", "c": "bir"}]]},
+            {"t": "BulletList", "c": [[_para("iki")], [_para("üç"), {"t": "BlockQuote", "c": [_para("dört")]}]]},
+            {"t": "OrderedList", "c": [[1, {"t": "Decimal"}, {"t": "Period"}], [[_para("beş")]]]},
+            {"t": "CodeBlock", "c": [["", [], []], "kod"]},
+            {"t": "Para", "c": [
+                {"t": "Emph", "c": [{"t": "Str", "c": "altı"}]},
+                {"t": "Code", "c": [["", [], []], "kod"]},
+                {"t": "Link", "c": [["", [], []], [{"t": "Str", "c": "yedi"}], ["u", ""]]},
+            ]},
+        ],
+    }
+    walker = ASTWalker()
+    strs = walker.collect("Str")
+    walker.walk(ast["blocks"])
+
+    expected = ["bir", "iki", "üç", "dört", "beş", "altı", "yedi"]
+    assert [node["c"] for node in strs] == expected
+    legacy_order = []
+    legacy.count_document(ast, lambda tok: legacy_order.append(tok) or (0, 0))
+    assert legacy_order == expected
+    assert_same_as_legacy(ast)
+
+
+def test_walk_paths_agree():
+    """Collect-only, sinks-only and visitor walks see the same nodes in order."""
+    blocks = [
+        {"t": "BulletList", "c": [[_para("bir")], [], [{"t": "Para", "c": [
+            {"t": "Emph", "c": [{"t": "Str", "c": "iki"}, {"t": "Emph", "c": [{"t": "Str", "c": "üç"}]}]},
+        ]}]]},
+        {"t": "OrderedList", "c": [[1, {"t": "Decimal"}, {"t": "Period"}], [[], [_para("dört")]]]},
+    ]
+
+    def walk(*types, visit=False):
+        walker = ASTWalker()
+        sinks = [walker.collect(t) for t in types]
+        seen = []
+        if visit:
+            walker.register("Para", lambda node: seen.append(node["t"]))
+        walker.walk(blocks)
+        return [[n["c"] if n["t"] == "Str" else n["t"] for n in sink] for sink in sinks]
+
+    strs = ["bir", "iki", "üç", "dört"]
+    assert walk("Str") == [strs]
+    # A collected type with children of its own is still descended into
+    assert walk("Emph") == [["Emph", "Emph"]]
+    assert walk("Str", "Emph") == [strs, ["Emph", "Emph"]]
+    assert walk("Str", "Emph", visit=True) == [strs, ["Emph", "Emph"]]
@@ -0,0 +1,85 @@
+# ../shared/python/tests/test_build_manifest.py
+
+import sqlite3
+
+from build_manifest import (
+    MANIFEST_NAME,
+    AggregateEntry,
+    BuildManifest,
+    FileCost,
+    ManifestEntry,
+)
+
+
+def entry(file_hash):
+    return ManifestEntry(10, 20, file_hash, "config", 3, 2, 0.6)
+
+
+def test_rows_survive_reopening(tmp_path):
+    with BuildManifest(tmp_path / "m.sqlite") as manifest:
+        manifest.put("a/x.qmd", entry("h1"))
+        manifest.put_cost("a/x.qmd", FileCost(1.0, 2.0, 3.0, 4.0))
+        manifest.put_aggregate("a", AggregateEntry(3, 2, 60, "agg"))
+        manifest.set_dependencies("a/x.qmd", ["include:a/_p.qmd", "config:ngram"])
+        manifest.put_dep_node("include:a/_p.qmd", "1:2", "hash")
+        manifest.set_info("key", "value")
+
+    with BuildManifest(tmp_path / "m.sqlite") as manifest:
+        assert manifest.entries() == {"a/x.qmd": entry("h1")}
+        assert manifest.get("a/x.qmd") == entry("h1") and manifest.get("b.qmd") is None
+        assert manifest.costs()["a/x.qmd"].total_ms == 10.0
+        assert manifest.aggregates() == {"a": AggregateEntry(3, 2, 60, "agg")}
+        assert manifest.dependencies("a/x.qmd") == ["config:ngram", "include:a/_p.qmd"]
+        assert manifest.dep_nodes() == {"include:a/_p.qmd": ("1:2", "hash")}
+        assert manifest.get_info("key") == "value"
+
+
+def test_unsaved_writes_are_dropped(tmp_path):
+    manifest = BuildManifest(tmp_path / "m.sqlite")
+    manifest.put("a.qmd", entry("h"))
+    manifest._conn.close()
+    assert BuildManifest(tmp_path / "m.sqlite").entries() == {}
+
+
+def test_other_schema_version_is_recreated(tmp_path):
+    with BuildManifest(tmp_path / "m.sqlite") as manifest:
+        manifest.put("a.qmd", entry("h"))
+    conn = sqlite3.connect(str(tmp_path / "m.sqlite"))
+    conn.execute("UPDATE info SET value = '0' WHERE key = 'schema'")
+    conn.commit()
+    conn.close()
+    assert BuildManifest(tmp_path / "m.sqlite").entries() == {}
+
+
+def test_for_project_opens_quarto_manifest(tmp_path):
+    manifest = BuildManifest.for_project(tmp_path / "site")
+    assert manifest.path == tmp_path / "site" / ".quarto" / MANIFEST_NAME
+    manifest.close()
+    (tmp_path / "file").write_text("")
+    assert BuildManifest.for_project(tmp_path / "file") is None
+
+
+def test_child_hashes_are_whole_components(tmp_path):
+    manifest = BuildManifest(tmp_path / "m.sqlite")
+    for rel in ["a/b", "a/b/x.qmd", "a/b/c/y.qmd", "a/bc/z.qmd", "a/b0.qmd", "a/b-c.qmd", "a.qmd"]:
+        manifest.put(rel, entry(rel))
+    assert sorted(manifest.child_hashes("a/b")) == [
+        ("a/b", "a/b"), ("a/b/c/y.qmd", "a/b/c/y.qmd"), ("a/b/x.qmd", "a/b/x.qmd"),
+    ]
+
+
+def test_retain_drops_files_and_unused_nodes(tmp_path):
+    manifest = BuildManifest(tmp_path / "m.sqlite")
+    for rel in ["keep.qmd", "gone.qmd"]:
+        manifest.put(rel, entry(rel))
+        manifest.put_cost(rel, FileCost(1, 1, 1, 1))
+    manifest.set_dependencies("keep.qmd", ["metadata:_metadata.yml"])
+    manifest.set_dependencies("gone.qmd", ["metadata:_metadata.yml", "include:_gone.qmd"])
+    for node in ["metadata:_metadata.yml", "include:_gone.qmd"]:
+        manifest.put_dep_node(node, "-", "")
+    assert manifest.dependents(["metadata:_metadata.yml"]) == {"keep.qmd", "gone.qmd"}
+
+    manifest.retain(["keep.qmd"])
+    assert set(manifest.entries()) == set(manifest.costs()) == {"keep.qmd"}
+    assert manifest.dependents(["metadata:_metadata.yml", "include:_gone.qmd"]) == {"keep.qmd"}
+    assert set(manifest.dep_nodes()) == {"metadata:_metadata.yml"}
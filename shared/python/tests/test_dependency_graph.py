@@ -0,0 +1,231 @@
+# ../shared/python/tests/test_dependency_graph.py
+
+import json
+import os
+
+import pytest
+
+from conftest import make_site, requires_pandoc, write_page
+from dependency_graph import (
+    MISSING,
+    changed_nodes,
+    expand_includes,
+    file_dependencies,
+    inherited_metadata,
+    node_hash,
+    node_signature,
+)
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_expand_includes_recursive_with_cycles_and_missing(tmp_path):
+    page = tmp_path / "trial" / "page.qmd"
+    write(page, 'A\n{{< include _a.qmd >}}\n{{< include "/shared/_b.qmd" >}}\n'
+                "{{< include _missing.qmd >}}\nZ\n")
+    write(tmp_path / "trial" / "_a.qmd", "a\n{{< include _a.qmd >}}\n{{< include '_c.qmd' >}}\n")
+    write(tmp_path / "trial" / "_c.qmd", "c\n{{< include page.qmd >}}\n\n")
+    write(tmp_path / "shared" / "_b.qmd", "b\n")
+
+    source, included = expand_includes(page, tmp_path)
+
+    # Cycles and missing targets are left as written
+    assert source.decode("utf-8") == (
+        "A\na\n{{< include _a.qmd >}}\nc\n{{< include page.qmd >}}\n"
+        "b\n{{< include _missing.qmd >}}\nZ\n"
+    )
+    trial = tmp_path / "trial"
+    assert included == [trial / "_a.qmd", trial / "_c.qmd", trial / "page.qmd",
+                        tmp_path / "shared" / "_b.qmd", trial / "_missing.qmd"]
+
+    # Without includes, the file comes back byte for byte
+    assert expand_includes(tmp_path / "shared" / "_b.qmd", tmp_path) == (b"b\n", [])
+
+
+def test_file_dependencies_list_every_metadata_level(tmp_path):
+    qmd = tmp_path / "trial" / "witness" / "page.qmd"
+    deps = file_dependencies(tmp_path, qmd, [tmp_path / "trial" / "_a.qmd"], ["ngram"])
+    assert deps == [
+        "config:ngram",
+        "include:trial/_a.qmd",
+        "metadata:_metadata.yml",
+        "metadata:trial/_metadata.yml",
+        "metadata:trial/witness/_metadata.yml",
+    ]
+
+
+def test_inherited_metadata_nearest_wins(tmp_path):
+    qmd = tmp_path / "blog" / "posts" / "x" / "index.qmd"
+    write(tmp_path / "_metadata.yml", "word-cloud: true\ntitle-prefix: Site\n")
+    assert inherited_metadata(tmp_path, qmd) == {"word-cloud": True}
+    write(tmp_path / "blog" / "posts" / "_metadata.yml", "word-cloud: false\n")
+    assert inherited_metadata(tmp_path, qmd) == {"word-cloud": False}
+    # An unreadable _metadata.yml sets nothing
+    write(tmp_path / "blog" / "posts" / "x" / "_metadata.yml", "word-cloud: [true\n")
+    assert inherited_metadata(tmp_path, qmd) == {"word-cloud": False}
+    assert inherited_metadata(tmp_path, tmp_path.parent / "elsewhere.qmd") == {}
+
+
+def test_changed_nodes_hash_only_changed_signatures(tmp_path):
+    write(tmp_path / "_p.qmd", "partial\n")
+    write(tmp_path / "_metadata.yml", "word-cloud: true\n")
+    config = {"sig": "1", "hash": "h1"}
+    configs = {"ngram": (lambda: config["sig"], lambda: config["hash"])}
+    nodes = ["include:_p.qmd", "include:_new.qmd", "metadata:_metadata.yml", "config:ngram"]
+
+    def record():
+        return {node: (node_signature(tmp_path, node, configs),
+                       node_hash(tmp_path, node, configs)) for node in nodes}
+
+    stored = record()
+    assert stored["include:_new.qmd"][0] == MISSING
+    assert changed_nodes(tmp_path, stored, configs) == []
+
+    # Touched files, keys the stats do not use, a config with the same
+    # hash: new signatures but no change
+    os.utime(tmp_path / "_p.qmd", ns=(1, 1))
+    write(tmp_path / "_metadata.yml", "word-cloud: true\ntitle-prefix: Site\n")
+    config["sig"] = "2"
+    refreshed = {}
+    assert changed_nodes(tmp_path, stored, configs,
+                         lambda node, sig, h: refreshed.update({node: (sig, h)})) == []
+    assert refreshed == {node: value for node, value in record().items()
+                         if node != "include:_new.qmd"}
+
+    write(tmp_path / "_p.qmd", "edited\n")
+    write(tmp_path / "_new.qmd", "created\n")
+    write(tmp_path / "_metadata.yml", "word-cloud: false\n")
+    config.update(sig="3", hash="h2")
+    assert changed_nodes(tmp_path, {**stored, **refreshed}, configs) == sorted(nodes)
+
+    stored = record()
+    (tmp_path / "_p.qmd").unlink()
+    (tmp_path / "_metadata.yml").unlink()
+    assert changed_nodes(tmp_path, stored, configs) == ["include:_p.qmd", "metadata:_metadata.yml"]
+
+
+# End to end: which pages a change rebuilds
+
+PAGES = {
+    "trial/judgment.qmd": "Karar metni.\n\n{{< include _ortak.qmd >}}",
+    "trial/testimonies/witness/ayse.qmd": "Tanık anlattı.\n\n{{< include /trial/_ortak.qmd >}}",
+    "trial/testimonies/witness/mehmet.qmd": "Tanık sustu.\n\n{{< include /_partials/yeni.qmd >}}",
+    "trial/testimonies/suspect/ali/testimony.qmd": "Şüpheli konuştu.",
+    "blog/posts/2024/ilk/index.qmd": "Blog yazısı.",
+}
+
+WITNESSES = {"trial/testimonies/witness/ayse.qmd", "trial/testimonies/witness/mehmet.qmd"}
+TESTIMONIES = WITNESSES | {"trial/testimonies/suspect/ali/testimony.qmd"}
+
+
+@pytest.fixture
+def rebuilds(tmp_path, monkeypatch):
+    """Build the PAGES site; calling the result rebuilds it and returns the rebuilt pages."""
+    import precompute_reading_stats
+
+    root = make_site(tmp_path / "site", PAGES)
+    write(root / "trial" / "_ortak.qmd", "Ortak bölüm.\n")
+    monkeypatch.setenv("QUARTO_PROJECT_DIR", str(root))
+
+    processed = []
+    real = precompute_reading_stats.process_qmd
+    monkeypatch.setattr(precompute_reading_stats, "process_qmd",
+                        lambda qmd, *args, **kwargs: processed.append(qmd)
+                        or real(qmd, *args, **kwargs))
+
+    def run():
+        processed.clear()
+        count = precompute_reading_stats.run_project(root, 1)
+        assert count == len(processed)
+        return {qmd.relative_to(root).as_posix() for qmd in processed}
+
+    assert run() == set(PAGES)
+    run.root = root
+    return run
+
+
+@requires_pandoc
+def test_include_changes_rebuild_exactly_their_dependents(rebuilds):
+    root = rebuilds.root
+    ortak = root / "trial" / "_ortak.qmd"
+    os.utime(ortak, ns=(1, 1))
+    assert rebuilds() == set()
+
+    write(ortak, "Ortak bölüm değişti.\n")
+    assert rebuilds() == {"trial/judgment.qmd", "trial/testimonies/witness/ayse.qmd"}
+    write(root / "_partials" / "yeni.qmd", "Yeni bölüm.\n")
+    assert rebuilds() == {"trial/testimonies/witness/mehmet.qmd"}
+    ortak.unlink()
+    assert rebuilds() == {"trial/judgment.qmd", "trial/testimonies/witness/ayse.qmd"}
+    assert rebuilds() == set()
+
+
+@requires_pandoc
+def test_metadata_changes_rebuild_exactly_their_dependents(rebuilds):
+    metadata = rebuilds.root / "trial" / "testimonies" / "_metadata.yml"
+    write(metadata, "word-cloud: true\n")
+    assert rebuilds() == TESTIMONIES
+    assert (rebuilds.root / "trial/testimonies/witness/ayse_words.json").exists()
+
+    # Keys the reading stats do not use change nothing
+    write(metadata, "word-cloud: true\ntitle-prefix: İfade\n")
+    assert rebuilds() == set()
+    write(rebuilds.root / "trial" / "testimonies" / "witness" / "_metadata.yml",
+          "word-cloud: false\n")
+    assert rebuilds() == WITNESSES
+    # Dependents of the node, even where a nearer _metadata.yml decides
+    metadata.unlink()
+    assert rebuilds() == TESTIMONIES
+
+
+@requires_pandoc
+def test_ngram_config_change_rebuilds_word_cloud_pages(rebuilds, monkeypatch):
+    import precompute_reading_stats
+
+    write(rebuilds.root / "trial" / "testimonies" / "_metadata.yml", "word-cloud: true\n")
+    assert rebuilds() == TESTIMONIES
+
+    _, config_hash = precompute_reading_stats.CONFIG_NODES["ngram"]
+    monkeypatch.setitem(precompute_reading_stats.CONFIG_NODES, "ngram",
+                        (lambda: "edited", config_hash))
+    assert rebuilds() == set()
+    monkeypatch.setitem(precompute_reading_stats.CONFIG_NODES, "ngram",
+                        (lambda: "edited again", lambda: "new stopwords"))
+    assert rebuilds() == TESTIMONIES
+
+
+@requires_pandoc
+def test_included_partial_is_counted_and_word_cloud_inherited(tmp_path, monkeypatch):
+    from pandoc_ast import PandocAST
+    from precompute_reading_stats import load_existing_stats, run_project
+
+    root = make_site(tmp_path / "site", {
+        "test/pages/parcali.qmd": "Bir iki üç.\n\n{{< include /_partials/parca.qmd >}}",
+        "test/pages/tek.qmd": "Bir iki üç.\n\nDört beş altı yedi.",
+    })
+    write(root / "_partials" / "parca.qmd", "Dört beş altı yedi.\n")
+    write(root / "test" / "_metadata.yml", "word-cloud: true\n")
+    write_page(root / "test" / "pages" / "kapali.qmd", "Bulut yok.",
+               front_matter="title: Sayfa\nword-cloud: false")
+    monkeypatch.setenv("QUARTO_PROJECT_DIR", str(root))
+    assert run_project(root, 1) == 3
+
+    pages = root / "test" / "pages"
+    # The partial's words are counted, not the shortcode's
+    split = load_existing_stats(pages / "parcali_reading_stats.yml")["reading"]
+    whole = load_existing_stats(pages / "tek_reading_stats.yml")["reading"]
+    assert split["words"] == whole["words"] == 7
+    assert split["syllables"] == whole["syllables"]
+
+    # The directory's word-cloud applies unless the front matter says otherwise
+    inherited = inherited_metadata(root, pages / "tek.qmd")
+    assert inherited == {"word-cloud": True}
+    assert PandocAST(pages / "tek.qmd", inherited_meta=inherited).word_cloud
+    assert not PandocAST(pages / "tek.qmd").word_cloud
+    assert not PandocAST(pages / "kapali.qmd", inherited_meta=inherited).word_cloud
+    words = json.loads((pages / "parcali_words.json").read_text(encoding="utf-8"))
+    assert "dört" in json.dumps(words, ensure_ascii=False)
+    assert not (pages / "kapali_words.json").exists()
@@ -0,0 +1,91 @@
+# ../shared/python/tests/test_file_utils.py
+
+import os
+import stat
+
+import pytest
+
+import file_utils
+from file_utils import write_atomic, write_if_changed
+from precompute_reading_stats import STAMP_KEY, load_existing_stats, write_stats_payload
+
+OLD = 1_000_000_000  # mtime_ns well in the past
+
+
+def snapshot(path):
+    st = path.stat()
+    return st.st_ino, st.st_mtime_ns, stat.S_IMODE(st.st_mode)
+
+
+def payload(words, stamp):
+    return {"hash": "abc", STAMP_KEY: stamp, "language": "tr", "type": "stat",
+            "reading": {"words": words, "text": "~ 1 dk"}}
+
+
+def test_unchanged_payload_keeps_file_and_timestamp(tmp_path):
+    yml = tmp_path / "page_reading_stats.yml"
+    assert write_stats_payload(yml, payload(10, "2024-01-01T00:00:00+00:00"))
+    os.utime(yml, ns=(OLD, OLD))
+    before = snapshot(yml)
+
+    assert not write_stats_payload(yml, payload(10, "2026-10-17T12:00:00+00:00"))
+    assert snapshot(yml) == before
+    assert load_existing_stats(yml)[STAMP_KEY] == "2024-01-01T00:00:00+00:00"
+
+
+def test_changed_payload_is_replaced_keeping_mode(tmp_path):
+    yml = tmp_path / "page_reading_stats.yml"
+    write_stats_payload(yml, payload(10, "2024-01-01T00:00:00+00:00"))
+    os.chmod(yml, 0o640)
+    os.utime(yml, ns=(OLD, OLD))
+    ino, mtime, _ = snapshot(yml)
+
+    assert write_stats_payload(yml, payload(11, "2026-10-17T12:00:00+00:00"))
+    new_ino, new_mtime, mode = snapshot(yml)
+    # Renamed over the old file, not rewritten in place
+    assert new_ino != ino and new_mtime != mtime and mode == 0o640
+    assert load_existing_stats(yml) == payload(11, "2026-10-17T12:00:00+00:00")
+    assert os.listdir(tmp_path) == [yml.name]
+
+
+def test_unreadable_stats_file_is_replaced(tmp_path):
+    yml = tmp_path / "page_reading_stats.yml"
+    yml.write_text("reading: [\n", encoding="utf-8")
+    assert write_stats_payload(yml, payload(10, "now"))
+    assert load_existing_stats(yml) == payload(10, "now")
+
+
+def test_write_if_changed_compares_bytes(tmp_path):
+    path = tmp_path / "words.json"
+    assert write_if_changed(path, "ağaç\n")
+    os.utime(path, ns=(OLD, OLD))
+    before = snapshot(path)
+
+    assert not write_if_changed(path, "ağaç\n".encode("utf-8"))
+    assert snapshot(path) == before
+    assert write_if_changed(path, "ağaçlar\n")
+    assert path.read_text(encoding="utf-8") == "ağaçlar\n"
+    assert os.listdir(tmp_path) == [path.name]
+
+
+def test_new_file_gets_umask_mode(tmp_path):
+    umask = os.umask(0o027)
+    try:
+        write_atomic(tmp_path / "new.yml", "x")
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE((tmp_path / "new.yml").stat().st_mode) == 0o640
+
+
+def test_failed_write_leaves_old_file_and_no_temp(tmp_path, monkeypatch):
+    path = tmp_path / "page_reading_stats.yml"
+    path.write_text("old\n", encoding="utf-8")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(file_utils.os, "replace", fail)
+    with pytest.raises(OSError):
+        write_atomic(path, "new\n")
+    assert path.read_text(encoding="utf-8") == "old\n"
+    assert os.listdir(tmp_path) == [path.name]
@@ -0,0 +1,195 @@
+# ../shared/python/tests/test_incremental_build.py
+# Incremental builds of a small project (conftest.make_site) must leave
+# the same outputs as a build from scratch, and touch no more than they
+# have to.
+
+import os
+import shutil
+
+import pytest
+
+from conftest import SITE_PAGES, make_site, requires_pandoc, write_page
+from precompute_reading_stats import (
+    GLOB_NOT_PATTERNS,
+    GLOB_PATTERNS,
+    RENDER_ALL_ENV_VAR,
+    RENDER_FILES_ENV_VARS,
+    STAMP_KEY,
+    load_existing_stats,
+    render_scope,
+    resolve_qmd_files,
+    run_project,
+    select_qmd_files,
+)
+
+
+def build(root, scope=None):
+    return run_project(root, 1, scope)
+
+
+def outputs(root):
+    """{relative path: payload without the timestamp} of every stats file."""
+    out = {}
+    for path in sorted(root.rglob("*_reading_stats.yml")):
+        payload = load_existing_stats(path)
+        payload.pop(STAMP_KEY)
+        out[path.relative_to(root).as_posix()] = payload
+    return out
+
+
+def from_scratch(root, tmp_path):
+    """outputs() of a build from scratch of a copy of root's sources."""
+    fresh = tmp_path / "fresh"
+    shutil.copytree(root, fresh, ignore=shutil.ignore_patterns(
+        ".quarto", "*_reading_stats.yml", "*_words.json"))
+    build(fresh)
+    return outputs(fresh)
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    root = make_site(tmp_path / "site")
+    monkeypatch.setenv("QUARTO_PROJECT_DIR", str(root))
+    assert build(root) == 8
+    return root
+
+
+@requires_pandoc
+def test_delete_matches_full_rebuild(site, tmp_path):
+    (site / "trial/testimonies/witness/mehmet.qmd").unlink()
+    # The only page below trial/testimonies/suspect
+    (site / "trial/testimonies/suspect/ali/testimony.qmd").unlink()
+    assert build(site) == 0
+
+    expected = from_scratch(site, tmp_path)
+    assert "trial/testimonies/suspect/index_reading_stats.yml" not in expected
+    # Sidecars of deleted pages are left alone, like any file Quarto did not write
+    assert {rel: payload for rel, payload in outputs(site).items()
+            if not rel.startswith(("trial/testimonies/witness/mehmet_",
+                                   "trial/testimonies/suspect/ali/"))} == expected
+
+
+def identities(root):
+    """{relative path: (inode, mtime_ns)} of every stats file (write_atomic makes a new inode)."""
+    return {
+        path.relative_to(root).as_posix(): (path.stat().st_ino, path.stat().st_mtime_ns)
+        for path in root.rglob("*_reading_stats.yml")
+    }
+
+
+@requires_pandoc
+def test_touch_does_not_rebuild(site, monkeypatch):
+    import precompute_reading_stats
+    from build_manifest import BuildManifest
+
+    before = identities(site)
+    qmd = site / "trial/judgment.qmd"
+    os.utime(qmd, ns=(1_000_000_000, 1_000_000_000))
+    assert build(site) == 0
+    assert identities(site) == before
+    with BuildManifest.for_project(site) as manifest:
+        assert manifest.get("trial/judgment.qmd").mtime_ns == 1_000_000_000
+
+    # The refreshed signature spares the next build from reading the file
+    hashed = []
+    real = precompute_reading_stats.compute_file_hash
+    monkeypatch.setattr(precompute_reading_stats, "compute_file_hash",
+                        lambda path, *args: hashed.append(path) or real(path, *args))
+    assert build(site) == 0
+    assert hashed == []
+
+
+@requires_pandoc
+def test_edit_rewrites_only_its_ancestor_aggregates(site, tmp_path, monkeypatch):
+    import precompute_reading_stats
+
+    written = []
+    real = precompute_reading_stats.write_aggregate
+    monkeypatch.setattr(precompute_reading_stats, "write_aggregate",
+                        lambda root, prefix, *args: written.append(prefix)
+                        or real(root, prefix, *args))
+    before = identities(site)
+    write_page(site / "trial/testimonies/witness/ayse.qmd", "Tanık fikrini değiştirdi.")
+    assert build(site) == 1
+
+    assert written == ["trial", "trial/testimonies", "trial/testimonies/witness"]
+
+    after = identities(site)
+    assert {rel for rel in after if after[rel] != before.get(rel)} == {
+        "trial/testimonies/witness/ayse_reading_stats.yml",
+        "trial/testimonies/witness/index_reading_stats.yml",
+        "trial/testimonies/index_reading_stats.yml",
+        "trial/index_reading_stats.yml",
+    }
+    assert outputs(site) == from_scratch(site, tmp_path)
+
+
+def reading(root, rel):
+    return load_existing_stats(root / rel)["reading"]
+
+
+@requires_pandoc
+def test_partial_render_keeps_out_of_scope_rows(site, tmp_path):
+    from build_manifest import BuildManifest
+
+    write_page(site / "trial/judgment.qmd", "Karar bozuldu, dava yeniden görülecek.")
+    write_page(site / "trial/testimonies/witness/ayse.qmd", "Tanık fikrini değiştirdi.")
+    assert build(site, scope=["trial/judgment.qmd"]) == 1
+
+    with BuildManifest.for_project(site) as manifest:
+        assert len(manifest.entries()) == 8
+    # The aggregates add the new judgment to ayse.qmd's last known stats
+    trial = reading(site, "trial/index_reading_stats.yml")
+    pages = [rel for rel in SITE_PAGES if rel.startswith("trial/")]
+    sidecars = [reading(site, rel.replace(".qmd", "_reading_stats.yml")) for rel in pages]
+    assert trial["words"] == sum(r["words"] for r in sidecars)
+    assert trial["syllables"] == sum(r["syllables"] for r in sidecars)
+
+    # The next full build picks up the edit made outside the scope
+    assert build(site) == 1
+    assert outputs(site) == from_scratch(site, tmp_path)
+
+
+@requires_pandoc
+def test_partial_render_without_manifest_sweeps_the_project(tmp_path, monkeypatch):
+    root = make_site(tmp_path / "site")
+    monkeypatch.setenv("QUARTO_PROJECT_DIR", str(root))
+    assert build(root, scope=["trial/judgment.qmd"]) == 8
+
+
+def test_render_scope_reads_quarto_environment(tmp_path, monkeypatch):
+    for var in (RENDER_ALL_ENV_VAR, *RENDER_FILES_ENV_VARS):
+        monkeypatch.delenv(var, raising=False)
+    root = tmp_path / "site"
+    assert render_scope(root) is None
+
+    monkeypatch.setenv("QUARTO_PROJECT_RENDER_FILES", "blog/posts/2024/ilk/index.qmd\n")
+    assert render_scope(root) == ["blog/posts/2024/ilk/index.qmd"]
+
+    # INPUT_FILES wins; absolute paths are made relative, outside ones dropped
+    monkeypatch.setenv("QUARTO_PROJECT_INPUT_FILES", "\n".join([
+        str(root / "trial" / "judgment.qmd"), " test/pages/sayfa.qmd ", "",
+        str(tmp_path / "other" / "page.qmd"),
+    ]))
+    assert render_scope(root) == ["trial/judgment.qmd", "test/pages/sayfa.qmd"]
+
+    monkeypatch.setenv(RENDER_ALL_ENV_VAR, "1")
+    assert render_scope(root) is None
+
+
+def test_select_qmd_files_matches_the_globs(tmp_path):
+    root = make_site(tmp_path / "site")
+    for rel in ["trial/testimonies/witness/index.qmd",    # excluded
+                "trial/defenses/ali/index.qmd",           # excluded
+                "test/pages/ref-test.qmd",                # excluded
+                "trial/testimonies/witness/eski/not.qmd", # "*" stops at "/"
+                "trial/other.qmd", "blog/posts/2024/index.qmd"]:
+        write_page(root / rel, "Sayılmayan sayfa.")
+    rels = sorted(p.relative_to(root).as_posix() for p in root.rglob("*.qmd"))
+
+    selected = select_qmd_files(root, rels + ["trial/silinmis.qmd"],
+                                GLOB_PATTERNS, GLOB_NOT_PATTERNS)
+    assert selected == resolve_qmd_files(root, GLOB_PATTERNS, GLOB_NOT_PATTERNS)
+    assert [p.relative_to(root).as_posix() for p in selected] == sorted(SITE_PAGES)
+    assert select_qmd_files(root, ["trial/judgment.qmd"], GLOB_PATTERNS,
+                            GLOB_NOT_PATTERNS) == [root / "trial/judgment.qmd"]
@@ -0,0 +1,66 @@
+# ../shared/python/tests/test_lean_reader.py
+# PandocAST(reader="lean") must count exactly what the JSON path counts:
+# writer_reading_tokens.lua duplicates the counting rules.
+
+import pytest
+
+from conftest import FIXTURES, requires_pandoc
+from pandoc_ast import PandocAST
+
+pytestmark = requires_pandoc
+
+FOCUS_CONFIGS = [
+    pytest.param({}, id="no-focus"),
+    pytest.param({"focus_blocks": ["word-cloud"]}, id="focus"),
+    pytest.param({"focus_blocks": ["word-cloud"], "require_focus": True}, id="require-focus"),
+    pytest.param({"focus_blocks": ["giris", "callout-note"]}, id="focus-id-and-class"),
+]
+
+
+def both_readers(name, **kwargs):
+    path = FIXTURES / name
+    return (
+        PandocAST(path, reader="json", **kwargs),
+        PandocAST(path, reader="lean", **kwargs),
+    )
+
+
+@pytest.mark.parametrize("config", FOCUS_CONFIGS)
+@pytest.mark.parametrize(
+    "name", ["counting_rules.qmd", "focus_blocks.qmd", "no_focus.qmd"]
+)
+def test_lean_counts_match_json(name, config):
+    json_ast, lean_ast = both_readers(name, **config)
+
+    assert lean_ast.syllable_count == json_ast.syllable_count
+    assert lean_ast.word_count == json_ast.word_count
+    assert lean_ast.reading_time == json_ast.reading_time
+    assert lean_ast.to_list() == json_ast.to_list()
+    assert lean_ast.to_list(punct=False, lower=True) == json_ast.to_list(punct=False, lower=True)
+
+
+@pytest.mark.parametrize(
+    "name", ["counting_rules.qmd", "focus_blocks.qmd", "no_focus.qmd"]
+)
+def test_lean_meta_matches_json(name):
+    json_ast, lean_ast = both_readers(name)
+
+    assert lean_ast.ast["meta"].get("word-cloud") == json_ast.ast["meta"].get("word-cloud")
+    assert lean_ast.word_cloud == json_ast.word_cloud
+
+
+def test_fixtures_exercise_the_rules():
+    """Guard against fixtures that no longer contain what they should test."""
+    counted = " ".join(PandocAST(FIXTURES / "counting_rules.qmd").to_list())
+
+    assert "Narin" in counted and "Duruşma" in counted and "Açıklama" in counted
+    assert "başlığı" in counted and "yayılan" in counted and "Alıntı" in counted
+    for skipped in ("Yazar", "Blok", "print", "çiğ", "video", "Gezinti", "Dış", "tablo", "hücre"):
+        assert skipped not in counted
+
+    focused = PandocAST(FIXTURES / "focus_blocks.qmd", focus_blocks=["word-cloud"])
+    assert "Birinci" in focused.to_list() and "İç" in focused.to_list()
+    assert "giriş" not in focused.to_list()
+
+    empty = PandocAST(FIXTURES / "no_focus.qmd", focus_blocks=["word-cloud"], require_focus=True)
+    assert empty.word_count == 0
@@ -0,0 +1,88 @@
+# ../shared/python/tests/test_progress.py
+
+import concurrent.futures
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+import precompute_reading_stats as prs
+from build_manifest import FileCost
+
+
+class InlineExecutor:
+    """ProcessPoolExecutor stand-in: runs each batch when submitted."""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@pytest.fixture
+def rebuild(monkeypatch):
+    """run_project_rebuilds() on fake files: every file takes `actual_ms`."""
+    state = {"actual_ms": 4000.0}
+
+    def process_batch(batch, lang, seconds_per_syllable, root):
+        costs = {qmd: FileCost(state["actual_ms"], 0.0, 0.0, 0.0) for qmd, _ in batch}
+        return Counter(), {}, costs
+
+    monkeypatch.setattr(prs, "process_batch", process_batch)
+    # A pool even for these few files, on any machine
+    monkeypatch.setattr(prs, "POOL_MIN_FILES_PER_WORKER", 1)
+    monkeypatch.setattr(prs, "available_cpus", lambda: 8)
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", InlineExecutor)
+    monkeypatch.setattr(prs.sys.stdout, "isatty", lambda: False, raising=False)
+
+    def run(expected_ms, jobs, guessed):
+        pending = [(Path(f"{i}.qmd"), f"h{i}") for i in range(len(expected_ms))]
+        expected = dict(zip((qmd for qmd, _ in pending), expected_ms))
+        return prs.run_project_rebuilds([(None, "tr", 0.3, pending, expected)], jobs, guessed)
+    return run
+
+
+def eta_lines(capsys):
+    return [line for line in capsys.readouterr().out.splitlines() if "ETA" in line]
+
+
+def test_recorded_costs_print_eta_up_front(rebuild, capsys):
+    rebuild([4000.0] * 4, jobs=2, guessed=False)
+    lines = eta_lines(capsys)
+    assert lines[0].endswith("0/4 file(s), ETA 8.0 s")
+    assert lines[-1].endswith("4/4 file(s), ETA 0.0 s")
+
+
+def test_guessed_costs_wait_for_first_batch(rebuild, capsys):
+    # Size-based guesses of 1 s per file; each actually takes 4 s
+    rebuild([1000.0] * 4, jobs=2, guessed=True)
+    lines = eta_lines(capsys)
+    assert not any(" 0/4 " in line for line in lines)
+    # The first line already uses the measured pace: 3 files of 4 s, 2 workers
+    assert lines[0].endswith("1/4 file(s), ETA 6.0 s")
+    assert lines[-1].endswith("4/4 file(s), ETA 0.0 s")
+
+
+def test_guessed_costs_serially_print_only_the_final_line(rebuild, capsys):
+    rebuild([4000.0] * 2, jobs=1, guessed=True)
+    assert eta_lines(capsys) == ["⏳  Reading stats      : 2/2 file(s), ETA 0.0 s"]
+
+
+def test_pool_workers_by_pending_files_and_cpus(monkeypatch):
+    monkeypatch.setattr(prs, "available_cpus", lambda: 4)
+    per_worker = prs.POOL_MIN_FILES_PER_WORKER
+    assert prs.pool_workers(4, 2 * per_worker - 1) == 1
+    assert prs.pool_workers(4, 2 * per_worker) == 2
+    assert prs.pool_workers(4, 100 * per_worker) == 4
+    assert prs.pool_workers(1, 100 * per_worker) == 1
+    monkeypatch.setattr(prs, "available_cpus", lambda: 1)
+    assert prs.pool_workers(4, 100 * per_worker) == 1
@@ -0,0 +1,72 @@
+# ../shared/python/tests/test_syllable_counter.py
+# BatchSyllableCounter must give the same (syllables, words) as summing
+# the scalar PandocAST._count_token rules, for any tokens and vowel set.
+
+import random
+
+import pytest
+
+from pandoc_ast import TURKISH_VOWELS, PandocAST
+from syllable_counter import BatchSyllableCounter
+
+VOWEL_SETS = [
+    pytest.param(tuple(TURKISH_VOWELS), id="turkish"),
+    pytest.param(tuple("aeiou"), id="ascii-lower"),
+    pytest.param(("a", "ae", "ou", "İ", "ıi"), id="multi-char-entries"),
+    pytest.param(("ae", "ou"), id="multi-char-only"),
+    pytest.param((), id="empty"),
+    pytest.param(("a", "]", "^", "-", "\\", "{"), id="regex-metachars"),
+    pytest.param(("e", "1", "٣", " "), id="digits-and-space"),
+]
+
+# Turkish vowels (both cases), consonants, digits (ASCII and others),
+# brackets / braces and punctuation
+ALPHABET = (
+    "aeıioöuüâîûAEIİOÖUÜ"
+    "bcçdfgğhjklmnprsştvyzBCÇDFGĞHKLMNPRSŞTVYZxwqXWQ"
+    "0123456789٣²"
+    "{}[]"
+    ".,;:!?'’\"-/()^\\"
+)
+NO_VOWEL_TOKENS = ["1990", "{12}", "[3]", "TCK", "brr", "psst", "²", "٣٤", "82/1-b", "{}", "--"]
+
+
+def scalar_counts(vowels, tokens):
+    doc = PandocAST("unused.qmd", ast={"meta": {}, "blocks": []},
+                    vowels=vowels, syllable_engine="scalar")
+    syllables = words = 0
+    for tok in tokens:
+        s, w = doc._count_token(tok)
+        syllables += s
+        words += w
+    return syllables, words
+
+
+def random_token(rng):
+    if rng.random() < 0.15:
+        return rng.choice(NO_VOWEL_TOKENS)
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 12)))
+
+
+@pytest.mark.parametrize("vowels", VOWEL_SETS)
+def test_batch_matches_scalar_on_random_tokens(vowels):
+    rng = random.Random(8)
+    counter = BatchSyllableCounter(vowels)
+    for _ in range(500):
+        tokens = [random_token(rng) for _ in range(rng.randint(0, 40))]
+        assert counter.count(tokens) == scalar_counts(vowels, tokens), tokens
+
+
+@pytest.mark.parametrize("vowels", VOWEL_SETS)
+def test_tokens_without_vowels_are_not_counted(vowels):
+    """The digit-only / no-vowel fallbacks of _syllables_for_word are unreachable."""
+    counter = BatchSyllableCounter(vowels)
+    consonants = [tok for tok in NO_VOWEL_TOKENS if not set(tok) & set(vowels)]
+    assert counter.count(consonants) == (0, 0)
+    assert scalar_counts(vowels, consonants) == (0, 0)
+
+
+def test_batch_counts_vowel_runs_per_word():
+    counter = BatchSyllableCounter(TURKISH_VOWELS)
+    assert counter.count(["Narin", "Güran’ın", "{yazdığım}[1]", "2024'te", "saat"]) == (10, 5)
+    assert counter.count([]) == (0, 0)
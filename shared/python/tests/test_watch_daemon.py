@@ -0,0 +1,105 @@
+# ../shared/python/tests/test_watch_daemon.py
+
+import subprocess
+
+import pytest
+
+import watch_daemon
+from conftest import requires_pandoc
+
+
+@pytest.fixture
+def polling(monkeypatch):
+    """
+    Run watch() in polling mode; Ctrl-C after `limit` intervals. on_poll(n),
+    if set, runs before the n-th poll (e.g. to edit a source).
+    """
+    state = {"polls": 0, "limit": 2, "on_poll": None}
+
+    def sleep(_seconds):
+        state["polls"] += 1
+        if state["polls"] > state["limit"]:
+            raise KeyboardInterrupt
+        if state["on_poll"] is not None:
+            state["on_poll"](state["polls"])
+
+    monkeypatch.setattr(watch_daemon, "_start_observer", lambda roots, events: None)
+    monkeypatch.setattr(watch_daemon.time, "sleep", sleep)
+    return state
+
+
+def pandoc_error(root):
+    exc = subprocess.CalledProcessError(
+        64, ["pandoc", "-f", "markdown"],
+        stderr=b'Error parsing YAML metadata at "x" (line 1, column 1):\nYAML parse exception\n',
+    )
+    exc.qmd = root / "trial" / "judgment.qmd"
+    return exc
+
+
+def test_failed_run_is_reported_and_retried(tmp_path, polling, capsys):
+    calls = []
+
+    def run(root):
+        calls.append(root)
+        if len(calls) == 1:
+            raise pandoc_error(root)
+        if len(calls) == 2:
+            raise FileNotFoundError(2, "No such file", str(root / "blog" / "post.qmd"))
+        return 1
+
+    watch_daemon.watch([tmp_path], run, interval=0)
+
+    assert len(calls) == 3  # initial run + one per poll until Ctrl-C
+    out = capsys.readouterr().out.splitlines()
+    name = tmp_path.name
+    assert out[0] == (
+        f"❌  {f'Failed ({name})':<19}: trial/judgment.qmd: "
+        'Error parsing YAML metadata at "x" (line 1, column 1):'
+    )
+    assert out[2].endswith(": blog/post.qmd: [Errno 2] No such file: "
+                           f"'{tmp_path / 'blog' / 'post.qmd'}'")
+    assert out[3].startswith(f"⚡  Updated ({name})")
+
+
+@requires_pandoc
+def test_invalid_quarto_yml_is_reported_and_recovers(tmp_path, polling, capsys):
+    from precompute_reading_stats import run_project, stats_yaml_path
+
+    root = tmp_path / "site"
+    root.mkdir()
+    config = root / "_quarto.yml"
+    config.write_text("project:\n  type: website\nlang: [tr\n", encoding="utf-8")
+    qmd = root / "trial" / "judgment.qmd"
+    qmd.parent.mkdir()
+    qmd.write_text("---\ntitle: Sayfa\n---\n\nKısa bir metin.\n", encoding="utf-8")
+
+    def fix_config(poll):
+        if poll == 2:
+            config.write_text("project:\n  type: website\nlang: tr\n", encoding="utf-8")
+
+    polling["on_poll"] = fix_config
+    watch_daemon.watch([root], lambda r: run_project(r, 1), interval=0)
+
+    out = [line for line in capsys.readouterr().out.splitlines()
+           if line.startswith(("❌", "⚡", "👀"))]
+    failed = f"❌  {'Failed (site)':<19}: _quarto.yml: "
+    # The initial run and the first poll fail; the fixed config recovers
+    assert [line.startswith(failed) for line in out] == [True, False, True, False]
+    assert out[0].endswith("(line 4, column 1)")
+    assert out[3].startswith(f"⚡  {'Updated (site)':<19}: 1 file(s)")
+    assert stats_yaml_path(qmd).exists()
+
+
+def test_other_errors_still_stop_the_daemon(tmp_path, polling):
+    def run(root):
+        raise RuntimeError("bug")
+
+    with pytest.raises(RuntimeError):
+        watch_daemon.watch([tmp_path], run, interval=0)
+
+
+def test_describe_error_without_stderr_or_file(tmp_path):
+    exc = subprocess.CalledProcessError(64, ["pandoc"])
+    assert watch_daemon.describe_error(tmp_path, exc) == "?: pandoc exited with code 64"
+    assert watch_daemon.describe_error(tmp_path, ValueError("bad\nvalue")) == "?: bad value"
@@ -0,0 +1,210 @@
+# ../shared/python/tests/test_wordcloud_ngrams.py
+
+import random
+
+import pytest
+
+import legacy
+from precompute_reading_stats import PHRASES_TO_REMOVE, phrase_removal_res
+from wordcloud_ngrams import get_org_upper_tokens, preprocess_text, preprocess_tokens
+
+# Caps / lower-case twins, Turkish dotted and dotless I, both apostrophes,
+# blank and whitespace-padded tokens
+ORG_UPPER_VOCAB = [
+    "TCK", "tck", "CMK", "cmk", "CMK’nun", "TCK'nin", "HSK", "AİHM", "aihm",
+    "AIHM", "aıhm", "İZMİR", "izmir", "IŞIK", "ışık", "Işık", "DİYARBAKIR",
+    "diyarbakır’da", "ABD’de", "abd", "’", "'", "''", "’TCK", " TCK ", " ", "",
+    "\t", "1990", "II", "ıı", "narin", "Narin", "NARİN’in", "x’Y", "Ş", "ş",
+]
+
+
+def random_tokens(rng, vocab, size):
+    return [rng.choice(vocab) for _ in range(size)]
+
+
+def test_org_upper_tokens_match_legacy_on_random_tokens():
+    rng = random.Random(24)
+    for _ in range(3000):
+        tokens = random_tokens(rng, ORG_UPPER_VOCAB, rng.randint(0, 30))
+        assert get_org_upper_tokens(tokens) == legacy.get_org_upper_tokens(tokens), tokens
+
+
+@pytest.mark.parametrize("tokens, expected", [
+    (["CMK’nun", "TCK'nin", "tck"], {"CMK"}),
+    (["AİHM", "aihm"], set()),
+    (["IŞIK", "Işık"], {"IŞIK"}),
+    (["  ", "’", "1990"], set()),        # caseless: its own lower-case twin
+    ([], set()),
+])
+def test_org_upper_tokens(tokens, expected):
+    assert get_org_upper_tokens(tokens) == expected
+    assert legacy.get_org_upper_tokens(tokens) == expected
+
+
+# Kelvin sign (lower-cases to an ASCII "k"), ALL-CAPS words with either
+# apostrophe, İ / I / ı, final sigma, ß / ligatures, digits and punctuation
+PREPROCESS_VOCAB = [
+    "TCK", "tck", "TCK’nin", "CMK'nun", "cmk", "’X", "X'Y", "ABC’", "abc'de",
+    "İSTANBUL", "İstanbul", "istanbul", "Işık", "IŞIK", "ışık", "İİ", "1'İ",
+    "A1", "123", "1990/12", "12'de", "...", ":", "-", "’", "K", "KX",
+    "\u212a", "\u212aX", "1\u212a", "K\u212aK’NIN",
+    "Straße", "STRASSE", "ﬁle", "ǅ", "ǈ", "ᾼ", "Σ", "ΣΑΣ", "ΟΔΟΣ", "ΟΔΟΣ'", "Σ'a",
+    "naïve", "Ⅻ", "²", "٣٤",
+]
+SEPARATORS = [" ", " ", " ", "  ", "\n", "\t", "\u00a0", "\u2003"]
+# Random words are drawn from these characters
+CHARS = "aeıioöuüAEIİOÖUÜbcçğşBCÇĞŞkK\u212a'’.,-/0123456789ßΣ"
+
+
+def assert_same_words(text):
+    for lowercase in (True, False):
+        expected = preprocess_tokens(text.split(), lowercase=lowercase)
+        assert list(preprocess_text(text, lowercase=lowercase)) == expected, (text, lowercase)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "TCK’nin 5. maddesi CMK'nun tck",
+    "IŞIK Işık ışık İSTANBUL’DA İstanbul",
+    "\u212a \u212aelvin 1\u212a ...",
+    "ΟΔΟΣ ΣΑΣ Σ'a Straße ﬁle",
+    "1990/12 : - 12'de 1'İ",
+])
+def test_preprocess_text_matches_preprocess_tokens(text):
+    assert_same_words(text)
+
+
+def test_preprocess_text_matches_preprocess_tokens_on_random_text():
+    rng = random.Random(25)
+    for _ in range(3000):
+        if rng.random() < 0.5:
+            words = random_tokens(rng, PREPROCESS_VOCAB, rng.randint(0, 25))
+        else:
+            words = ["".join(rng.choice(CHARS) for _ in range(rng.randint(1, 8)))
+                     for _ in range(rng.randint(0, 25))]
+        text = "".join(word + rng.choice(SEPARATORS) for word in words)
+        if rng.random() < 0.5:
+            text = text.replace("\u212a", "K")  # the bulk path, not the per-word one
+        assert_same_words(text)
+
+
+# ----------------------------------------------------------------------
+# compute_ngram_frequencies: both engines against the legacy function
+# ----------------------------------------------------------------------
+
+def _has_numpy():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+ENGINES = [
+    pytest.param("numpy", marks=pytest.mark.skipif(not _has_numpy(), reason="numpy is not installed")),
+    "python",
+]
+
+# Stopwords, apostrophe suffixes (counted without them up to bigrams),
+# proper names (PROPER_NAME_MAP), ALL-CAPS forms, digits and punctuation
+NGRAM_VOCAB = [
+    "ve", "bir", "bu", "ile", "da", "için", "the", "of",
+    "narin", "Narin’in", "güran", "GÜRAN", "nevzat'ın", "diyarbakır", "Bağlar’da",
+    "suçun", "işlendiği", "yer", "yer’de", "sanık", "sanığın", "ifade", "ifadesi",
+    "TCK", "TCK’nin", "cmk", "mahkeme", "karar", "kararı", "delil", "delillerin",
+    "1990", "12'de", ":", "...", "-", "İstanbul", "ışık", "IŞIK",
+]
+NGRAM_STOPWORDS = {"ve", "bir", "bu", "ile", "da", "için", "the", "of", "yer"}
+MIN_COUNTS = [None, {1: 1, 2: 2, 3: 2, 4: 2}, {1: 3, 2: 1, 3: 1, 5: 2}]
+
+
+def no_phrase(ng):
+    """A custom rule: reject two phrases and n-grams starting with "sanık"."""
+    return " ".join(ng) not in {"suçun işlendiği", "mahkeme karar"} and ng[0] != "sanık"
+
+
+def random_ngram_tokens(rng):
+    # Mostly a small vocabulary, so longer n-grams repeat too
+    vocab = NGRAM_VOCAB[: rng.randint(6, len(NGRAM_VOCAB))]
+    return [rng.choice(vocab) for _ in range(rng.randint(0, 120))]
+
+
+def assert_same_frequencies(new, old):
+    for n in range(1, 6):
+        assert list(new[0].get(n, {}).items()) == list(old[0].get(n, {}).items()), n
+    assert new[0].keys() == old[0].keys()
+    assert new[1] == old[1]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ngram_frequencies_match_legacy_on_random_tokens(engine):
+    from wordcloud_ngrams import NgramFilter, compute_ngram_frequencies, default_ngram_filter
+
+    rng = random.Random(21)
+    filters = [
+        # (new filter_func, the legacy equivalent)
+        (None, None),
+        (no_phrase, no_phrase),
+        (NgramFilter(NGRAM_STOPWORDS, rules=[no_phrase]),
+         lambda ng: default_ngram_filter(ng, stopwords=NGRAM_STOPWORDS) and no_phrase(ng)),
+    ]
+    for _ in range(300):
+        tokens = random_ngram_tokens(rng)
+        text = " ".join(tokens)
+        new_filter, old_filter = rng.choice(filters)
+        options = dict(
+            max_ngram=rng.randint(0, 5),
+            top_k=rng.choice([3, 200]),
+            stopwords=rng.choice([None, NGRAM_STOPWORDS]),
+            min_count_per_n=rng.choice(MIN_COUNTS),
+        )
+        old = legacy.compute_ngram_frequencies(tokens, filter_func=old_filter, **options)
+        for source in (tokens, iter(tokens), text):
+            new = compute_ngram_frequencies(source, filter_func=new_filter, engine=engine, **options)
+            assert_same_frequencies(new, old)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ngram_frequencies_match_legacy_with_wordcloud(engine):
+    pytest.importorskip("wordcloud")
+    from wordcloud_ngrams import compute_ngram_frequencies
+
+    rng = random.Random(22)
+    tokens = [rng.choice(NGRAM_VOCAB) for _ in range(400)]
+    options = dict(max_ngram=3, stopwords=NGRAM_STOPWORDS, use_wordcloud=True,
+                   min_count_per_n={1: 1, 2: 2, 3: 2})
+    old = legacy.compute_ngram_frequencies(tokens, **options)
+    assert old[1]
+    assert_same_frequencies(compute_ngram_frequencies(" ".join(tokens), engine=engine, **options), old)
+
+
+def remove_phrases(text, phrases):
+    for pattern in phrase_removal_res(phrases):
+        text = pattern.sub(" ", text)
+    return text
+
+
+# Multi-word phrases overlapping single ones: list order decides
+PHRASE_LISTS = [
+    PHRASES_TO_REMOVE,
+    ["madde", "madde 5", "sanık"],
+    ["madde 5", "madde", "5 sayılı", "sayılı"],
+    ["a.b", "(x)", "a b c", "b", "a b", "c"],
+]
+
+
+@pytest.mark.parametrize("phrases", PHRASE_LISTS)
+def test_phrase_removal_matches_legacy_list_order(phrases):
+    rng = random.Random(9)
+    vocab = sorted({w for p in phrases for w in p.split()}) + [
+        "madde5", "maddeler", "sanıklar", "ab", "a.bc", "x", "\n", "  ", "\t"]
+    for _ in range(2000):
+        text = " ".join(random_tokens(rng, vocab, rng.randint(0, 12)))
+        assert remove_phrases(text, phrases) == legacy.remove_phrases(text, phrases), text
+
+
+def test_phrase_removal_keeps_list_order():
+    # "madde" goes first, so "madde 5" no longer matches
+    assert remove_phrases("madde 5 sanık", ["madde", "madde 5", "sanık"]).split() == ["5"]
+    assert remove_phrases("madde 5 sanık", ["madde 5", "madde", "sanık"]).split() == []
+    assert len(phrase_removal_res(["a", "b", "c d", "e", "f"])) == 3
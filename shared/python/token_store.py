@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# ../shared/python/token_store.py
+
+from __future__ import annotations
+
+import re
+from array import array
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Optional, Union, overload
+
+
+class TokenStore:
+    """
+    Compact, append-only storage for the tokens counted by PandocAST.
+
+    Instead of one Python string per token, the tokens live in a single
+    backing string (tokens joined with " ") plus two array('I') columns
+    holding each token's offset and length. Views are lazy iterators:
+
+    - iter(store)            raw tokens, in counting order
+    - store.split_on(chars)  the pieces left after replacing every char in
+                             `chars` with a space and splitting on
+                             whitespace (one regex scan over the backing
+                             string, no per-token re.sub)
+
+    store[i] / store[i:j] give single tokens / lists of tokens.
+    """
+
+    def __init__(self, tokens: Iterable[str] = ()) -> None:
+        self._chunks: List[str] = []         # joined lazily into _text
+        self._text: Optional[str] = ""
+        self._offsets = array("I")
+        self._lengths = array("I")
+        self._next = 0                       # offset of the next token
+        self.extend(tokens)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def append(self, token: str) -> None:
+        """Add one token."""
+        self._offsets.append(self._next)
+        self._lengths.append(len(token))
+        self._next += len(token) + 1
+        self._chunks.append(token)
+        self._text = None
+
+    def extend(self, tokens: Iterable[str]) -> None:
+        """Add tokens in order."""
+        if not isinstance(tokens, (list, tuple)):
+            tokens = list(tokens)
+        if not tokens:
+            return
+
+        lengths = [len(tok) for tok in tokens]
+        steps = [self._next] + [n + 1 for n in lengths[:-1]]
+        self._offsets.extend(accumulate(steps))
+        self._lengths.extend(lengths)
+        self._next = self._offsets[-1] + lengths[-1] + 1
+        self._chunks.append(" ".join(tokens))
+        self._text = None
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    @property
+    def text(self) -> str:
+        """Return the backing string (all tokens joined with a space)."""
+        if self._text is None:
+            self._text = " ".join(self._chunks)
+            self._chunks = [self._text] if self._text or self._offsets else []
+        return self._text
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[str]:
+        text = self.text
+        for start, length in zip(self._offsets, self._lengths):
+            yield text[start:start + length]
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        text = self.text
+        if isinstance(index, slice):
+            return [
+                text[start:start + length]
+                for start, length in zip(self._offsets[index], self._lengths[index])
+            ]
+        start = self._offsets[index]
+        return text[start:start + self._lengths[index]]
+
+    def split_on(self, chars: str) -> Iterator[str]:
+        """
+        Iterate over the pieces of every token split at `chars`.
+
+        Same pieces, in the same order, as doing per token:
+          re.sub("[chars]+", " ", tok) -> collapse whitespace -> split().
+        """
+        if not self._offsets:
+            return iter(())
+        pattern = _piece_pattern(chars)
+        return (m.group() for m in pattern.finditer(self.text))
+
+
+_PIECE_PATTERNS = {}
+
+
+def _piece_pattern(chars: str) -> "re.Pattern[str]":
+    """Return (cached) the regex matching runs of non-space, non-`chars`."""
+    pattern = _PIECE_PATTERNS.get(chars)
+    if pattern is None:
+        pattern = re.compile(r"[^\s{}]+".format(re.escape(chars)))
+        _PIECE_PATTERNS[chars] = pattern
+    return pattern
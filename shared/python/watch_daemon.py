@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# ../shared/python/watch_daemon.py
+
+from __future__ import annotations
+
+import queue
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Sequence
+
+from dependency_graph import project_environment
+
+# Directories whose changes never affect the reading stats
+IGNORED_DIRS = {".quarto", "_site", "_freeze", ".git", "node_modules"}
+
+# Files written by precompute_reading_stats itself (and atomic temp files)
+OUTPUT_SUFFIXES = ("_reading_stats.yml", "_words.json", "gram.txt", ".tmp")
+
+# Sources, includes, _metadata.yml / _quarto.yml
+SOURCE_SUFFIXES = (".qmd", ".md", ".yml", ".yaml")
+
+
+# Errors of a run caused by the sources as they are being edited (pandoc
+# rejecting half-typed front matter, a file replaced mid-save, ...): the
+# daemon reports them and retries on the next change. yaml.YAMLError (a
+# half-typed _quarto.yml) is added by run_errors() once PyYAML is loaded.
+RUN_ERRORS = (subprocess.CalledProcessError, OSError, ValueError)
+
+
+def run_errors() -> tuple:
+    """
+    Return RUN_ERRORS, plus yaml.YAMLError if PyYAML has been imported: a
+    run that never loaded it cannot raise it, and a no-op run (stat scan)
+    does not have to import it.
+    """
+    yaml = sys.modules.get("yaml")
+    if yaml is None:
+        return RUN_ERRORS
+    return RUN_ERRORS + (yaml.YAMLError,)
+
+
+def describe_error(root: Path, exc: BaseException) -> str:
+    """Return a one-line "file: reason" for an error of a run under root."""
+    mark = getattr(exc, "problem_mark", None)  # yaml.MarkedYAMLError
+    source = (getattr(exc, "qmd", None) or getattr(exc, "filename", None)
+              or getattr(mark, "name", None))
+    if source:
+        try:
+            source = Path(source).resolve().relative_to(root.resolve()).as_posix()
+        except ValueError:
+            pass
+    else:
+        source = "?"
+
+    reason = ""
+    if isinstance(exc, subprocess.CalledProcessError):
+        stderr = exc.stderr or b""
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode("utf-8", "replace")
+        lines = [line.strip() for line in stderr.splitlines() if line.strip()]
+        reason = lines[0] if lines else f"pandoc exited with code {exc.returncode}"
+    elif mark is not None and getattr(exc, "problem", None):
+        reason = f"{exc.problem} (line {mark.line + 1}, column {mark.column + 1})"
+    if not reason:
+        reason = " ".join(str(exc).split()) or type(exc).__name__
+    return f"{source}: {reason}"
+
+
+def is_source_change(root: Path, path: str) -> bool:
+    """Return True if a change to path (under root) can affect the stats."""
+    if not path:
+        return False
+    p = Path(path)
+    if not p.name.endswith(SOURCE_SUFFIXES) or p.name.endswith(OUTPUT_SUFFIXES):
+        return False
+    try:
+        parts = p.resolve().relative_to(root.resolve()).parts
+    except ValueError:
+        return False
+    return not any(part in IGNORED_DIRS for part in parts[:-1])
+
+
+def _start_observer(roots: Sequence[Path], events: "queue.Queue[Path]"):
+    """
+    Start a watchdog observer (inotify / FSEvents / ReadDirectoryChangesW)
+    that puts the root of every relevant change on `events`.
+    Returns None if watchdog is not installed.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def __init__(self, root: Path) -> None:
+            self.root = root
+
+        def on_any_event(self, event) -> None:
+            if event.is_directory or event.event_type in ("opened", "closed_no_write"):
+                return
+            paths = (event.src_path, getattr(event, "dest_path", ""))
+            if any(is_source_change(self.root, str(p)) for p in paths):
+                events.put(self.root)
+
+    observer = Observer()
+    for root in roots:
+        observer.schedule(Handler(root), str(root), recursive=True)
+    observer.start()
+    return observer
+
+
+def watch(
+    roots: Sequence[Path],
+    run: Callable[[Path], int],
+    interval: float = 1.0,
+    debounce: float = 0.05,
+) -> None:
+    """
+    Keep the reading stats of the Quarto projects at `roots` up to date.
+
+    run(root) performs one (incremental) precompute run of a project and
+    returns the number of rebuilt files; it is called with
+    QUARTO_PROJECT_DIR set to that root. Everything imported and cached
+    by the first run (pandoc_ast, ast_cache, word cloud modules) stays
+    warm for the next ones. The Zemberek morphology is not among them:
+    the word cloud runs without lemma_func / noun_phrase_filter (see
+    export_word_cloud), so it is never built.
+
+    With watchdog installed, a run starts `debounce` seconds after the
+    last burst of source changes under a root (editors often write a file
+    in several steps). Without it, every root is re-checked every
+    `interval` seconds, which is cheap when nothing changed (stat scan).
+
+    A run that fails on a source being edited (run_errors(), e.g. pandoc
+    rejecting half-typed front matter or an invalid _quarto.yml) prints
+    one line naming the project and file; the next change retries it.
+    Only Ctrl-C stops the daemon.
+    """
+    roots = [Path(r) for r in roots]
+
+    def update(root: Path) -> int:
+        start = time.perf_counter()
+        try:
+            with project_environment(root):
+                rebuilt = run(root)
+        except run_errors() as exc:
+            label = f"Failed ({root.resolve().name})"
+            print(f"❌  {label:<19}: {describe_error(root, exc)}", flush=True)
+            return 0
+        if rebuilt:
+            elapsed = (time.perf_counter() - start) * 1000
+            label = f"Updated ({root.resolve().name})"
+            print(f"⚡  {label:<19}: {rebuilt} file(s) in {elapsed:.0f} ms", flush=True)
+        return rebuilt
+
+    for root in roots:
+        update(root)
+
+    events: "queue.Queue[Path]" = queue.Queue()
+    observer = _start_observer(roots, events)
+    names = ", ".join(r.resolve().name for r in roots)
+    mode = "file events" if observer is not None else f"polling every {interval:g} s"
+    print(f"👀  Watching           : {names} ({mode}; Ctrl-C to stop)", flush=True)
+
+    try:
+        while True:
+            if observer is None:
+                time.sleep(interval)
+                for root in roots:
+                    update(root)
+                continue
+
+            dirty = {events.get()}
+            # Collect the rest of the burst
+            while True:
+                try:
+                    dirty.add(events.get(timeout=debounce))
+                except queue.Empty:
+                    break
+            for root in roots:
+                if root in dirty:
+                    update(root)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
@@ -6,12 +6,22 @@ from __future__ import annotations
 import json
 from pathlib import Path
 from collections import Counter
-from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from file_utils import write_if_changed
 
 import re
 
 COMPRESSED = True  # Whether to minify JSON output files
 
+# N-gram counting engine: "numpy" (integer-encoded windows), "python"
+# (tuples + Counter), or "auto" (numpy when it is installed)
+NGRAM_ENGINE = "auto"
+
+# Unigrams and bigrams are counted without apostrophe suffixes
+# ("TCK’nin" -> "TCK"); longer n-grams keep the full tokens
+APOSTROPHE_MAX_N = 2
+
 # Shared Turkish stopwords (you can extend this)
 TURKISH_STOPWORDS: set[str] = {
     "ve", "veya", "ile", "da", "dan", "de", "den", "mi",
@@ -152,7 +162,7 @@ def turkish_lower(text: str) -> str:
 
 
 def preprocess_tokens(
-    tokens: Sequence[str],
+    tokens: Iterable[str],
     *,
     lowercase: bool = True,
 ) -> List[str]:
@@ -185,6 +195,45 @@ def preprocess_tokens(
     return cleaned
 
 
+# A whitespace-delimited word with at least one letter. This is
+# preprocess_tokens' cleanup as one pattern: a token with no letter
+# (digits, "1990/12", ":", "...") never matches.
+WORD_RE = re.compile(r"\S*?[a-zA-ZğüşöçıİĞÜŞÖÇ]\S*")
+LETTER_RE = re.compile(r"[a-zA-ZğüşöçıİĞÜŞÖÇ]")
+
+# The only character lowercasing turns into one of those letters
+KELVIN_SIGN = "\u212a"
+
+
+def preprocess_text(text: str, *, lowercase: bool = True) -> Iterator[str]:
+    """
+    Bulk preprocess_tokens over a whole document text: lazily yield the
+    kept (optionally case-folded) words, split at whitespace.
+
+    The text is Turkish-lowercased once (turkish_lower2) and WORD_RE
+    scans the original and the lowered text, so both word lists line up.
+    Only words that lowercasing changes go through turkish_lower (the
+    ALL-CAPS check, e.g. TCK’nin); every other word is already final.
+
+    Same words as preprocess_tokens(text.split()).
+    """
+    if not lowercase:
+        yield from WORD_RE.findall(text)
+        return
+
+    if KELVIN_SIGN in text:
+        # Lowercases to "k", so a word can gain a letter: per word
+        for word in text.split():
+            folded = turkish_lower(word)
+            if LETTER_RE.search(folded):
+                yield folded
+        return
+
+    lowered = turkish_lower2(text)
+    for word, folded in zip(WORD_RE.findall(text), WORD_RE.findall(lowered)):
+        yield folded if word == folded else turkish_lower(word)
+
+
 def generate_ngrams(tokens: Sequence[str], n: int) -> List[Tuple[str, ...]]:
     """
     Generate consecutive n-grams as tuples of tokens.
@@ -219,37 +268,253 @@ def default_ngram_filter(
     return not all(tok in sw for tok in ngram)
 
 
+class NgramFilter:
+    """
+    N-gram predicate compiled once, instead of default_ngram_filter's
+    per-call stopword set.
+
+    - stopwords: the hybrid stopword rule of default_ngram_filter (drop
+      n-grams made of stopwords only), as a frozenset; None disables it.
+    - rules: further predicates on the token tuple (e.g.
+      noun_phrase_filter); an n-gram is kept if all of them accept it.
+      Their answers are memoized per distinct n-gram.
+
+    filter(ngram) tests one n-gram; stop_mask(vocab) gives the stopword
+    rule as a boolean mask over token ids, so the NumPy engine can apply
+    it to all n-grams at once and only call the rules on the survivors.
+    """
+
+    def __init__(
+        self,
+        stopwords: Optional[Iterable[str]] = (),
+        rules: Iterable[Callable[[Tuple[str, ...]], bool]] = (),
+    ) -> None:
+        self.stopwords: Optional[frozenset] = (
+            None if stopwords is None else frozenset(stopwords)
+        )
+        self.rules = tuple(rules)
+        self._decisions: Dict[Tuple[str, ...], bool] = {}
+
+    def __call__(self, ngram: Tuple[str, ...]) -> bool:
+        if self.stopwords is not None and self.stopwords.issuperset(ngram):
+            return False
+        return self.check_rules(ngram)
+
+    def check_rules(self, ngram: Tuple[str, ...]) -> bool:
+        """Return True if every rule accepts ngram (memoized)."""
+        if not self.rules:
+            return True
+        decision = self._decisions.get(ngram)
+        if decision is None:
+            decision = all(rule(ngram) for rule in self.rules)
+            self._decisions[ngram] = decision
+        return decision
+
+    def stop_mask(self, vocab: Sequence[str]):
+        """
+        Return a NumPy bool array: True where vocab[id] is a stopword,
+        or None if the stopword rule is disabled.
+        """
+        if self.stopwords is None:
+            return None
+        import numpy as np
+
+        sw = self.stopwords
+        return np.fromiter((t in sw for t in vocab), dtype=bool, count=len(vocab))
+
+
+def compile_ngram_filter(
+    filter_func: Optional[Callable[[Tuple[str, ...]], bool]] = None,
+    stopwords: Optional[Iterable[str]] = None,
+) -> NgramFilter:
+    """
+    Return the NgramFilter for compute_ngram_frequencies' arguments:
+    an NgramFilter is used as is, any other filter_func replaces the
+    stopword rule (as before), and no filter_func means the stopword rule.
+    """
+    if isinstance(filter_func, NgramFilter):
+        return filter_func
+    if filter_func is not None:
+        return NgramFilter(stopwords=None, rules=[filter_func])
+    return NgramFilter(stopwords=stopwords or ())
+
+
 def get_org_upper_tokens(tokens: Sequence[str]) -> set[str]:
-  # 1.a) ALL-CAPS bookkeeping için önce adayları normalize et
-  # Örnek: "CMK’nun" -> "CMK", "TCK'nin" -> "TCK"
-  caps_candidates: list[str] = []
-  for tok in tokens:
-      t = tok.strip()
-      if not t:
-          continue
-  
-      # Önce Türkçe apostrof ’ ile böl
-      base = t.split("’", 1)[0]
-      # Sonra gerekirse normal apostrof ' ile de böl
-      base = base.split("'", 1)[0]
-  
-      base = base.strip()
-      if base:
-        caps_candidates.append(base)
-  
-  # 1.b) ALL-CAPS olanları seç (TCK, CMK vs.)
-  original_upper_tokens = {
-      t for t in caps_candidates
-      if t == turkish_upper(t)
-  }
-  
-  # 1.c) Lower-case ikizi varsa (örn. "cmk") onları hariç tut
-  lower_set = {turkish_lower2(t) for t in caps_candidates}
-  
-  return {
-      tok for tok in original_upper_tokens
-      if turkish_lower2(tok) not in caps_candidates
-  }
+    """
+    Return the ALL-CAPS forms (abbreviations like TCK, CMK) to restore in
+    the word cloud: the apostrophe-stripped tokens written in capitals
+    whose lower-case twin never occurs in the text.
+    Example: "CMK’nun" -> "CMK" (unless "cmk" also appears).
+
+    One pass builds the set of stripped forms; upper/lower-case checks
+    then run once per distinct form, so the cost is linear in the text.
+    """
+    # 1.a) Adaylar: apostrof ekinden arındırılmış biçimler
+    # Örnek: "CMK’nun" -> "CMK", "TCK'nin" -> "TCK"
+    candidates: set[str] = set()
+    for tok in tokens:
+        base = strip_apostrophe_suffix(tok.strip()).strip()
+        if base:
+            candidates.add(base)
+
+    # 1.b) ALL-CAPS olanları seç (TCK, CMK vs.); 1.c) lower-case ikizi
+    # varsa (örn. "cmk") onları hariç tut
+    return {
+        base for base in candidates
+        if base == turkish_upper(base) and turkish_lower2(base) not in candidates
+    }
+
+
+def resolve_ngram_engine(engine: str = NGRAM_ENGINE) -> str:
+    """Return "numpy" or "python" for an engine setting (see NGRAM_ENGINE)."""
+    if engine not in ("auto", "numpy", "python"):
+        raise ValueError(f"unknown n-gram engine: {engine!r}")
+    if engine == "python":
+        return engine
+    try:
+        import numpy  # noqa: F401
+    except ImportError as e:
+        if engine == "numpy":
+            raise RuntimeError(
+                "engine='numpy' but the 'numpy' package is not installed."
+            ) from e
+        return "python"
+    return "numpy"
+
+
+def encode_tokens(tokens: Sequence[str]):
+    """
+    Intern tokens into integer ids, in order of first appearance.
+    Returns (ids, vocab): a NumPy int64 array and the list of id -> token.
+    """
+    import numpy as np
+
+    index: Dict[str, int] = {}
+    ids = np.fromiter(
+        (index.setdefault(t, len(index)) for t in tokens),
+        dtype=np.int64,
+        count=len(tokens),
+    )
+    return ids, list(index)
+
+
+def count_ngrams_python(
+    tokens: Iterable[str],
+    max_n: int,
+    keep: Callable[[Tuple[str, ...]], bool],
+    min_counts: Optional[Dict[int, int]] = None,
+) -> Dict[int, Dict[str, int]]:
+    """
+    Count the 1..max_n-grams of tokens in a single pass with a rolling
+    window: every n-gram is counted when its last token arrives.
+
+    Orders up to APOSTROPHE_MAX_N use the tokens without apostrophe
+    suffixes. Only n-grams that pass keep() are counted (by phrase) and
+    each order's min_counts threshold (default 1) is applied at the end,
+    so memory is bounded by the number of distinct n-grams.
+    Returns {n: {phrase: count}}, each in order of first occurrence.
+    """
+    min_counts = min_counts or {}
+    short_n = min(max_n, APOSTROPHE_MAX_N)
+    counters: Dict[int, Counter[str]] = {n: Counter() for n in range(1, max_n + 1)}
+
+    # Windows ending at the current token, shortest first
+    short: List[Tuple[str, ...]] = []
+    full: List[Tuple[str, ...]] = []
+    for tok in tokens:
+        base = strip_apostrophe_suffix(tok)
+        short = [(base,)] + [w + (base,) for w in short[: short_n - 1]]
+        for ng in short:
+            # Hybrid stopword + n-gram filter
+            if keep(ng):
+                counters[len(ng)][" ".join(ng)] += 1
+
+        if max_n > APOSTROPHE_MAX_N:
+            full = [(tok,)] + [w + (tok,) for w in full[: max_n - 1]]
+            for ng in full[APOSTROPHE_MAX_N:]:
+                if keep(ng):
+                    counters[len(ng)][" ".join(ng)] += 1
+
+    return {
+        n: {k: v for k, v in counter.items() if v >= min_counts.get(n, 1)}
+        for n, counter in counters.items()
+    }
+
+
+def count_ngrams_numpy(
+    tokens: Sequence[str],
+    max_n: int,
+    *,
+    min_counts: Optional[Dict[int, int]] = None,
+    ngram_filter: Optional[NgramFilter] = None,
+) -> Dict[int, Dict[str, int]]:
+    """
+    count_ngrams_python with NumPy: same result and order.
+
+    The tokens are interned once per form (encode_tokens). Every window
+    of ids is packed into one integer (base len(vocab)); the keys of each
+    order are built from those of the order below, renumbering the
+    distinct windows first where the next one would overflow int64, and
+    counted with np.unique. The stopword rule of ngram_filter (its
+    stop_mask) and the threshold are array masks over the unique keys;
+    only the surviving n-grams are decoded, and ngram_filter's rules are
+    called once per distinct survivor. No ngram_filter means no filter.
+
+    Tokens must not contain spaces (phrases would no longer match
+    windows one to one).
+    """
+    import numpy as np
+
+    min_counts = min_counts or {}
+    ngram_filter = ngram_filter or NgramFilter(stopwords=None)
+    short_n = min(max_n, APOSTROPHE_MAX_N)
+
+    streams = [([strip_apostrophe_suffix(t) for t in tokens], 1, short_n)]
+    if max_n > APOSTROPHE_MAX_N:
+        streams.append((tokens, APOSTROPHE_MAX_N + 1, max_n))
+
+    result: Dict[int, Dict[str, int]] = {n: {} for n in range(1, max_n + 1)}
+    for stream, low, high in streams:
+        ids, vocab = encode_tokens(stream)
+        id_list = ids.tolist()
+        is_stop = ngram_filter.stop_mask(vocab)
+
+        # keys[i] identifies the window of n ids starting at i; all keys < span
+        base = max(len(vocab), 1)
+        keys, span = ids, base
+        for n in range(1, high + 1):
+            if n > 1:
+                if span * base >= 2 ** 63:
+                    # Renumber the distinct windows so far 0..k-1 before widening
+                    _, keys = np.unique(keys, return_inverse=True)
+                    span = int(keys.max()) + 1
+                keys = keys[:-1] * base + ids[n - 1 :]
+                span *= base
+            if not len(keys):
+                break
+            if n < low:
+                continue
+
+            _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+            mask = counts >= min_counts.get(n, 1)
+            if is_stop is not None:
+                all_stop = np.ones(len(first), dtype=bool)
+                for j in range(n):
+                    all_stop &= is_stop[ids[first + j]]
+                mask &= ~all_stop
+
+            # First occurrence order, like the Counter of the Python engine
+            order = np.argsort(first[mask], kind="stable")
+            positions = first[mask][order].tolist()
+            survivors = counts[mask][order].tolist()
+
+            freqs = result[n]
+            for pos, count in zip(positions, survivors):
+                ng = tuple(vocab[i] for i in id_list[pos : pos + n])
+                if not ngram_filter.check_rules(ng):
+                    continue
+                freqs[" ".join(ng)] = count
+    return result
 
 
 def adjust_proper_names(tokens: Sequence[str]) -> List[str]:
@@ -266,20 +531,24 @@ def adjust_proper_names(tokens: Sequence[str]) -> List[str]:
     return adjusted_tokens
 
 
+def strip_apostrophe_suffix(token: str) -> str:
+    """
+    Remove a Turkish apostrophe and its trailing suffix from a token.
+    E.g. "TCK’nin" -> "TCK"
+    """
+    return token.split("’", 1)[0].split("'", 1)[0]
+
+
 def remove_apostrophes_from_tokens(tokens: Sequence[str]) -> List[str]:
     """
     Remove Turkish apostrophes and trailing suffixes from tokens.
     E.g. "TCK’nin" -> "TCK"
     """
-    cleaned_tokens: List[str] = []
-    for t in tokens:
-        base = t.split("’", 1)[0].split("'", 1)[0]
-        cleaned_tokens.append(base)
-    return cleaned_tokens
+    return [strip_apostrophe_suffix(t) for t in tokens]
 
 
 def compute_ngram_frequencies(
-    tokens: Sequence[str],
+    tokens: Union[str, Iterable[str]],
     *,
     max_ngram: int = 1,
     top_k: int = 200,
@@ -287,14 +556,28 @@ def compute_ngram_frequencies(
     lemma_func: Optional[Callable[[str], str]] = None,
     filter_func: Optional[
         Callable[[Tuple[str, ...]], bool]
-    ] = None,
+    ] = None,  # or an NgramFilter
     min_count_per_n: Optional[Dict[int, int]] = None,
     use_wordcloud: bool = False,
     wordcloud_kwargs: Optional[Dict[str, Any]] = None,
+    engine: str = NGRAM_ENGINE,
 ) -> Tuple[Dict[int, Dict[str, int]], Optional[Dict[str, int]]]:
     """
     Core n-gram frequency computation.
 
+    tokens may be the document text (e.g. PandocAST.to_string()), which
+    is split at whitespace and preprocessed in bulk (preprocess_text),
+    or any iterable of tokens (e.g. PandocAST.iter_tokens()), consumed
+    once and preprocessed per token (preprocess_tokens).
+
+    engine: "numpy", "python" or "auto" (see NGRAM_ENGINE); both engines
+    give the same result. The numpy one interns the tokens once and
+    counts packed integer windows, which keeps max_ngram > 2 cheap.
+
+    filter_func: an NgramFilter (stopword rule + rules, compiled once),
+    or a plain predicate that replaces the stopword rule. Without it,
+    n-grams made of stopwords only are dropped.
+
     Returns
     -------
      (freqs_by_n, wc_unigrams)
@@ -309,11 +592,15 @@ def compute_ngram_frequencies(
       max_ngram = 0
 
     sw = set(stopwords or [])
-    predicates = filter_func or (lambda ng: default_ngram_filter(ng, stopwords=sw))
+    # Built once: stopword set / mask and memoized rules (see NgramFilter)
+    ngram_filter = compile_ngram_filter(filter_func, sw)
     min_counts = min_count_per_n or {}
 
     # 1) Basic preprocessing (punctuation, digits, casing)
-    pre_tokens = preprocess_tokens(tokens, lowercase=True)
+    if isinstance(tokens, str):
+        pre_tokens = list(preprocess_text(tokens, lowercase=True))
+    else:
+        pre_tokens = preprocess_tokens(tokens, lowercase=True)
 
     # 1.a) Restore ALL-CAPS tokens (e.g. TCK) bookkeeping (used only for WordCloud casing logic)
     original_upper_tokens = get_org_upper_tokens(pre_tokens)
@@ -376,25 +663,21 @@ def compute_ngram_frequencies(
                 sorted(adjusted.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
             )
 
+    # 4) All n-gram orders in one pass (thresholds applied per order)
+    counts_by_n: Dict[int, Dict[str, int]] = {}
+    if max_ngram:
+        engine = resolve_ngram_engine(engine)
+        # Packed windows only match phrases one to one if no token has a space
+        if engine == "numpy" and not any(" " in t for t in lemma_tokens):
+            counts_by_n = count_ngrams_numpy(lemma_tokens, max_ngram, min_counts=min_counts,
+                                             ngram_filter=ngram_filter)
+        else:
+            counts_by_n = count_ngrams_python(lemma_tokens, max_ngram, ngram_filter, min_counts)
+
     result: Dict[int, Dict[str, int]] = {}
 
     for n in range(1, max_ngram + 1):
-        tokens_for_ngrams = lemma_tokens if n > 2 else remove_apostrophes_from_tokens(lemma_tokens)
-        ngrams = generate_ngrams(tokens_for_ngrams, n)
-        counter: Counter[str] = Counter()
-
-        for ng in ngrams:
-            # Hybrid stopword + n-gram filter
-            if not predicates(ng):
-                continue
-
-            phrase = " ".join(ng)
-            counter[phrase] += 1
-
-        # Apply minimum count threshold for this n
-        threshold = min_counts.get(n, 1)
-        freq_dict = {k: v for k, v in counter.items() if v >= threshold}
-
+        freq_dict = counts_by_n.get(n, {})
 
         if freq_dict:
             # Proper-name mapping on phrase level:
@@ -432,6 +715,7 @@ def write_words_file(
 ) -> None:
     """
     Write BASENAME_words.json from a flat frequency dict.
+    The file is only rewritten (atomically) if its content changed.
     """
     stem = base_qmd_path.stem
     out_path = base_qmd_path.with_name(f"{stem}_words.json")
@@ -441,23 +725,22 @@ def write_words_file(
         for term, count in freqs.items()
     ]
 
-    with out_path.open("w", encoding="utf-8") as f:
-        if compressed:
-            # Minified JSON
-            json.dump(
-                items,
-                f,
-                ensure_ascii=False,
-                separators=(",", ":")   # no extra whitespace
-            )
-        else:
-            # Pretty-printed JSON
-            json.dump(
-                items,
-                f,
-                ensure_ascii=False,
-                indent=2
-            )
+    if compressed:
+        # Minified JSON
+        text = json.dumps(
+            items,
+            ensure_ascii=False,
+            separators=(",", ":")   # no extra whitespace
+        )
+    else:
+        # Pretty-printed JSON
+        text = json.dumps(
+            items,
+            ensure_ascii=False,
+            indent=2
+        )
+
+    write_if_changed(out_path, text)
 
 
 def write_ngram_frequency_files(
@@ -473,6 +756,8 @@ def write_ngram_frequency_files(
 
     File format (one term per line):
       term,count
+
+    Files are only rewritten (atomically) if their content changed.
     """
     stem = base_qmd_path.stem
 
@@ -485,14 +770,14 @@ def write_ngram_frequency_files(
         # Sort by descending frequency
         items = sorted(freq.items(), key=lambda kv: kv[1], reverse=True)
 
-        with out_path.open("w", encoding="utf-8") as f:
-            for term, count in items:
-                f.write(f"{term},{count}\n")
+        write_if_changed(
+            out_path, "".join(f"{term},{count}\n" for term, count in items)
+        )
 
 
 def export_ngram_files_from_tokens(
     qmd_path: Path,
-    tokens: Sequence[str],
+    tokens: Union[str, Iterable[str]],
     *,
     stopwords: Optional[Iterable[str]] = None,
     max_ngram: int = 1,
@@ -502,16 +787,24 @@ def export_ngram_files_from_tokens(
     top_k: int = 200,
     use_wordcloud: bool = False,
     wordcloud_kwargs: Optional[Dict[str, Any]] = None,
+    engine: str = NGRAM_ENGINE,
 ) -> Dict[int, Dict[str, int]]:
     """
     High-level helper for integration with PandocAST.
 
+    tokens:
+        The document text or an iterable of tokens (see
+        compute_ngram_frequencies).
+
     use_wordcloud:
         If True, judgment_words.txt is built using Python WordCloud,
         and our own n-gram pipeline writes BASENAME_1gram.txt, 2gram, 3gram, ...
 
     wordcloud_kwargs:
         Optional kwargs passed to WordCloud(...) when use_wordcloud=True.
+
+    engine:
+        N-gram counting engine (see compute_ngram_frequencies).
     """
     freqs_by_n, wc_unigrams = compute_ngram_frequencies(
         tokens=tokens,
@@ -523,6 +816,7 @@ def export_ngram_files_from_tokens(
         min_count_per_n=min_count_per_n,
         use_wordcloud=use_wordcloud,
         wordcloud_kwargs=wordcloud_kwargs,
+        engine=engine,
     )
 
     # 1) judgment_words.txt